@@ -167,7 +167,8 @@ Status NgraphOptimizer::Optimize(tensorflow::grappler::Cluster* cluster,
   //
   //   1. Marking [ngraph_mark_for_clustering.cc]
   //   2. Cluster Assignment [ngraph_assign_clusters.cc]
-  //   3. Cluster Deassignment [ngraph_deassign_clusters.cc]
+  //   3. Cluster Fusion [ngraph_fuse_clusters.cc] and Deassignment
+  //      [ngraph_deassign_clusters.cc]
   //   4. Cluster Encapsulation [ngraph_encapsulate_clusters.cc] - currently
   //      part of the ngraph_rewrite_pass.cc to be executed after POST_REWRITE
   //
@@ -199,7 +200,9 @@ Status NgraphOptimizer::Optimize(tensorflow::grappler::Cluster* cluster,
     DumpGraphs(graph, idx, "clustered", "Graph with Clusters Assigned");
   }
 
-  // 3. Deassign trivial clusters then, if requested, dump the graphs.
+  // 3. Fuse clusters if requested, deassign trivial clusters then, if
+  // requested, dump the graphs.
+  TF_RETURN_IF_ERROR(FuseClusters(&graph));
   TF_RETURN_IF_ERROR(DeassignClusters(&graph));
   if (DumpDeclusteredGraphs()) {
     DumpGraphs(graph, idx, "declustered",
@@ -20,6 +20,8 @@
 #include "ngraph/ngraph.hpp"
 #include "ngraph/opsets/opset.hpp"
 
+#include "ngraph_bridge/ie_weight_cache.h"
+#include "ngraph_bridge/ngraph_backend_manager.h"
 #include "ngraph_bridge/ngraph_executable.h"
 
 using namespace std;
@@ -29,22 +31,39 @@ namespace tensorflow {
 namespace ngraph_bridge {
 
 IE_Backend::IE_Backend(const string& config) {
-  string device = config.substr(0, config.find(":"));
-  InferenceEngine::Core core;
-  auto devices = core.GetAvailableDevices();
-  // TODO: Handle multiple devices
-  if (find(devices.begin(), devices.end(), device) == devices.end()) {
-    stringstream ss;
-    ss << "Device '" << config << "' not found.";
-    throw runtime_error(ss.str());
-  }
+  check_device(config);
   m_device = config;
 }
 
+void IE_Backend::check_device(const string& config) {
+  auto pos = config.find(":");
+  string device = config.substr(0, pos);
+  vector<string> listed_devices{device};
+  if ((device == "HETERO" || device == "MULTI") && pos != string::npos) {
+    listed_devices = ngraph::split(config.substr(pos + 1), ',');
+  }
+  auto devices = get_registered_devices();
+  for (auto listed_device : listed_devices) {
+    // MULTI takes the number of requests of a device, as in "CPU(4)"
+    listed_device = listed_device.substr(0, listed_device.find("("));
+    if (find(devices.begin(), devices.end(), listed_device) == devices.end()) {
+      stringstream ss;
+      ss << "Device '" << listed_device << "' of '" << config << "' not found.";
+      throw runtime_error(ss.str());
+    }
+  }
+}
+
 IE_Backend::~IE_Backend() { m_exec_map.clear(); }
 
 shared_ptr<Executable> IE_Backend::compile(shared_ptr<ngraph::Function> func,
                                            bool) {
+  return compile(func, "", {});
+}
+
+shared_ptr<Executable> IE_Backend::compile(shared_ptr<ngraph::Function> func,
+                                           const string& device,
+                                           const map<string, string>& config) {
   shared_ptr<Executable> rc;
   {
     std::lock_guard<std::mutex> guard(m_exec_map_mutex);
@@ -55,7 +74,18 @@ shared_ptr<Executable> IE_Backend::compile(shared_ptr<ngraph::Function> func,
     }
   }
 
-  rc = make_shared<IE_Executable>(func, m_device);
+  // Weights identical to those of the functions compiled before, for other
+  // signatures or clusters, are kept in memory once
+  IEWeightCache::ShareConstants(func);
+  if (!device.empty()) {
+    check_device(device);
+  }
+  map<string, string> exec_config = get_config();
+  for (const auto& it : config) {
+    exec_config[it.first] = it.second;
+  }
+  rc = make_shared<IE_Executable>(func, device.empty() ? m_device : device,
+                                  exec_config);
   {
     std::lock_guard<std::mutex> guard(m_exec_map_mutex);
     m_exec_map.insert({func, rc});
@@ -83,14 +113,33 @@ bool IE_Backend::is_supported(const Node& node) const {
 
 bool IE_Backend::is_supported_property(const Property) const { return false; }
 
+bool IE_Backend::set_config(const map<string, string>& config, string&) {
+  // The keys are checked by the plugin when it loads a network
+  std::lock_guard<std::mutex> guard(m_config_mutex);
+  for (const auto& it : config) {
+    m_config[it.first] = it.second;
+  }
+  return true;
+}
+
+map<string, string> IE_Backend::get_config() {
+  std::lock_guard<std::mutex> guard(m_config_mutex);
+  return m_config;
+}
+
+void IE_Backend::reset_config(const map<string, string>& config) {
+  std::lock_guard<std::mutex> guard(m_config_mutex);
+  m_config = config;
+}
+
 shared_ptr<runtime::Tensor> IE_Backend::create_dynamic_tensor(
     const element::Type& type, const PartialShape& shape) {
   return make_shared<IETensor>(type, shape);
 }
 
 vector<string> IE_Backend::get_registered_devices() {
-  InferenceEngine::Core core;
-  return core.GetAvailableDevices();
+  std::lock_guard<std::mutex> lock(BackendManager::GetIECoreMutex());
+  return BackendManager::GetIECore().GetAvailableDevices();
 }
 
 shared_ptr<runtime::Tensor> IE_Backend::create_tensor() {
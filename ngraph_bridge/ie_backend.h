@@ -38,15 +38,33 @@ class IE_Backend final : public Backend {
 
   shared_ptr<Executable> compile(shared_ptr<ngraph::Function> func,
                                  bool enable_performance_data = false) override;
+  // Compiles func for device, the backend's if empty, with config on top of
+  // the plugin configuration set on the backend
+  shared_ptr<Executable> compile(shared_ptr<ngraph::Function> func,
+                                 const string& device,
+                                 const map<string, string>& config);
   void remove_compiled_function(std::shared_ptr<Executable> exec) override;
   bool is_supported(const ngraph::Node& node) const override;
   bool is_supported_property(const Property prop) const override;
+  // Sets plugin configuration keys the networks of this backend are loaded
+  // with
+  bool set_config(const map<string, string>& config, string& error) override;
+  // The plugin configuration set on the backend
+  map<string, string> get_config();
+  // Replaces the plugin configuration set on the backend, e.g. with one
+  // returned by get_config
+  void reset_config(const map<string, string>& config);
 
   shared_ptr<ngraph::runtime::Tensor> create_dynamic_tensor(
       const ngraph::element::Type& type,
       const ngraph::PartialShape& shape) override;
 
   static vector<string> get_registered_devices();
+  // Throws if a device of a device config string is not available. Besides
+  // single devices, "HETERO:GPU,CPU" and "MULTI:CPU,GPU" list devices in
+  // priority order, e.g. for HETERO to fall back to the CPU for the layers
+  // the GPU does not support.
+  static void check_device(const string& device);
 
   shared_ptr<ngraph::runtime::Tensor> create_tensor() override;
 
@@ -74,6 +92,8 @@ class IE_Backend final : public Backend {
                      std::shared_ptr<Executable>>
       m_exec_map;
   string m_device;
+  std::mutex m_config_mutex;
+  map<string, string> m_config;
 };
 }
 }
@@ -14,6 +14,10 @@
 // limitations under the License.
 //*****************************************************************************
 
+#include <algorithm>
+#include <cstdlib>
+#include <limits>
+
 #include "ngraph/ngraph.hpp"
 #include "ngraph/opsets/opset.hpp"
 
@@ -21,6 +25,9 @@
 #include "ngraph_bridge/default_opset.h"
 #include "ngraph_bridge/ie_executable.h"
 #include "ngraph_bridge/ie_tensor.h"
+#include "ngraph_bridge/ie_weight_cache.h"
+#include "ngraph_bridge/ngraph_backend_manager.h"
+#include "ngraph_bridge/ngraph_timer.h"
 
 using namespace std;
 using namespace ngraph;
@@ -28,8 +35,83 @@ using namespace ngraph;
 namespace tensorflow {
 namespace ngraph_bridge {
 
-IE_Executable::IE_Executable(shared_ptr<Function> func, string device)
-    : m_device{device}, m_trivial_fn{nullptr} {
+// The orders of the Transpose nodes the builder inserts to go from the TF
+// layout to the nGraph one, and back, by rank
+static const map<size_t, vector<int64_t>> kToNchwOrders = {
+    {4, {0, 3, 1, 2}}, {5, {0, 4, 1, 2, 3}}};
+static const map<size_t, vector<int64_t>> kFromNchwOrders = {
+    {4, {0, 2, 3, 1}}, {5, {0, 2, 3, 4, 1}}};
+
+static bool IsTransposeWithOrder(const shared_ptr<Node>& node,
+                                 const map<size_t, vector<int64_t>>& orders) {
+  auto transpose = ngraph::as_type_ptr<opset::Transpose>(node);
+  if (transpose == nullptr) {
+    return false;
+  }
+  auto order = ngraph::as_type_ptr<opset::Constant>(
+      transpose->input_value(1).get_node_shared_ptr());
+  auto it = orders.find(transpose->get_output_shape(0).size());
+  return order != nullptr && it != orders.end() &&
+         order->cast_vector<int64_t>() == it->second;
+}
+
+static InferenceEngine::Layout GetNhwcLayout(size_t rank) {
+  return rank == 4 ? InferenceEngine::Layout::NHWC
+                   : InferenceEngine::Layout::NDHWC;
+}
+
+// The dims of a shape in the TF layout, in the order IE takes them in for
+// layout, and back
+static InferenceEngine::SizeVector ToNetworkDims(
+    const Shape& shape, InferenceEngine::Layout layout) {
+  if (layout == InferenceEngine::Layout::ANY) {
+    return InferenceEngine::SizeVector(shape.begin(), shape.end());
+  }
+  InferenceEngine::SizeVector dims;
+  for (auto axis : kToNchwOrders.at(shape.size())) {
+    dims.push_back(shape[axis]);
+  }
+  return dims;
+}
+
+static Shape FromNetworkDims(const InferenceEngine::SizeVector& dims,
+                             InferenceEngine::Layout layout) {
+  if (layout == InferenceEngine::Layout::ANY) {
+    return Shape(dims.begin(), dims.end());
+  }
+  Shape shape;
+  for (auto axis : kFromNchwOrders.at(dims.size())) {
+    shape.push_back(dims[axis]);
+  }
+  return shape;
+}
+
+// NGRAPH_TF_IE_LOWER_PRECISION set to "bf16" or "f16" runs the f32
+// computations of the executables in that type. Returns dynamic otherwise.
+static element::Type GetLoweredPrecision() {
+  const char* precision = std::getenv("NGRAPH_TF_IE_LOWER_PRECISION");
+  if (precision == nullptr) {
+    return element::dynamic;
+  }
+  if (string(precision) == "bf16") {
+    return element::bf16;
+  }
+  if (string(precision) == "f16") {
+    return element::f16;
+  }
+  NGRAPH_VLOG(0) << "Ignoring NGRAPH_TF_IE_LOWER_PRECISION=" << precision
+                 << ", expected bf16 or f16";
+  return element::dynamic;
+}
+
+IE_Executable::IE_Executable(shared_ptr<Function> func, string device,
+                             map<string, string> config)
+    : m_max_loaded_networks{8},
+      m_network_uses{0},
+      m_num_infer_reqs{0},
+      m_device{device},
+      m_load_config{config},
+      m_trivial_fn{nullptr} {
   NGRAPH_VLOG(2) << "Checking for unsupported ops in IE backend";
   const auto& opset = ngraph::get_opset3();
   for (const auto& node : func->get_ops()) {
@@ -58,59 +140,484 @@ IE_Executable::IE_Executable(shared_ptr<Function> func, string device)
   NGRAPH_VLOG(2) << "Checking for function parameters in IE backend";
   if (func->get_parameters().size() == 0) {
     NGRAPH_VLOG(1) << "No parameters found in nGraph function!";
-    // Try to find a node that can be converted into a "static input"
-    bool param_replaced = false;
+    // IE needs at least one input: convert a constant into a "static input",
+    // bound to a blob that holds its value and is shared with the other
+    // executables hoisting the same value. Only one constant is converted,
+    // as IE needs the constants that define shapes to stay constants.
     for (const auto& node : func->get_ordered_ops()) {
-      // Only try to convert constant nodes at the edge to parameters
-      // FIXME: IE cannot handle input parameters with i64/u6 precision
-      // at the moment
-      if (node->get_input_size() == 0 && node->is_constant() &&
-          !(node->get_element_type() == ngraph::element::i64 ||
-            node->get_element_type() == ngraph::element::u64)) {
-        auto constant = ngraph::as_type_ptr<opset::Constant>(node);
-        auto element_type = constant->get_element_type();
-        auto shape = constant->get_shape();
-        auto param = std::make_shared<opset::Parameter>(element_type, shape);
-        param->set_friendly_name(node->get_friendly_name());
-        ngraph::replace_node(node, param);
-        // nGraph doesn't provide a way to set a parameter to an existing
-        // function, so we clone the function here...
-        func = make_shared<Function>(func->get_results(),
-                                     ParameterVector{param}, func->get_name());
-        auto ie_tensor = make_shared<IETensor>(element_type, shape);
-        ie_tensor->write(constant->get_data_ptr(),
-                         shape_size(shape) * element_type.size());
-        m_hoisted_params.push_back(
-            make_pair(param->get_friendly_name(), ie_tensor));
-        NGRAPH_VLOG(1) << "Converted node " << constant << " to a parameter "
-                       << param;
-        param_replaced = true;
-        break;
+      auto constant = ngraph::as_type_ptr<opset::Constant>(node);
+      if (constant == nullptr) {
+        continue;
       }
-      if (!param_replaced) {
-        THROW_IE_EXCEPTION
-            << "Unable to add a parameter to a function with no parameters!";
+      auto param = hoist_constant(constant);
+      if (param == nullptr) {
+        continue;
       }
+      // nGraph doesn't provide a way to set a parameter to an existing
+      // function, so we clone the function here...
+      func = make_shared<Function>(func->get_results(), ParameterVector{param},
+                                   func->get_name());
+      NGRAPH_VLOG(1) << "Converted node " << constant << " to a parameter "
+                     << param;
+      break;
+    }
+    if (m_hoisted_params.empty()) {
+      THROW_IE_EXCEPTION
+          << "Unable to add a parameter to a function with no parameters!";
     }
   }
 
   set_parameters_and_results(*func);
 
+  // The function is rewritten on a copy, so that the results keep the
+  // shapes and types of the TF outputs
+  m_input_layouts.assign(
+      func->get_parameters().size() - m_hoisted_params.size(),
+      InferenceEngine::Layout::ANY);
+  m_output_layouts.assign(func->get_results().size(),
+                          InferenceEngine::Layout::ANY);
+  // NGRAPH_TF_IE_NHWC_BLOBS passes the NHWC tensors of TF as NHWC blobs
+  // rather than transposing them in the network
+  bool absorb_transposes = std::getenv("NGRAPH_TF_IE_NHWC_BLOBS") != nullptr;
+  auto lowered_type = GetLoweredPrecision();
+  if (absorb_transposes || lowered_type == element::f16) {
+    func = clone_function(*func);
+  }
+  if (absorb_transposes) {
+    func = absorb_boundary_transposes(func);
+  }
+  if (lowered_type == element::f16) {
+    lower_precision(func, lowered_type);
+  } else if (lowered_type == element::bf16) {
+    // The CPU plugin runs the layers that support it in bf16 itself
+    if (m_device == "CPU") {
+      m_load_config[CONFIG_KEY(ENFORCE_BF16)] = CONFIG_VALUE(YES);
+    } else {
+      NGRAPH_VLOG(0) << "Lowering to bf16 is only supported on CPU, running "
+                     << func->get_name() << " on " << m_device << " in f32";
+    }
+  }
+
   NGRAPH_VLOG(2) << "Creating IE CNN network using nGraph function";
   m_network = InferenceEngine::CNNNetwork(func);
 
+  // Check if the number of inputs that the CNN network expects is equal to
+  // the sum of the function parameters and the inputs we hoisted, if any.
+  // The calls then only need to check their number of inputs and outputs.
+  auto parameters = func->get_parameters();
+  for (int i = 0; i < parameters.size() - m_hoisted_params.size(); i++) {
+    m_input_names.push_back(parameters[i]->get_friendly_name());
+  }
+  if (m_network.getInputsInfo().size() !=
+      m_input_names.size() + m_hoisted_params.size()) {
+    THROW_IE_EXCEPTION << "Network inputs number differ from number of "
+                          "function parameters";
+  }
+  // Since IE has no "result" nodes, outputs are named after the parent of
+  // each result node
+  for (const auto& result : func->get_results()) {
+    auto parent = result->input_value(0).get_node_shared_ptr();
+    m_output_names.push_back(parent->get_friendly_name());
+  }
+  if (m_network.getOutputsInfo().size() != m_output_names.size()) {
+    THROW_IE_EXCEPTION << "Network outputs number differ from number of "
+                          "function results";
+  }
+  set_layouts(m_network);
+
   if (std::getenv("NGRAPH_TF_DUMP_GRAPHS")) {
     auto& name = m_network.getName();
     m_network.serialize(name + ".xml", name + ".bin");
   }
 
+  const char* max_shapes = std::getenv("NGRAPH_TF_IE_MAX_SHAPES");
+  if (max_shapes != nullptr) {
+    m_max_loaded_networks = std::max(atoi(max_shapes), 1);
+  }
+  m_function = func;
+
   NGRAPH_VLOG(2) << "Loading IE CNN network to device " << m_device;
+  vector<Shape> input_shapes;
+  for (size_t i = 0; i < m_input_names.size(); i++) {
+    input_shapes.push_back(get_parameters()[i]->get_shape());
+  }
+  auto network = load_network(m_network);
+  for (const auto& result : get_results()) {
+    network->output_shapes.push_back(result->get_shape());
+  }
+  network->last_used = ++m_network_uses;
+  m_loaded_networks[input_shapes] = network;
+}
+
+void IE_Executable::lower_precision(shared_ptr<Function> func,
+                                    const element::Type& type) {
+  for (const auto& node : func->get_ordered_ops()) {
+    if (auto constant = ngraph::as_type_ptr<opset::Constant>(node)) {
+      if (constant->get_element_type() == element::f32) {
+        auto lowered = make_shared<opset::Constant>(
+            type, constant->get_shape(), constant->cast_vector<float>());
+        lowered->set_friendly_name(constant->get_friendly_name());
+        replace_node(constant, lowered);
+      }
+    } else if (auto convert = ngraph::as_type_ptr<opset::Convert>(node)) {
+      if (convert->get_convert_element_type() == element::f32) {
+        convert->set_convert_element_type(type);
+      }
+    }
+  }
 
-  InferenceEngine::Core ie;
-  // Load network to the plugin (m_device) and create an infer request
-  InferenceEngine::ExecutableNetwork exe_network =
-      ie.LoadNetwork(m_network, m_device);
-  m_infer_req = exe_network.CreateInferRequest();
+  // Convert the f32 inputs once they are in the network, and the outputs
+  // back to f32 before they leave it
+  for (const auto& param : func->get_parameters()) {
+    if (param->get_element_type() != element::f32) {
+      continue;
+    }
+    auto targets = param->output(0).get_target_inputs();
+    auto lowered = make_shared<opset::Convert>(param, type);
+    for (auto target : targets) {
+      target.replace_source_output(lowered);
+    }
+  }
+  func->validate_nodes_and_infer_types();
+  auto results = func->get_results();
+  for (size_t i = 0; i < results.size(); i++) {
+    if (results[i]->get_element_type() == type &&
+        get_results()[i]->get_element_type() == element::f32) {
+      auto restored =
+          make_shared<opset::Convert>(results[i]->input_value(0), element::f32);
+      results[i]->input(0).replace_source_output(restored);
+    }
+  }
+  func->validate_nodes_and_infer_types();
+  NGRAPH_VLOG(1) << "Lowered the f32 computations of " << func->get_name()
+                 << " to " << type;
+}
+
+shared_ptr<Function> IE_Executable::absorb_boundary_transposes(
+    shared_ptr<Function> func) {
+  size_t num_transposes = 0;
+  size_t num_removed = 0;
+  for (const auto& node : func->get_ops()) {
+    num_transposes += ngraph::is_type<opset::Transpose>(node) ? 1 : 0;
+  }
+
+  // Feed the inputs that only go through a transpose to NCHW as NHWC blobs
+  // to a parameter in the NCHW shape
+  auto parameters = func->get_parameters();
+  size_t num_inputs = parameters.size() - m_hoisted_params.size();
+  for (size_t i = 0; i < num_inputs; i++) {
+    auto param = parameters[i];
+    vector<shared_ptr<Node>> transposes;
+    bool only_transposes = true;
+    for (const auto& input : param->output(0).get_target_inputs()) {
+      auto consumer = input.get_node()->shared_from_this();
+      only_transposes &= IsTransposeWithOrder(consumer, kToNchwOrders);
+      transposes.push_back(consumer);
+    }
+    if (transposes.empty() || !only_transposes) {
+      continue;
+    }
+    auto nchw_param = make_shared<opset::Parameter>(
+        param->get_element_type(), transposes[0]->get_output_shape(0));
+    nchw_param->set_friendly_name(param->get_friendly_name());
+    for (const auto& transpose : transposes) {
+      replace_node(transpose, nchw_param);
+      num_removed++;
+    }
+    parameters[i] = nchw_param;
+    m_input_layouts[i] = GetNhwcLayout(nchw_param->get_shape().size());
+  }
+
+  // Likewise, have IE write the results transposed back from NCHW as NHWC
+  // blobs. The transposed outputs must not be results themselves, as the
+  // network output would then be wanted in both layouts.
+  auto results = func->get_results();
+  for (size_t i = 0; i < results.size(); i++) {
+    auto transpose = results[i]->input_value(0).get_node_shared_ptr();
+    if (!IsTransposeWithOrder(transpose, kFromNchwOrders)) {
+      continue;
+    }
+    auto source = transpose->input_value(0);
+    bool feeds_result =
+        ngraph::is_type<opset::Parameter>(source.get_node_shared_ptr());
+    for (const auto& input : source.get_target_inputs()) {
+      feeds_result |= ngraph::is_type<opset::Result>(input.get_node());
+    }
+    if (feeds_result) {
+      continue;
+    }
+    results[i]->input(0).replace_source_output(source);
+    m_output_layouts[i] = GetNhwcLayout(source.get_shape().size());
+    num_removed++;
+  }
+
+  if (num_removed == 0) {
+    return func;
+  }
+  func = make_shared<Function>(results, parameters, func->get_name());
+  func->validate_nodes_and_infer_types();
+  NGRAPH_VLOG(1) << "Removed " << num_removed << " of the " << num_transposes
+                 << " transposes of " << func->get_name()
+                 << " by using NHWC blobs";
+  return func;
+}
+
+void IE_Executable::set_layouts(InferenceEngine::CNNNetwork& network) {
+  auto inputs_info = network.getInputsInfo();
+  for (size_t i = 0; i < m_input_names.size(); i++) {
+    if (m_input_layouts[i] != InferenceEngine::Layout::ANY) {
+      inputs_info.at(m_input_names[i])->setLayout(m_input_layouts[i]);
+    }
+  }
+  auto outputs_info = network.getOutputsInfo();
+  for (size_t i = 0; i < m_output_names.size(); i++) {
+    if (m_output_layouts[i] != InferenceEngine::Layout::ANY) {
+      outputs_info.at(m_output_names[i])->setLayout(m_output_layouts[i]);
+    }
+  }
+}
+
+shared_ptr<IE_Executable::LoadedNetwork> IE_Executable::load_network(
+    InferenceEngine::CNNNetwork& network) {
+  // Load network to the plugin (m_device) and create the infer requests.
+  // NGRAPH_TF_IE_INFER_REQUESTS sets the number of infer requests, and the
+  // shared Core configures the CPU plugin to run as many streams. "AUTO"
+  // lets the CPU plugin pick the streams for throughput. Otherwise the
+  // plugin's defaults are used. The networks loaded for other input shapes
+  // keep the number of infer requests of the first one.
+  auto loaded = make_shared<LoadedNetwork>();
+  Timer load_time;
+  {
+    std::lock_guard<std::mutex> lock(BackendManager::GetIECoreMutex());
+    loaded->exe_network = BackendManager::GetIECore().LoadNetwork(
+        network, m_device, m_load_config);
+  }
+  NGRAPH_VLOG(1) << "NGRAPH_TF_CACHE_PROFILE: Loaded network "
+                 << network.getName() << " to " << m_device << " in "
+                 << load_time.ElapsedInMS() << " ms";
+
+  if (m_num_infer_reqs == 0) {
+    const char* infer_reqs_env = std::getenv("NGRAPH_TF_IE_INFER_REQUESTS");
+    string infer_reqs = infer_reqs_env == nullptr ? "" : infer_reqs_env;
+    if (!infer_reqs.empty() && infer_reqs != "AUTO") {
+      m_num_infer_reqs = std::max(atoi(infer_reqs.c_str()), 1);
+    } else {
+      try {
+        m_num_infer_reqs =
+            loaded->exe_network
+                .GetMetric(METRIC_KEY(OPTIMAL_NUMBER_OF_INFER_REQUESTS))
+                .as<unsigned int>();
+      } catch (const std::exception& exp) {
+        NGRAPH_VLOG(1) << "Device " << m_device
+                       << " does not report its optimal number of infer "
+                          "requests: "
+                       << exp.what();
+      }
+      m_num_infer_reqs = std::max(m_num_infer_reqs, size_t(1));
+    }
+  }
+  NGRAPH_VLOG(2) << "Creating " << m_num_infer_reqs << " infer requests";
+  for (size_t i = 0; i < m_num_infer_reqs; i++) {
+    unique_ptr<InferRequest> infer_req(new InferRequest());
+    infer_req->request = loaded->exe_network.CreateInferRequest();
+    infer_req->input_blobs.resize(m_input_names.size());
+    infer_req->output_blobs.resize(m_output_names.size());
+    // The hoisted parameters never change
+    for (const auto& it : m_hoisted_params) {
+      shared_ptr<IETensor> tv = static_pointer_cast<IETensor>(it.second);
+      infer_req->request.SetBlob(it.first, tv->get_blob());
+    }
+    loaded->free_infer_reqs.push_back(std::move(infer_req));
+  }
+  return loaded;
+}
+
+shared_ptr<IE_Executable::LoadedNetwork> IE_Executable::get_network(
+    const vector<Shape>& input_shapes) {
+  // Networks are loaded outside of the lock, so that a new shape does not
+  // hold up the calls with the other shapes. Concurrent calls with the same
+  // new shapes wait for the one load in flight.
+  shared_future<shared_ptr<LoadedNetwork>> in_flight;
+  promise<shared_ptr<LoadedNetwork>> load_promise;
+  {
+    lock_guard<mutex> lock(m_loaded_networks_mutex);
+    auto it = m_loaded_networks.find(input_shapes);
+    if (it != m_loaded_networks.end()) {
+      it->second->last_used = ++m_network_uses;
+      return it->second;
+    }
+    auto loading = m_loading_networks.find(input_shapes);
+    if (loading != m_loading_networks.end()) {
+      in_flight = loading->second;
+    } else {
+      m_loading_networks[input_shapes] = load_promise.get_future().share();
+    }
+  }
+  if (in_flight.valid()) {
+    // Throws if the load failed
+    return in_flight.get();
+  }
+
+  shared_ptr<LoadedNetwork> loaded;
+  try {
+    loaded = reshape_network(input_shapes);
+  } catch (...) {
+    {
+      lock_guard<mutex> lock(m_loaded_networks_mutex);
+      m_loading_networks.erase(input_shapes);
+    }
+    load_promise.set_exception(current_exception());
+    throw;
+  }
+
+  {
+    lock_guard<mutex> lock(m_loaded_networks_mutex);
+    m_loading_networks.erase(input_shapes);
+    loaded->last_used = ++m_network_uses;
+    m_loaded_networks[input_shapes] = loaded;
+    if (m_loaded_networks.size() > m_max_loaded_networks) {
+      // Calls still running on the evicted network hold on to it
+      auto lru = m_loaded_networks.begin();
+      for (auto it = m_loaded_networks.begin(); it != m_loaded_networks.end();
+           ++it) {
+        if (it->second->last_used < lru->second->last_used) {
+          lru = it;
+        }
+      }
+      m_loaded_networks.erase(lru);
+    }
+  }
+  load_promise.set_value(loaded);
+  return loaded;
+}
+
+shared_ptr<IE_Executable::LoadedNetwork> IE_Executable::reshape_network(
+    const vector<Shape>& input_shapes) {
+  if (input_shapes.size() != m_input_names.size()) {
+    THROW_IE_EXCEPTION
+        << "Function inputs number differ from number of given inputs";
+  }
+  // Reshape a copy of the function, so that m_network keeps the shapes the
+  // function was compiled for
+  Timer reshape_time;
+  InferenceEngine::CNNNetwork network(clone_function(*m_function));
+  InferenceEngine::ICNNNetwork::InputShapes network_shapes;
+  for (size_t i = 0; i < input_shapes.size(); i++) {
+    network_shapes[m_input_names[i]] =
+        ToNetworkDims(input_shapes[i], m_input_layouts[i]);
+  }
+  network.reshape(network_shapes);
+  set_layouts(network);
+  auto loaded = load_network(network);
+  auto outputs_info = network.getOutputsInfo();
+  for (size_t i = 0; i < m_output_names.size(); i++) {
+    const auto& dims =
+        outputs_info.at(m_output_names[i])->getTensorDesc().getDims();
+    loaded->output_shapes.push_back(FromNetworkDims(dims, m_output_layouts[i]));
+  }
+  NGRAPH_VLOG(1) << "NGRAPH_TF_CACHE_PROFILE: Reshaped network "
+                 << network.getName() << " for new input shapes in "
+                 << reshape_time.ElapsedInMS() << " ms";
+  return loaded;
+}
+
+shared_ptr<opset::Parameter> IE_Executable::hoist_constant(
+    const shared_ptr<opset::Constant>& constant) {
+  auto element_type = constant->get_element_type();
+  auto shape = constant->get_shape();
+  shared_ptr<IETensor> ie_tensor;
+  shared_ptr<opset::Parameter> param;
+  shared_ptr<Node> replacement;
+  if (element_type == element::i64 || element_type == element::u64) {
+    // IE cannot handle input parameters with i64/u64 precision, so feed the
+    // values as i32 and convert them back, if they fit
+    vector<int32_t> values;
+    for (auto value : constant->cast_vector<int64_t>()) {
+      if (value < numeric_limits<int32_t>::min() ||
+          value > numeric_limits<int32_t>::max() ||
+          (element_type == element::u64 && value < 0)) {
+        return nullptr;
+      }
+      values.push_back(static_cast<int32_t>(value));
+    }
+    ie_tensor = IEWeightCache::GetTensor(element::i32, shape, values.data());
+    param = make_shared<opset::Parameter>(element::i32, shape);
+    replacement = make_shared<opset::Convert>(param, element_type);
+  } else {
+    ie_tensor =
+        IEWeightCache::GetTensor(element_type, shape, constant->get_data_ptr());
+    param = make_shared<opset::Parameter>(element_type, shape);
+    replacement = param;
+  }
+  param->set_friendly_name(constant->get_friendly_name());
+  replace_node(constant, replacement);
+  m_hoisted_params.push_back(make_pair(param->get_friendly_name(), ie_tensor));
+  return param;
+}
+
+size_t IE_Executable::get_preferred_pipeline_depth() const {
+  return std::max(m_num_infer_reqs, size_t(1));
+}
+
+vector<Shape> IE_Executable::get_result_shapes(
+    const vector<Shape>& input_shapes) {
+  if (m_trivial_fn) {
+    vector<Shape> result_shapes;
+    for (const auto& result : m_trivial_fn->get_results()) {
+      auto parent = result->input_value(0).get_node_shared_ptr();
+      auto param = ngraph::as_type_ptr<opset::Parameter>(parent);
+      if (param == nullptr) {
+        result_shapes.push_back(result->get_shape());
+        continue;
+      }
+      auto index = m_trivial_fn->get_parameter_index(param);
+      if (index < 0 || static_cast<size_t>(index) >= input_shapes.size()) {
+        THROW_IE_EXCEPTION << "Input parameter " << param->get_friendly_name()
+                           << " not found in trivial function";
+      }
+      result_shapes.push_back(input_shapes[index]);
+    }
+    return result_shapes;
+  }
+  return get_network(input_shapes)->output_shapes;
+}
+
+unique_ptr<IE_Executable::InferRequest> IE_Executable::acquire_infer_request(
+    LoadedNetwork& network) {
+  unique_lock<mutex> lock(network.infer_reqs_mutex);
+  network.infer_req_released.wait(
+      lock, [&network] { return !network.free_infer_reqs.empty(); });
+  unique_ptr<InferRequest> infer_req =
+      std::move(network.free_infer_reqs.back());
+  network.free_infer_reqs.pop_back();
+  return infer_req;
+}
+
+void IE_Executable::release_infer_request(LoadedNetwork& network,
+                                          unique_ptr<InferRequest> infer_req) {
+  {
+    lock_guard<mutex> lock(network.infer_reqs_mutex);
+    network.free_infer_reqs.push_back(std::move(infer_req));
+  }
+  network.infer_req_released.notify_one();
+}
+
+// Sets the blob of tensor, described in layout unless it is ANY, on the
+// network input or output name, unless the infer request already has it
+// from an earlier call
+static void SetBlobIfChanged(InferenceEngine::InferRequest& request,
+                             const string& name,
+                             const shared_ptr<runtime::Tensor>& tensor,
+                             InferenceEngine::Layout layout,
+                             InferenceEngine::Blob::Ptr& last_blob) {
+  auto ie_tensor = static_pointer_cast<IETensor>(tensor);
+  InferenceEngine::Blob::Ptr blob = layout == InferenceEngine::Layout::ANY
+                                        ? ie_tensor->get_blob()
+                                        : ie_tensor->get_blob(layout);
+  if (blob != last_blob) {
+    request.SetBlob(name, blob);
+    last_blob = blob;
+  }
 }
 
 bool IE_Executable::call(const vector<shared_ptr<runtime::Tensor>>& outputs,
@@ -121,45 +628,52 @@ bool IE_Executable::call(const vector<shared_ptr<runtime::Tensor>>& outputs,
     return call_trivial(outputs, inputs);
   }
 
-  // Check if the number of inputs that the CNN network expects is equal to the
-  // sum of the
-  // inputs specified and the inputs we hoisted, if any.
-  InferenceEngine::InputsDataMap input_info = m_network.getInputsInfo();
-  if (input_info.size() != (inputs.size() + m_hoisted_params.size())) {
+  if (inputs.size() != m_input_names.size()) {
     THROW_IE_EXCEPTION
         << "Function inputs number differ from number of given inputs";
   }
-
-  //  Prepare input blobs
-  auto func = m_network.getFunction();
-  auto parameters = func->get_parameters();
-  for (int i = 0; i < inputs.size(); i++) {
-    shared_ptr<IETensor> tv = static_pointer_cast<IETensor>(inputs[i]);
-    m_infer_req.SetBlob(parameters[i]->get_friendly_name(), tv->get_blob());
+  if (outputs.size() != m_output_names.size()) {
+    THROW_IE_EXCEPTION
+        << "Function outputs number differ from number of given outputs";
   }
 
-  for (const auto& it : m_hoisted_params) {
-    shared_ptr<IETensor> tv = static_pointer_cast<IETensor>(it.second);
-    m_infer_req.SetBlob(it.first, tv->get_blob());
+  vector<Shape> input_shapes;
+  for (const auto& input : inputs) {
+    input_shapes.push_back(input->get_shape());
   }
+  auto network = get_network(input_shapes);
 
-  InferenceEngine::OutputsDataMap output_info = m_network.getOutputsInfo();
-  if (output_info.size() != outputs.size()) {
-    THROW_IE_EXCEPTION
-        << "Function outputs number differ from number of given outputs";
-  }
+  // Hand the infer request back to the pool however the call ends
+  struct InferRequestReleaser {
+    shared_ptr<LoadedNetwork> network;
+    unique_ptr<InferRequest> infer_req;
+    ~InferRequestReleaser() {
+      release_infer_request(*network, std::move(infer_req));
+    }
+  } releaser{network, acquire_infer_request(*network)};
+  InferRequest& infer_req = *releaser.infer_req;
 
-  //  Prepare output blobs
-  auto results = func->get_results();
+  //  Prepare input and output blobs
+  for (int i = 0; i < inputs.size(); i++) {
+    SetBlobIfChanged(infer_req.request, m_input_names[i], inputs[i],
+                     m_input_layouts[i], infer_req.input_blobs[i]);
+  }
   for (int i = 0; i < outputs.size(); i++) {
-    shared_ptr<IETensor> tv = static_pointer_cast<IETensor>(outputs[i]);
-    // Since IE has no "result" nodes, we set the blob corresponding to the
-    // parent of this result node
-    auto parent = results[i]->input_value(0).get_node_shared_ptr();
-    m_infer_req.SetBlob(parent->get_friendly_name(), tv->get_blob());
+    auto output = static_pointer_cast<IETensor>(outputs[i]);
+    if (output->is_dynamic()) {
+      output->set_shape(network->output_shapes[i]);
+    }
+    SetBlobIfChanged(infer_req.request, m_output_names[i], outputs[i],
+                     m_output_layouts[i], infer_req.output_blobs[i]);
   }
 
-  m_infer_req.Infer();
+  // Run on one of the plugin's streams, so that concurrent calls overlap
+  infer_req.request.StartAsync();
+  InferenceEngine::StatusCode status = infer_req.request.Wait(
+      InferenceEngine::IInferRequest::WaitMode::RESULT_READY);
+  if (status != InferenceEngine::StatusCode::OK) {
+    THROW_IE_EXCEPTION << "Infer request failed with status " << status;
+  }
   return true;
 }
 
@@ -177,11 +691,17 @@ bool IE_Executable::call_trivial(
         THROW_IE_EXCEPTION << "Input parameter " << param->get_friendly_name()
                            << " not found in trivial function";
       }
-      auto size = inputs[index]->get_size_in_bytes();
-      unsigned char* buf_ptr = new unsigned char[size];
-      inputs[index]->read(buf_ptr, size);
-      outputs[0]->write(buf_ptr, size);
-      delete buf_ptr;
+      // Copy straight between the blobs, unless they share their memory
+      auto input_blob =
+          static_pointer_cast<IETensor>(inputs[index])->get_blob();
+      auto output_blob = static_pointer_cast<IETensor>(outputs[i])->get_blob();
+      auto input_mem = input_blob->rmap();
+      auto output_mem = output_blob->wmap();
+      const uint8_t* src = input_mem.as<const uint8_t*>();
+      uint8_t* dst = output_mem.as<uint8_t*>();
+      if (src != dst) {
+        copy(src, src + inputs[index]->get_size_in_bytes(), dst);
+      }
     } else if (ngraph::is_type<opset::Constant>(parent)) {
       auto constant = ngraph::as_type_ptr<opset::Constant>(parent);
       outputs[i]->write(constant->get_data_ptr(),
@@ -16,13 +16,18 @@
 
 #pragma once
 
+#include <condition_variable>
+#include <future>
+#include <map>
 #include <memory>
+#include <mutex>
 #include <string>
 #include <vector>
 
 #include <ie_core.hpp>
 #include "ngraph/ngraph.hpp"
 
+#include "ngraph_bridge/default_opset.h"
 #include "ngraph_bridge/ngraph_executable.h"
 
 using namespace std;
@@ -34,17 +39,93 @@ namespace ngraph_bridge {
 // function.
 class IE_Executable final : public Executable {
  public:
-  IE_Executable(shared_ptr<ngraph::Function> func, string device);
+  // device is a device config string, such as "CPU" or "MULTI:CPU,GPU", and
+  // config the plugin configuration to load the networks with
+  IE_Executable(shared_ptr<ngraph::Function> func, string device,
+                map<string, string> config = {});
   virtual ~IE_Executable() {}
+  // Safe to call from several threads; each call runs on an infer request
+  // of its own, and waits for one to be free if they are all in use
   bool call(const vector<shared_ptr<ngraph::runtime::Tensor>>& outputs,
             const vector<shared_ptr<ngraph::runtime::Tensor>>& inputs) final;
 
+  // The number of infer requests, i.e. of calls that can run at once
+  size_t get_preferred_pipeline_depth() const final;
+
+  // Loads the network reshaped for input_shapes if it differs from the
+  // shapes the function was compiled for
+  vector<ngraph::Shape> get_result_shapes(
+      const vector<ngraph::Shape>& input_shapes) final;
+
  private:
   bool call_trivial(const vector<shared_ptr<ngraph::runtime::Tensor>>& outputs,
                     const vector<shared_ptr<ngraph::runtime::Tensor>>& inputs);
+  // Replaces constant with a parameter fed with its value, and returns the
+  // parameter, or null if the value cannot be fed to IE
+  shared_ptr<opset::Parameter> hoist_constant(
+      const shared_ptr<opset::Constant>& constant);
+  // An infer request, with the blobs last set on it so that calls only set
+  // the ones that changed
+  struct InferRequest {
+    InferenceEngine::InferRequest request;
+    vector<InferenceEngine::Blob::Ptr> input_blobs;
+    vector<InferenceEngine::Blob::Ptr> output_blobs;
+  };
+  // The network loaded to the device for one set of input shapes, with its
+  // infer requests
+  struct LoadedNetwork {
+    InferenceEngine::ExecutableNetwork exe_network;
+    vector<ngraph::Shape> output_shapes;
+    // Infer requests not used by a call at the moment
+    vector<unique_ptr<InferRequest>> free_infer_reqs;
+    mutex infer_reqs_mutex;
+    condition_variable infer_req_released;
+    uint64_t last_used = 0;
+  };
+  // Removes the transposes from NHWC at the inputs and to NHWC at the
+  // outputs of func, whose inputs and outputs then take NHWC blobs
+  shared_ptr<ngraph::Function> absorb_boundary_transposes(
+      shared_ptr<ngraph::Function> func);
+  void set_layouts(InferenceEngine::CNNNetwork& network);
+  // Runs the f32 computations of func in type, keeping its inputs and
+  // outputs in f32
+  void lower_precision(shared_ptr<ngraph::Function> func,
+                       const ngraph::element::Type& type);
+  shared_ptr<LoadedNetwork> load_network(InferenceEngine::CNNNetwork& network);
+  // Returns the network loaded for input_shapes, reshaping and loading it if
+  // there is none yet
+  shared_ptr<LoadedNetwork> get_network(
+      const vector<ngraph::Shape>& input_shapes);
+  // Reshapes a copy of the function to input_shapes and loads it
+  shared_ptr<LoadedNetwork> reshape_network(
+      const vector<ngraph::Shape>& input_shapes);
+  static unique_ptr<InferRequest> acquire_infer_request(LoadedNetwork& network);
+  static void release_infer_request(LoadedNetwork& network,
+                                    unique_ptr<InferRequest> infer_req);
+
+  shared_ptr<ngraph::Function> m_function;
   InferenceEngine::CNNNetwork m_network;
-  InferenceEngine::InferRequest m_infer_req;
+  // Names of the network inputs fed by the call inputs and of the network
+  // outputs written to the call outputs, in call order
+  vector<string> m_input_names;
+  vector<string> m_output_names;
+  // The layouts of the blobs of the call inputs and outputs, ANY for the
+  // ones in the order of their shape
+  vector<InferenceEngine::Layout> m_input_layouts;
+  vector<InferenceEngine::Layout> m_output_layouts;
+  // The networks loaded so far, by the shapes of the call inputs. Only the
+  // NGRAPH_TF_IE_MAX_SHAPES most recently used are kept.
+  map<vector<ngraph::Shape>, shared_ptr<LoadedNetwork>> m_loaded_networks;
+  // The loads in flight, by the shapes of the call inputs
+  map<vector<ngraph::Shape>, shared_future<shared_ptr<LoadedNetwork>>>
+      m_loading_networks;
+  size_t m_max_loaded_networks;
+  uint64_t m_network_uses;
+  mutex m_loaded_networks_mutex;
+  size_t m_num_infer_reqs;
   string m_device;
+  // Passed to the plugin with the networks it loads
+  map<string, string> m_load_config;
   // This holds the parameters we insert for functions with no input parameters
   vector<pair<string, shared_ptr<ngraph::runtime::Tensor>>> m_hoisted_params;
   // This keeps track of whether the original function was trivial: either a
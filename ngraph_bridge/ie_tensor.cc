@@ -54,6 +54,10 @@ static InferenceEngine::Precision getPrecision(
   switch (element_type.get_type_enum()) {
     case element::Type_t::f32:
       return InferenceEngine::Precision::FP32;
+    case element::Type_t::f16:
+      return InferenceEngine::Precision::FP16;
+    case element::Type_t::bf16:
+      return InferenceEngine::Precision::BF16;
     case element::Type_t::u8:
       return InferenceEngine::Precision::U8;
     case element::Type_t::i8:
@@ -71,39 +75,38 @@ static InferenceEngine::Precision getPrecision(
     case element::Type_t::boolean:
       return InferenceEngine::Precision::BOOL;
     default:
+      // This release of IE has no FP64 and U32 precisions
       THROW_IE_EXCEPTION << "Can't convert type " << element_type
                          << " to IE precision!";
   }
 }
 
-IETensor::IETensor(const element::Type& element_type, const Shape& shape_,
-                   void* memory_pointer)
-    : runtime::Tensor(
-          make_shared<descriptor::Tensor>(element_type, shape_, "")) {
-  m_descriptor->set_tensor_layout(
-      make_shared<descriptor::layout::DenseTensorLayout>(*m_descriptor));
+// Returns a blob over memory_pointer, or an unallocated blob if it is null
+static InferenceEngine::MemoryBlob::Ptr makeBlob(
+    const element::Type& element_type, const InferenceEngine::TensorDesc& desc,
+    void* memory_pointer) {
+  InferenceEngine::MemoryBlob::Ptr blob;
+  auto size = shape_size(desc.getDims()) * element_type.size();
 
-  InferenceEngine::SizeVector shape = shape_;
-  InferenceEngine::Precision precision = getPrecision(element_type);
-  InferenceEngine::Layout layout = getLayoutByDims(shape.size());
-
-  auto desc = InferenceEngine::TensorDesc(precision, shape, layout);
-  auto size = shape_size(shape_) * element_type.size();
-
-#define MAKE_IE_BLOB(type_, desc_, ptr_, size_)                               \
-  do {                                                                        \
-    if (ptr_ == nullptr) {                                                    \
-      m_blob = make_shared<InferenceEngine::TBlob<type_>>(desc);              \
-    } else {                                                                  \
-      m_blob = make_shared<InferenceEngine::TBlob<type_>>(desc, (type_*)ptr_, \
-                                                          size);              \
-    }                                                                         \
+#define MAKE_IE_BLOB(type_, desc_, ptr_, size_)                             \
+  do {                                                                      \
+    if (ptr_ == nullptr) {                                                  \
+      blob = make_shared<InferenceEngine::TBlob<type_>>(desc);              \
+    } else {                                                                \
+      blob = make_shared<InferenceEngine::TBlob<type_>>(desc, (type_*)ptr_, \
+                                                        size);              \
+    }                                                                       \
   } while (0)
 
   switch (element_type) {
     case element::Type_t::f32:
       MAKE_IE_BLOB(float, desc, memory_pointer, size);
       break;
+    case element::Type_t::f16:
+    case element::Type_t::bf16:
+      // IE stores both 16-bit floating point precisions as int16_t
+      MAKE_IE_BLOB(int16_t, desc, memory_pointer, size);
+      break;
     case element::Type_t::u8:
       MAKE_IE_BLOB(uint8_t, desc, memory_pointer, size);
       break;
@@ -130,31 +133,106 @@ IETensor::IETensor(const element::Type& element_type, const Shape& shape_,
       break;
     default:
       THROW_IE_EXCEPTION << "Can't create IE blob for type " << element_type
-                         << " and shape " << shape_;
+                         << " and dims " << ngraph::join(desc.getDims());
   }
-#undef MAKE_IE_TBLOB
+#undef MAKE_IE_BLOB
+  return blob;
+}
 
-  if (memory_pointer == nullptr) {
-    m_blob->allocate();
-  }
+IETensor::IETensor(const element::Type& element_type, const Shape& shape,
+                   void* memory_pointer)
+    : runtime::Tensor(
+          make_shared<descriptor::Tensor>(element_type, shape, "")) {
+  create_blob(shape, memory_pointer);
 }
 
 IETensor::IETensor(const element::Type& element_type, const Shape& shape)
     : IETensor(element_type, shape, nullptr) {}
 
 IETensor::IETensor(const element::Type& element_type, const PartialShape& shape)
-    : runtime::Tensor(
-          make_shared<descriptor::Tensor>(element_type, shape, "")) {
-  throw runtime_error("partial shapes not supported.");
+    : runtime::Tensor(make_shared<descriptor::Tensor>(element_type, shape, "")),
+      m_dynamic(shape.is_dynamic()) {
+  if (!m_dynamic) {
+    create_blob(shape.to_shape(), nullptr);
+  }
+}
+
+IETensor::~IETensor() {
+  if (m_blob != nullptr) {
+    m_blob->deallocate();
+  }
+}
+
+void IETensor::set_shape(const Shape& shape) {
+  if (m_blob != nullptr && get_shape() == shape) {
+    return;
+  }
+  if (!m_dynamic) {
+    THROW_IE_EXCEPTION << "Can't change the shape of static tensor from "
+                       << get_shape() << " to " << shape;
+  }
+  if (m_blob != nullptr) {
+    m_blob->deallocate();
+  }
+  m_descriptor->set_tensor_type(get_element_type(), shape);
+  create_blob(shape, nullptr);
 }
 
-IETensor::~IETensor() { m_blob->deallocate(); }
+void IETensor::create_blob(const Shape& shape_, void* memory_pointer) {
+  auto element_type = get_element_type();
+  m_descriptor->set_tensor_layout(
+      make_shared<descriptor::layout::DenseTensorLayout>(*m_descriptor));
+
+  InferenceEngine::SizeVector shape = shape_;
+  InferenceEngine::Precision precision = getPrecision(element_type);
+  InferenceEngine::Layout layout = getLayoutByDims(shape.size());
+
+  auto desc = InferenceEngine::TensorDesc(precision, shape, layout);
+  m_blob = makeBlob(element_type, desc, memory_pointer);
+  if (memory_pointer == nullptr) {
+    m_blob->allocate();
+  }
+  m_layout_blob = nullptr;
+}
+
+InferenceEngine::MemoryBlob::Ptr IETensor::get_blob(
+    InferenceEngine::Layout layout) {
+  if (m_blob == nullptr) {
+    THROW_IE_EXCEPTION << "Can't get the blob of a tensor of dynamic shape "
+                       << get_partial_shape() << " before setting its shape";
+  }
+  if (m_layout_blob != nullptr &&
+      m_layout_blob->getTensorDesc().getLayout() == layout) {
+    return m_layout_blob;
+  }
+
+  // IE takes the dims in NC... order whatever the layout of the memory
+  const auto& dims = m_blob->getTensorDesc().getDims();
+  InferenceEngine::SizeVector nc_dims;
+  if (layout == InferenceEngine::Layout::NHWC && dims.size() == 4) {
+    nc_dims = {dims[0], dims[3], dims[1], dims[2]};
+  } else if (layout == InferenceEngine::Layout::NDHWC && dims.size() == 5) {
+    nc_dims = {dims[0], dims[4], dims[1], dims[2], dims[3]};
+  } else {
+    THROW_IE_EXCEPTION << "Can't describe tensor of shape " << get_shape()
+                       << " with layout " << layout;
+  }
+  auto desc = InferenceEngine::TensorDesc(
+      m_blob->getTensorDesc().getPrecision(), nc_dims, layout);
+  m_layout_blob =
+      makeBlob(get_element_type(), desc, m_blob->rwmap().as<void*>());
+  return m_layout_blob;
+}
 
 void IETensor::write(const void* src, size_t bytes) {
   const int8_t* src_ptr = static_cast<const int8_t*>(src);
   if (src_ptr == nullptr) {
     return;
   }
+  if (m_blob == nullptr) {
+    THROW_IE_EXCEPTION << "Can't write to a tensor of dynamic shape "
+                       << get_partial_shape() << " before setting its shape";
+  }
 
   auto lm = m_blob->wmap();
   uint8_t* output_ptr = lm.as<uint8_t*>();
@@ -166,6 +244,10 @@ void IETensor::read(void* dst, size_t bytes) const {
   if (dst_ptr == nullptr) {
     return;
   }
+  if (m_blob == nullptr) {
+    THROW_IE_EXCEPTION << "Can't read from a tensor of dynamic shape "
+                       << get_partial_shape() << " before setting its shape";
+  }
 
   auto lm = m_blob->rmap();
   uint8_t* output_ptr = lm.as<uint8_t*>();
@@ -26,6 +26,7 @@ class IETensor : public ngraph::runtime::Tensor {
  public:
   IETensor(const ngraph::element::Type& element_type,
            const ngraph::Shape& shape);
+  // Tensors of a dynamic shape have no blob until their shape is set
   IETensor(const ngraph::element::Type& element_type,
            const ngraph::PartialShape& shape);
   IETensor(const ngraph::element::Type& element_type,
@@ -37,12 +38,23 @@ class IETensor : public ngraph::runtime::Tensor {
 
   const void* get_data_ptr() const;
   InferenceEngine::MemoryBlob::Ptr get_blob() { return m_blob; }
+  // A blob over the same memory that describes it as laid out in layout (NHWC
+  // or NDHWC) rather than in the order of the tensor shape
+  InferenceEngine::MemoryBlob::Ptr get_blob(InferenceEngine::Layout layout);
+
+  bool is_dynamic() const { return m_dynamic; }
+  // Allocates the blob of a tensor of a dynamic shape for shape, unless it
+  // already has that shape
+  void set_shape(const ngraph::Shape& shape);
 
  private:
   IETensor(const IETensor&) = delete;
   IETensor(IETensor&&) = delete;
   IETensor& operator=(const IETensor&) = delete;
+  void create_blob(const ngraph::Shape& shape, void* memory_pointer);
   InferenceEngine::MemoryBlob::Ptr m_blob;
+  InferenceEngine::MemoryBlob::Ptr m_layout_blob;
+  bool m_dynamic = false;
 };
 }
 }
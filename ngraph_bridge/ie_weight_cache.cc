@@ -0,0 +1,135 @@
+//*****************************************************************************
+// Copyright 2020 Intel Corporation
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//*****************************************************************************
+
+#include <cstring>
+#include <utility>
+#include <vector>
+
+#include "ngraph/runtime/shared_buffer.hpp"
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/ie_weight_cache.h"
+
+using namespace std;
+using namespace ngraph;
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+std::mutex IEWeightCache::s_mutex;
+std::unordered_map<Signature, std::weak_ptr<opset::Constant>, SignatureHash>
+    IEWeightCache::s_constants;
+std::unordered_map<Signature, std::weak_ptr<IETensor>, SignatureHash>
+    IEWeightCache::s_tensors;
+
+Signature IEWeightCache::Hash(const element::Type& element_type,
+                              const Shape& shape, const void* data) {
+  SignatureBuilder builder;
+  string type_name = element_type.get_type_name();
+  builder.AddValue(static_cast<uint64>(type_name.size()));
+  builder.Add(type_name.data(), type_name.size());
+  builder.AddValue(static_cast<uint64>(shape.size()));
+  for (auto dim : shape) {
+    builder.AddValue(static_cast<uint64>(dim));
+  }
+  builder.Add(data, shape_size(shape) * element_type.size());
+  return builder.Get();
+}
+
+// Drops the entries whose value is no longer used by anyone
+template <typename T>
+static void RemoveExpired(
+    std::unordered_map<Signature, std::weak_ptr<T>, SignatureHash>& entries) {
+  for (auto it = entries.begin(); it != entries.end();) {
+    it = it->second.expired() ? entries.erase(it) : std::next(it);
+  }
+}
+
+void IEWeightCache::ShareConstants(const shared_ptr<Function>& func) {
+  // Hash outside of the lock, the weights may be large
+  vector<pair<shared_ptr<opset::Constant>, Signature>> constants;
+  for (const auto& node : func->get_ordered_ops()) {
+    auto constant = as_type_ptr<opset::Constant>(node);
+    if (constant != nullptr && shape_size(constant->get_shape()) *
+                                       constant->get_element_type().size() >=
+                                   kMinSharedBytes) {
+      constants.emplace_back(
+          constant, Hash(constant->get_element_type(), constant->get_shape(),
+                         constant->get_data_ptr()));
+    }
+  }
+
+  std::lock_guard<std::mutex> lock(s_mutex);
+  RemoveExpired(s_constants);
+  int num_shared = 0;
+  for (const auto& it : constants) {
+    const auto& constant = it.first;
+    auto element_type = constant->get_element_type();
+    auto shape = constant->get_shape();
+    size_t size = shape_size(shape) * element_type.size();
+
+    auto& entry = s_constants[it.second];
+    auto shared = entry.lock();
+    if (shared == nullptr) {
+      entry = constant;
+      continue;
+    }
+    if (shared == constant || shared->get_element_type() != element_type ||
+        shared->get_shape() != shape ||
+        memcmp(shared->get_data_ptr(), constant->get_data_ptr(), size) != 0) {
+      continue;
+    }
+
+    // The new constant reads the data of the shared one, and keeps it alive
+    auto buffer =
+        make_shared<runtime::SharedBuffer<shared_ptr<opset::Constant>>>(
+            static_cast<char*>(const_cast<void*>(shared->get_data_ptr())), size,
+            shared);
+    auto replacement =
+        make_shared<opset::Constant>(element_type, shape, buffer);
+    replacement->set_friendly_name(constant->get_friendly_name());
+    replace_node(constant, replacement);
+    num_shared++;
+  }
+  NGRAPH_VLOG(1) << "Shared the weights of " << num_shared << " constants of "
+                 << func->get_name();
+}
+
+shared_ptr<IETensor> IEWeightCache::GetTensor(const element::Type& element_type,
+                                              const Shape& shape,
+                                              const void* data) {
+  size_t size = shape_size(shape) * element_type.size();
+  Signature hash = Hash(element_type, shape, data);
+
+  std::lock_guard<std::mutex> lock(s_mutex);
+  RemoveExpired(s_tensors);
+  auto& entry = s_tensors[hash];
+  auto tensor = entry.lock();
+  if (tensor != nullptr && tensor->get_element_type() == element_type &&
+      tensor->get_shape() == shape &&
+      memcmp(tensor->get_data_ptr(), data, size) == 0) {
+    return tensor;
+  }
+  tensor = make_shared<IETensor>(element_type, shape);
+  tensor->write(data, size);
+  if (entry.expired()) {
+    entry = tensor;
+  }
+  return tensor;
+}
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
@@ -0,0 +1,65 @@
+//*****************************************************************************
+// Copyright 2020 Intel Corporation
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//*****************************************************************************
+
+#pragma once
+
+#include <memory>
+#include <mutex>
+#include <unordered_map>
+
+#include "ngraph/ngraph.hpp"
+
+#include "ngraph_bridge/default_opset.h"
+#include "ngraph_bridge/ie_tensor.h"
+#include "ngraph_bridge/ngraph_signature.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// Process-wide store of the constant weights of the IE functions, keyed by a
+// hash of their content. Identical weights, in several signatures of one
+// cluster or in different clusters, are held in memory once, for as long as
+// a function or executable uses them.
+class IEWeightCache {
+ public:
+  // Constants smaller than this are not worth sharing
+  static const size_t kMinSharedBytes = 1024;
+
+  // Replaces each large constant of func whose content is already held by a
+  // live constant with a constant sharing that one's data, and keeps the
+  // others so that later functions can share theirs
+  static void ShareConstants(const std::shared_ptr<ngraph::Function>& func);
+
+  // Returns a tensor holding the given value, shared with the executables
+  // that hoisted the same value. The tensor must not be written to.
+  static std::shared_ptr<IETensor> GetTensor(
+      const ngraph::element::Type& element_type, const ngraph::Shape& shape,
+      const void* data);
+
+ private:
+  static Signature Hash(const ngraph::element::Type& element_type,
+                        const ngraph::Shape& shape, const void* data);
+
+  static std::mutex s_mutex;
+  static std::unordered_map<Signature, std::weak_ptr<opset::Constant>,
+                            SignatureHash>
+      s_constants;
+  static std::unordered_map<Signature, std::weak_ptr<IETensor>, SignatureHash>
+      s_tensors;
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
@@ -15,6 +15,8 @@
  *******************************************************************************/
 
 #include "ngraph_bridge/ngraph_api.h"
+#include "ngraph_bridge/ngraph_async_compiler.h"
+#include "ngraph_bridge/ngraph_encapsulate_impl.h"
 
 namespace tensorflow {
 namespace ngraph_bridge {
@@ -66,6 +68,29 @@ extern void ngraph_set_disabled_ops(const char* op_type_list) {
 extern const char* ngraph_get_disabled_ops() {
   return ngraph::join(GetDisabledOps(), ",").c_str();
 }
+
+void ngraph_get_cache_stats(int64_t* hits, int64_t* misses, int64_t* evictions,
+                            int64_t* compile_time_saved_ms) {
+  const CacheStats& stats = NGraphEncapsulateImpl::GetExecCacheStats();
+  *hits = stats.hits;
+  *misses = stats.misses;
+  *evictions = stats.evictions;
+  *compile_time_saved_ms = stats.compile_time_saved_ms;
+}
+
+void ngraph_reset_cache_stats() {
+  NGraphEncapsulateImpl::GetExecCacheStats().Reset();
+}
+
+void ngraph_get_async_compile_stats(int64_t* fallbacks, int64_t* queue_depth,
+                                    int64_t* compiles) {
+  const AsyncCompileStats& stats = AsyncCompiler::GetStats();
+  *fallbacks = stats.fallbacks;
+  *queue_depth = stats.queue_depth;
+  *compiles = stats.compiles;
+}
+
+void ngraph_reset_async_compile_stats() { AsyncCompiler::GetStats().Reset(); }
 }
 
 // note that TensorFlow always uses camel case for the C++ API, but not for
@@ -47,6 +47,16 @@ extern bool ngraph_is_logging_placement();
 
 extern void ngraph_set_disabled_ops(const char* op_type_list);
 extern const char* ngraph_get_disabled_ops();
+
+extern void ngraph_get_cache_stats(int64_t* hits, int64_t* misses,
+                                   int64_t* evictions,
+                                   int64_t* compile_time_saved_ms);
+extern void ngraph_reset_cache_stats();
+
+extern void ngraph_get_async_compile_stats(int64_t* fallbacks,
+                                           int64_t* queue_depth,
+                                           int64_t* compiles);
+extern void ngraph_reset_async_compile_stats();
 }
 
 extern void Enable();
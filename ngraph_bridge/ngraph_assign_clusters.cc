@@ -327,6 +327,7 @@ Status AssignClusters(Graph* graph) {
     cluster_map[node] = std::make_shared<Cluster>();
     cluster_map[node]->index = new_index;
     cluster_map[node]->nodes.insert(node);
+    cluster_map[node]->backend = GetNodeBackend(node);
     NGRAPH_VLOG(5) << "Creating graphcycle Node: " << new_index << " for "
                    << node->name() << "[" << node->type_string() << "]";
 
@@ -0,0 +1,56 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <algorithm>
+#include <cstdlib>
+
+#include "tensorflow/core/lib/core/threadpool.h"
+#include "tensorflow/core/platform/env.h"
+
+#include "ngraph_bridge/ngraph_async_compiler.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+AsyncCompileStats AsyncCompiler::s_stats;
+
+bool AsyncCompiler::IsEnabled() {
+  return std::getenv("NGRAPH_TF_ASYNC_COMPILE") != nullptr;
+}
+
+void AsyncCompiler::Schedule(std::function<void()> compile) {
+  // Never destroyed, so that compiles still queued at exit do not race with
+  // static destructors
+  static thread::ThreadPool* pool = []() {
+    int num_threads = 1;
+    const char* threads = std::getenv("NGRAPH_TF_ASYNC_COMPILE_THREADS");
+    if (threads != nullptr) {
+      num_threads = std::max(atoi(threads), 1);
+    }
+    return new thread::ThreadPool(Env::Default(), "ngraph_async_compile",
+                                  num_threads);
+  }();
+
+  s_stats.queue_depth++;
+  pool->Schedule([compile]() {
+    compile();
+    s_stats.compiles++;
+    s_stats.queue_depth--;
+  });
+}
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
@@ -0,0 +1,66 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+// Background compilation of executables, so that the steps missing the
+// executable cache can run the TF graph of the cluster instead of waiting
+
+#ifndef NGRAPH_TF_BRIDGE_ASYNC_COMPILER_H_
+#define NGRAPH_TF_BRIDGE_ASYNC_COMPILER_H_
+#pragma once
+
+#include <atomic>
+#include <functional>
+
+#include "tensorflow/core/platform/types.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+struct AsyncCompileStats {
+  // Steps that ran the TF graph because their executable was not ready
+  std::atomic<int64> fallbacks{0};
+  // Compiles scheduled and not finished yet
+  std::atomic<int64> queue_depth{0};
+  // Compiles finished, whether they succeeded or not
+  std::atomic<int64> compiles{0};
+
+  // queue_depth is a gauge, it is not reset
+  void Reset() {
+    fallbacks = 0;
+    compiles = 0;
+  }
+};
+
+// Enabled by setting NGRAPH_TF_ASYNC_COMPILE. Compiles run on a process-wide
+// pool of NGRAPH_TF_ASYNC_COMPILE_THREADS threads (1 by default), which is
+// created on first use.
+class AsyncCompiler {
+ public:
+  static bool IsEnabled();
+
+  // Runs compile on the pool
+  static void Schedule(std::function<void()> compile);
+
+  static AsyncCompileStats& GetStats() { return s_stats; }
+
+ private:
+  static AsyncCompileStats s_stats;
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_ASYNC_COMPILER_H_
@@ -0,0 +1,63 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+// Execution of the encapsulate ops off the TF inter-op threads, which are
+// then free to run the independent branches of the graph
+
+#ifndef NGRAPH_TF_BRIDGE_ASYNC_EXECUTOR_H_
+#define NGRAPH_TF_BRIDGE_ASYNC_EXECUTOR_H_
+#pragma once
+
+#include <atomic>
+#include <functional>
+
+#include "tensorflow/core/platform/types.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+struct AsyncExecutionStats {
+  // Executions finished
+  std::atomic<int64> executions{0};
+  // Executions scheduled and not finished yet
+  std::atomic<int64> queue_depth{0};
+
+  // queue_depth is a gauge, it is not reset
+  void Reset() { executions = 0; }
+};
+
+// Enabled by setting NGRAPH_TF_ASYNC_EXECUTION. Executions run on a
+// process-wide pool of NGRAPH_TF_ASYNC_EXECUTION_THREADS threads (the number
+// of schedulable CPUs by default), which is created on first use. The
+// threads mostly wait on the backend, which runs the computation on threads
+// of its own.
+class AsyncExecutor {
+ public:
+  static bool IsEnabled();
+
+  // Runs execute on the pool
+  static void Schedule(std::function<void()> execute);
+
+  static AsyncExecutionStats& GetStats() { return s_stats; }
+
+ private:
+  static AsyncExecutionStats s_stats;
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_ASYNC_EXECUTOR_H_
@@ -15,9 +15,12 @@
  *******************************************************************************/
 
 #include "ngraph_bridge/ngraph_backend_manager.h"
+#include "ngraph_bridge/ngraph_timer.h"
 
 #if !defined(ENABLE_OPENVINO)
 #include "ngraph/runtime/backend_manager.hpp"
+#else
+#include <ie_plugin_config.hpp>
 #endif
 
 using namespace std;
@@ -27,6 +30,7 @@ namespace ngraph_bridge {
 
 shared_ptr<Backend> BackendManager::m_backend;
 string BackendManager::m_backend_name;
+map<string, shared_ptr<Backend>> BackendManager::m_backends;
 mutex BackendManager::m_backend_mutex;
 
 BackendManager::~BackendManager() {
@@ -35,9 +39,14 @@ BackendManager::~BackendManager() {
 
 Status BackendManager::SetBackend(const string& backend_name) {
   NGRAPH_VLOG(2) << "BackendManager::SetBackend(" << backend_name << ")";
-  shared_ptr<Backend> backend;
   string bname(backend_name);
-  auto status = CreateBackend(backend, bname);
+  const char* env = std::getenv("NGRAPH_TF_BACKEND");
+  if (env != nullptr && strlen(env) > 0) {
+    bname = string(env);
+  }
+
+  shared_ptr<Backend> backend;
+  auto status = GetBackend(bname, backend);
   if (!status.ok() || backend == nullptr) {
     return errors::Internal("Failed to set backend: ", status.error_message());
   }
@@ -61,6 +70,27 @@ shared_ptr<Backend> BackendManager::GetBackend() {
   return m_backend;
 }
 
+Status BackendManager::GetBackend(const string& backend_name,
+                                  shared_ptr<Backend>& backend) {
+  if (backend_name.empty()) {
+    string default_name;
+    TF_RETURN_IF_ERROR(GetBackendName(default_name));
+    lock_guard<mutex> lock(m_backend_mutex);
+    backend = m_backend;
+    return Status::OK();
+  }
+
+  lock_guard<mutex> lock(m_backend_mutex);
+  auto it = m_backends.find(backend_name);
+  if (it != m_backends.end()) {
+    backend = it->second;
+    return Status::OK();
+  }
+  TF_RETURN_IF_ERROR(CreateBackend(backend, backend_name));
+  m_backends[backend_name] = backend;
+  return Status::OK();
+}
+
 Status BackendManager::GetBackendName(string& backend_name) {
   NGRAPH_VLOG(2) << "BackendManager::GetBackendName()";
   if (m_backend == nullptr) {
@@ -78,18 +108,13 @@ Status BackendManager::GetBackendName(string& backend_name) {
 }
 
 Status BackendManager::CreateBackend(shared_ptr<Backend>& backend,
-                                     string& backend_name) {
+                                     const string& backend_name) {
 // Register backends for static linking
 #if defined(NGRAPH_BRIDGE_STATIC_LIB_ENABLE)
   ngraph_register_cpu_backend();
   ngraph_register_interpreter_backend();
 #endif
 
-  const char* env = std::getenv("NGRAPH_TF_BACKEND");
-  if (env != nullptr && strlen(env) > 0) {
-    backend_name = string(env);
-  }
-
   try {
     backend = Backend::create(backend_name);
   } catch (const std::exception& e) {
@@ -114,6 +139,39 @@ void BackendManager::SetConfig(const map<string, string>& config) {
   }
 }
 
+#if defined(ENABLE_OPENVINO)
+InferenceEngine::Core& BackendManager::GetIECore() {
+  // Never destroyed, as the plugins may still be used by executables that
+  // are torn down at exit
+  static InferenceEngine::Core* core = [] {
+    Timer create_time;
+    auto core = new InferenceEngine::Core();
+    // NGRAPH_TF_IE_INFER_REQUESTS also sets the number of CPU streams the
+    // infer requests of an executable run on, "AUTO" leaving it to the plugin
+    const char* infer_reqs = std::getenv("NGRAPH_TF_IE_INFER_REQUESTS");
+    if (infer_reqs != nullptr && strlen(infer_reqs) > 0) {
+      string streams = string(infer_reqs) == "AUTO"
+                           ? CONFIG_VALUE(CPU_THROUGHPUT_AUTO)
+                           : string(infer_reqs);
+      try {
+        core->SetConfig({{CONFIG_KEY(CPU_THROUGHPUT_STREAMS), streams}}, "CPU");
+      } catch (const std::exception& e) {
+        NGRAPH_VLOG(0) << "Could not configure the CPU plugin: " << e.what();
+      }
+    }
+    NGRAPH_VLOG(1) << "NGRAPH_TF_CACHE_PROFILE: Created Inference Engine Core"
+                   << " in " << create_time.ElapsedInMS() << " ms";
+    return core;
+  }();
+  return *core;
+}
+
+std::mutex& BackendManager::GetIECoreMutex() {
+  static std::mutex* core_mutex = new std::mutex();
+  return *core_mutex;
+}
+#endif
+
 // Returns the nGraph supported backend names
 vector<string> BackendManager::GetSupportedBackends() {
 #if !defined(ENABLE_OPENVINO)
@@ -21,6 +21,7 @@
 #define NGRAPH_TF_BRIDGE_BACKEND_MANAGER_H_
 
 #include <atomic>
+#include <map>
 #include <mutex>
 #include <ostream>
 #include <vector>
@@ -29,6 +30,10 @@
 
 #include "ngraph/ngraph.hpp"
 
+#if defined(ENABLE_OPENVINO)
+#include <ie_core.hpp>
+#endif
+
 #include "logging/ngraph_log.h"
 #include "ngraph_bridge/ngraph_backend.h"
 
@@ -48,20 +53,40 @@ class BackendManager {
   // Returns the currently set backend
   static shared_ptr<Backend> GetBackend();
 
+  // Returns the backend of type backend_name, creating it on first use, or
+  // the currently set backend if backend_name is empty. The backends are
+  // kept by name for the life of the process, so that clusters assigned to
+  // different backends run side by side.
+  static Status GetBackend(const string& backend_name,
+                           shared_ptr<Backend>& backend);
+
   // Returns the currently set backend's name
   static Status GetBackendName(string& backend_name);
 
   static void SetConfig(const map<string, string>& config);
 
+#if defined(ENABLE_OPENVINO)
+  // The Inference Engine Core shared by all the IE backends and executables.
+  // Creating a Core loads the device plugins, so it is created once, on
+  // first use, with the plugin configuration applied then.
+  static InferenceEngine::Core& GetIECore();
+  // Held around every call into GetIECore(), since the Core is not
+  // documented as safe to call from several threads at once and the
+  // encapsulate ops compile concurrently
+  static std::mutex& GetIECoreMutex();
+#endif
+
   ~BackendManager();
 
  private:
   // Creates backend of backend_name type
   static Status CreateBackend(shared_ptr<Backend>& backend,
-                              string& backend_name);
+                              const string& backend_name);
 
   static shared_ptr<Backend> m_backend;
   static string m_backend_name;
+  // All the backends created, by name
+  static map<string, shared_ptr<Backend>> m_backends;
   static mutex m_backend_mutex;
 };
 
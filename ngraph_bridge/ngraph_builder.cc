@@ -320,6 +320,24 @@ static Status MakeConstOp(const Node* op, ng::element::Type et,
   return Status::OK();
 }
 
+// Helper for Builder::TranslateGraph ("Const" op) for the 16 bit floating
+// point types, which ValuesFromConstNode does not read. Their TF and nGraph
+// representations are the same, so the tensor data is copied as is.
+static Status MakeConstOpFromProto(const Node* op, ng::element::Type et,
+                                   ng::Output<ng::Node>& ng_node) {
+  Tensor tensor;
+  if (!tensor.FromProto(op->def().attr().at("value").tensor())) {
+    return errors::Internal("MakeConstOp: Const tensor proto parsing failed");
+  }
+
+  ng::Shape ng_shape;
+  TF_RETURN_IF_ERROR(TFTensorShapeToNGraphShape(tensor.shape(), &ng_shape));
+
+  ng_node = ConstructNgNode<opset::Constant>(op->name(), et, ng_shape,
+                                             tensor.tensor_data().data());
+  return Status::OK();
+}
+
 const Builder::ConstMap& Builder::TF_NGRAPH_CONST_MAP() {
   static const Builder::ConstMap the_map = {
       {DataType::DT_FLOAT, make_pair(MakeConstOp<float>, ng::element::f32)},
@@ -334,7 +352,10 @@ const Builder::ConstMap& Builder::TF_NGRAPH_CONST_MAP() {
       {DataType::DT_UINT8, make_pair(MakeConstOp<uint8>, ng::element::u8)},
       {DataType::DT_UINT16, make_pair(MakeConstOp<uint16>, ng::element::u16)},
       {DataType::DT_BOOL,
-       make_pair(MakeConstOp<bool, char>, ng::element::boolean)}};
+       make_pair(MakeConstOp<bool, char>, ng::element::boolean)},
+      {DataType::DT_HALF, make_pair(MakeConstOpFromProto, ng::element::f16)},
+      {DataType::DT_BFLOAT16,
+       make_pair(MakeConstOpFromProto, ng::element::bf16)}};
   return the_map;
 }
 
@@ -0,0 +1,63 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+#ifndef NGRAPH_TF_BRIDGE_CALL_LIMITER_H_
+#define NGRAPH_TF_BRIDGE_CALL_LIMITER_H_
+#pragma once
+
+#include <algorithm>
+
+#include "absl/synchronization/mutex.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// Bounds the number of threads calling into an executable at once. With a
+// limit of 1 it behaves like a mutex, and like a mutex it can be held with
+// std::lock_guard.
+class CallLimiter {
+ public:
+  explicit CallLimiter(int max_calls)
+      : m_max_calls(std::max(max_calls, 1)), m_available(m_max_calls) {}
+
+  void lock() {
+    m_mutex.Lock();
+    while (m_available == 0) {
+      m_cv.Wait(&m_mutex);
+    }
+    m_available--;
+    m_mutex.Unlock();
+  }
+
+  void unlock() {
+    m_mutex.Lock();
+    m_available++;
+    m_cv.Signal();
+    m_mutex.Unlock();
+  }
+
+  int GetMaxCalls() const { return m_max_calls; }
+
+ private:
+  const int m_max_calls;
+  int m_available;
+  absl::CondVar m_cv;
+  absl::Mutex m_mutex;
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_CALL_LIMITER_H_
@@ -18,9 +18,12 @@
 #define NGRAPH_DATA_CACHE_H_
 #pragma once
 
-#include <deque>
+#include <chrono>
+#include <future>
+#include <memory>
 #include <mutex>
 #include <ostream>
+#include <unordered_map>
 #include <vector>
 #include "absl/synchronization/mutex.h"
 
@@ -29,6 +32,7 @@
 
 #include "logging/ngraph_log.h"
 #include "ngraph/ngraph.hpp"
+#include "ngraph_bridge/ngraph_lru_cache.h"
 
 namespace tensorflow {
 
@@ -36,18 +40,25 @@ namespace ngraph_bridge {
 
 // Forward declaration for friend class
 namespace testing {
+class NGraphDataCacheTest;
 class NGraphDataCacheTest_SameKeyMultiThread_Test;
 class NGraphDataCacheTest_RemoveItemTest_Test;
+class NGraphDataCacheTest_CreateErrorMultiThread_Test;
 }
 
 template <typename KeyType, typename ValueType>
 class NgraphDataCache {
  public:
-  explicit NgraphDataCache(int depth);
+  // Threads waiting for another thread to create the item they look up give
+  // up after create_timeout_ms, or never if it is negative
+  explicit NgraphDataCache(int depth, int64 create_timeout_ms = -1);
   ~NgraphDataCache();
 
   // This method performs lookup in the cache for requested key, if not found
-  // it will create item, put it in the cache and returns item and status
+  // it will create item, put it in the cache and returns item and status.
+  // Items are created once however many threads miss on the same key: the
+  // others wait for the item, or the error, of the thread creating it, and
+  // report a cache hit if it succeeds.
   std::pair<Status, ValueType> LookUpOrCreate(
       KeyType key,
       std::function<std::pair<Status, ValueType>(KeyType)> callback_create_item,
@@ -63,47 +74,61 @@ class NgraphDataCache {
                     std::function<void(ValueType)> callback_destroy_item);
   Status RemoveAll(std::function<void(ValueType)> callback_destroy_item);
 
+  const CacheStats& GetStats() const { return m_stats; }
+
  private:
-  std::unordered_map<KeyType, ValueType> m_ng_items_map;
-  std::deque<KeyType> m_lru;
+  using CreateResult = std::pair<Status, ValueType>;
+
+  // Creates the item and adds it to the cache, evicting if it is full
+  CreateResult CreateItem(
+      KeyType key,
+      std::function<std::pair<Status, ValueType>(KeyType)> callback_create_item,
+      std::function<void(ValueType)> callback_destroy_item);
+
+  LRUCache<KeyType, ValueType> m_ng_items;
   int m_depth;
+  int64 m_create_timeout_ms;
+  CacheStats m_stats;
   absl::Mutex m_mutex;
+  // Results of the items being created, by key
+  std::unordered_map<KeyType, std::shared_future<CreateResult>> m_in_flight;
+  // Look ups that waited for another thread to create their item
+  int64 m_num_waits = 0;
 
   // Test class
+  friend class tensorflow::ngraph_bridge::testing::NGraphDataCacheTest;
   friend class tensorflow::ngraph_bridge::testing::
       NGraphDataCacheTest_SameKeyMultiThread_Test;
   friend class tensorflow::ngraph_bridge::testing::
       NGraphDataCacheTest_RemoveItemTest_Test;
+  friend class tensorflow::ngraph_bridge::testing::
+      NGraphDataCacheTest_CreateErrorMultiThread_Test;
 };
 
 template <typename KeyType, typename ValueType>
-NgraphDataCache<KeyType, ValueType>::NgraphDataCache(int depth)
-    : m_depth(depth) {}
+NgraphDataCache<KeyType, ValueType>::NgraphDataCache(int depth,
+                                                     int64 create_timeout_ms)
+    : m_depth(depth), m_create_timeout_ms(create_timeout_ms) {}
 
 template <typename KeyType, typename ValueType>
 NgraphDataCache<KeyType, ValueType>::~NgraphDataCache() {
-  m_ng_items_map.clear();
-  m_lru.clear();
+  m_ng_items.clear();
 }
 
 template <typename KeyType, typename ValueType>
 Status NgraphDataCache<KeyType, ValueType>::RemoveItem(
     KeyType key, std::function<void(ValueType)> callback_destroy_item) {
   absl::MutexLock lock(&m_mutex);
-  if (m_ng_items_map.find(key) != m_ng_items_map.end()) {
+  ValueType* item = m_ng_items.Peek(key);
+  if (item != nullptr) {
     try {
-      callback_destroy_item(m_ng_items_map.at(key));
+      callback_destroy_item(*item);
     } catch (std::bad_function_call& exception) {
       return errors::Internal(
           "Failed to destroy item. Invalid Callback to Destroy ",
           exception.what(), "\n");
     }
-    m_ng_items_map.erase(key);
-    m_lru.pop_back();
-  }
-  if (m_ng_items_map.size() != m_lru.size()) {
-    return errors::Internal(
-        "Error occured: size of m_ng_items_map is not same as that of m_lru");
+    m_ng_items.Erase(key);
   }
   return Status::OK();
 }
@@ -117,21 +142,21 @@ template <typename KeyType, typename ValueType>
 Status NgraphDataCache<KeyType, ValueType>::RemoveAll(
     std::function<void(ValueType)> callback_destroy_item) {
   absl::MutexLock lock(&m_mutex);
-  for (auto it = m_ng_items_map.begin(); it != m_ng_items_map.end(); it++) {
+  Status status = Status::OK();
+  m_ng_items.ForEach([&](const KeyType&, ValueType& item) {
+    if (!status.ok()) {
+      return;
+    }
     try {
-      callback_destroy_item(it->second);
+      callback_destroy_item(item);
     } catch (std::bad_function_call& exception) {
-      return errors::Internal(
+      status = errors::Internal(
           "Failed to destroy item. Invalid Callback to Destroy ",
           exception.what(), "\n");
     }
-  }
-  if (m_ng_items_map.size() != m_lru.size()) {
-    return errors::Internal(
-        "Error occured: size of m_ng_items_map is not same as that of m_lru");
-  }
-  m_ng_items_map.erase(m_ng_items_map.begin(), m_ng_items_map.end());
-  m_lru.clear();
+  });
+  TF_RETURN_IF_ERROR(status);
+  m_ng_items.clear();
   return Status::OK();
 }
 
@@ -142,16 +167,71 @@ NgraphDataCache<KeyType, ValueType>::LookUpOrCreate(
     std::function<std::pair<Status, ValueType>(KeyType)> callback_create_item,
     std::function<void(ValueType)> callback_destroy_item,
     bool& found_in_cache) {
-  // look up in the cache
+  std::promise<CreateResult> promise;
+  std::shared_future<CreateResult> in_flight;
+  // look up in the cache, and in the items being created
   {
     absl::MutexLock lock(&m_mutex);
-    auto it = m_ng_items_map.find(key);
-    found_in_cache = (it != m_ng_items_map.end());
+    ValueType* cached_item = m_ng_items.Find(key);
+    found_in_cache = (cached_item != nullptr);
+    if (found_in_cache) {
+      m_stats.hits++;
+      return std::make_pair(Status::OK(), *cached_item);
+    }
+    auto it = m_in_flight.find(key);
+    if (it != m_in_flight.end()) {
+      in_flight = it->second;
+      m_num_waits++;
+    } else {
+      m_stats.misses++;
+      m_in_flight[key] = promise.get_future().share();
+    }
+  }
+
+  // Another thread is creating the item, wait for it
+  if (in_flight.valid()) {
+    if (m_create_timeout_ms >= 0 &&
+        in_flight.wait_for(std::chrono::milliseconds(m_create_timeout_ms)) !=
+            std::future_status::ready) {
+      return std::make_pair(
+          errors::DeadlineExceeded("Timed out after ", m_create_timeout_ms,
+                                   " ms waiting for an item to be created"),
+          ValueType());
+    }
+    CreateResult result = in_flight.get();
+    found_in_cache = result.first.ok();
     if (found_in_cache) {
-      return std::make_pair(Status::OK(), m_ng_items_map.at(key));
+      m_stats.hits++;
     }
+    return result;
   }
-  // Item not found in cache, create item
+
+  // Item not found in cache, create item. Whatever happens, the key must
+  // leave m_in_flight and the waiting threads must get a result.
+  CreateResult result;
+  try {
+    result = CreateItem(key, callback_create_item, callback_destroy_item);
+  } catch (std::exception& exception) {
+    result = std::make_pair(
+        errors::Internal("Failed to create an item: ", exception.what()),
+        ValueType());
+  } catch (...) {
+    result = std::make_pair(errors::Internal("Failed to create an item"),
+                            ValueType());
+  }
+  {
+    absl::MutexLock lock(&m_mutex);
+    m_in_flight.erase(key);
+  }
+  promise.set_value(result);
+  return result;
+}
+
+template <typename KeyType, typename ValueType>
+std::pair<Status, ValueType> NgraphDataCache<KeyType, ValueType>::CreateItem(
+    KeyType key,
+    std::function<std::pair<Status, ValueType>(KeyType)> callback_create_item,
+    std::function<void(ValueType)> callback_destroy_item) {
   ValueType item;
   pair<Status, ValueType> status_item_pair;
   try {
@@ -162,6 +242,12 @@ NgraphDataCache<KeyType, ValueType>::LookUpOrCreate(
             "Failed to create an item. Invalid Callback to Create ",
             exception.what(), "\n"),
         item);
+  } catch (std::exception& exception) {
+    // Waiting threads get the error too, rather than waiting forever
+    return std::make_pair(
+        errors::Internal("Failed to create an item: ", exception.what()), item);
+  } catch (...) {
+    return std::make_pair(errors::Internal("Failed to create an item"), item);
   }
   // If item is successfully created we will place in the cache.
   if (status_item_pair.first == Status::OK()) {
@@ -170,10 +256,12 @@ NgraphDataCache<KeyType, ValueType>::LookUpOrCreate(
     {
       absl::MutexLock lock(&m_mutex);
       // Remove item if cache is full
-      if (m_ng_items_map.size() == m_depth) {
-        auto key_to_evict = m_lru.back();
+      if (m_ng_items.Peek(key) == nullptr && m_ng_items.size() == m_depth) {
+        ValueType evicted_item;
+        m_ng_items.PopLeastRecent(nullptr, &evicted_item);
+        m_stats.evictions++;
         try {
-          callback_destroy_item(m_ng_items_map.at(key_to_evict));
+          callback_destroy_item(evicted_item);
         } catch (std::bad_function_call& exception) {
           return std::make_pair(
               errors::Internal(
@@ -181,26 +269,12 @@ NgraphDataCache<KeyType, ValueType>::LookUpOrCreate(
                   exception.what(), "\n"),
               item);
         }
-        m_ng_items_map.erase(key_to_evict);
-        m_lru.pop_back();
-      }
-      // Add item to cache
-      auto it = m_ng_items_map.emplace(key, item);
-      if (it.second == true) {
-        m_lru.push_front(key);
-      } else {
-        auto key_itr = find(m_lru.begin(), m_lru.end(), key);
-        m_lru.erase(key_itr);
-        m_lru.push_front(key);
       }
+      // Add item to cache, or make it the most recently used if it has been
+      // added in the meantime
+      m_ng_items.Insert(key, item);
     }  // lock ends here.
 
-    if (m_ng_items_map.size() != m_lru.size()) {
-      return std::make_pair(
-          errors::Internal("Error occured: size of m_ng_items_map is not same "
-                           "as that of m_lru"),
-          item);
-    }
     return std::make_pair(Status::OK(), item);
   }
 
@@ -644,6 +644,15 @@ Status Encapsulator::RewritePass(
         GetStaticInputs(&graph_for_current_encapsulate, &static_input_indexes));
     nb.Attr("_ngraph_static_inputs", static_input_indexes);
 
+    // The nodes of a cluster are all assigned to the same backend
+    for (auto node : graph_for_current_encapsulate.op_nodes()) {
+      string backend_name = GetNodeBackend(node);
+      if (!backend_name.empty()) {
+        nb.Attr("_ngraph_backend", backend_name);
+        break;
+      }
+    }
+
     Status status = nb.Finalize(graph, &n);
     TF_RETURN_IF_ERROR(status);
     n->set_assigned_device_name(device_name_map[cluster_idx]);
@@ -873,7 +882,6 @@ Status PerformTranslation(Node* node, const std::map<std::string, vector<int>>&
         node->name(), " which is of type ", node->type_string());
   }
   std::vector<TensorShape> input_shapes;
-  std::stringstream signature_ss;
   for (auto in_node : node->in_nodes()) {
     if (!in_node->IsSource()) {
       auto itr_shape = inputs_node_shapes_for_compilation.find(in_node->name());
@@ -892,16 +900,11 @@ Status PerformTranslation(Node* node, const std::map<std::string, vector<int>>&
         std::vector<int64> converted_to_int64(itr_shape->second.begin(),
                                               itr_shape->second.end());
         input_shapes.push_back(TensorShape(converted_to_int64));
-        for (auto itr1 : itr_shape->second) {
-          signature_ss << itr1 << ",";
-        }
-        signature_ss << ";";
       }
     }
   }
 
-  signature_ss << "/";
-  signature = signature_ss.str();
+  signature = NGraphEncapsulateImpl::ShapeSignatureString(input_shapes);
   NGRAPH_VLOG(3) << "Performing AOT for " << node->name()
                  << " for signature = " << signature << "\n";
   std::vector<const Tensor*> static_input_map;
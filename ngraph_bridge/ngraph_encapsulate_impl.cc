@@ -13,11 +13,16 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
  *******************************************************************************/
+#include <algorithm>
 #include <cstdlib>
+#include <cstring>
+#include <map>
 #include <mutex>
+#include <set>
 #include <utility>
 
 #include "tensorflow/core/common_runtime/function.h"
+#include "tensorflow/core/common_runtime/graph_runner.h"
 #include "tensorflow/core/common_runtime/optimization_registry.h"
 #include "tensorflow/core/framework/graph.pb.h"
 #include "tensorflow/core/framework/node_def_util.h"
@@ -26,16 +31,22 @@
 #include "tensorflow/core/framework/tensor.h"
 #include "tensorflow/core/graph/graph.h"
 #include "tensorflow/core/graph/graph_constructor.h"
+#include "tensorflow/core/lib/strings/numbers.h"
 
 #include "logging/ngraph_log.h"
 #include "ngraph_bridge/ngraph_backend_manager.h"
+#include "ngraph_bridge/default_opset.h"
 #include "ngraph_bridge/ngraph_builder.h"
 #include "ngraph_bridge/ngraph_cluster_manager.h"
 #include "ngraph_bridge/ngraph_encapsulate_impl.h"
 #include "ngraph_bridge/ngraph_encapsulate_op.h"
 #include "ngraph_bridge/ngraph_mark_for_clustering.h"
+#include "ngraph_bridge/ngraph_persistent_cache.h"
 #include "ngraph_bridge/ngraph_timer.h"
 #include "ngraph_bridge/ngraph_utils.h"
+#if defined(ENABLE_OPENVINO)
+#include "ngraph_bridge/ie_backend.h"
+#endif
 
 using namespace std;
 namespace ng = ngraph;
@@ -43,13 +54,118 @@ namespace ng = ngraph;
 namespace tensorflow {
 namespace ngraph_bridge {
 
+namespace {
+
+// Ops whose translation depends on the rank of their inputs but not on their
+// shapes, so that a function translated for one shape is correct once
+// reshaped for another. Other ops may fold the input shapes into constants.
+bool IsShapeGenericOp(const string& op_type) {
+  static const std::set<string> shape_generic_ops = {"_Arg",
+                                                     "_Retval",
+                                                     "Abs",
+                                                     "Acos",
+                                                     "Add",
+                                                     "AddV2",
+                                                     "Asin",
+                                                     "Atan",
+                                                     "Ceil",
+                                                     "Const",
+                                                     "Cos",
+                                                     "Cosh",
+                                                     "Equal",
+                                                     "Exp",
+                                                     "Floor",
+                                                     "FloorMod",
+                                                     "Greater",
+                                                     "GreaterEqual",
+                                                     "Identity",
+                                                     "Less",
+                                                     "LessEqual",
+                                                     "Log",
+                                                     "LogicalAnd",
+                                                     "LogicalNot",
+                                                     "LogicalOr",
+                                                     "Maximum",
+                                                     "Minimum",
+                                                     "Mod",
+                                                     "Mul",
+                                                     "Neg",
+                                                     "NoOp",
+                                                     "NotEqual",
+                                                     "Pow",
+                                                     "PreventGradient",
+                                                     "RealDiv",
+                                                     "Relu",
+                                                     "Sigmoid",
+                                                     "Sign",
+                                                     "Sin",
+                                                     "Sinh",
+                                                     "Snapshot",
+                                                     "Sqrt",
+                                                     "SquaredDifference",
+                                                     "Sub",
+                                                     "Tan",
+                                                     "Tanh"};
+  return shape_generic_ops.count(op_type) != 0;
+}
+
+int64 OutputBytes(const ng::Output<ng::Node>& output) {
+  const auto& shape = output.get_partial_shape();
+  if (shape.is_dynamic()) {
+    return 0;
+  }
+  return ng::shape_size(shape.to_shape()) * output.get_element_type().size();
+}
+
+// The weights of a function, as they are kept by its executable. Weights
+// shared with other functions are counted for each of them.
+int64 ConstantBytes(const std::shared_ptr<ng::Function>& ng_function) {
+  int64 bytes = 0;
+  for (const auto& node : ng_function->get_ops()) {
+    if (ng::as_type_ptr<opset::Constant>(node) != nullptr) {
+      bytes += OutputBytes(node->output(0));
+    }
+  }
+  return bytes;
+}
+
+// The buffers of the inputs and outputs of an executable
+int64 BufferBytes(const std::shared_ptr<Executable>& ng_exec) {
+  int64 bytes = 0;
+  for (const auto& param : ng_exec->get_parameters()) {
+    bytes += OutputBytes(param->output(0));
+  }
+  for (const auto& result : ng_exec->get_results()) {
+    bytes += OutputBytes(result->output(0));
+  }
+  return bytes;
+}
+
+}  // namespace
+
+CacheStats NGraphEncapsulateImpl::s_exec_cache_stats;
+std::unordered_map<int, NGraphEncapsulateImpl*>
+    NGraphEncapsulateImpl::s_instances;
+std::mutex NGraphEncapsulateImpl::s_instances_mutex;
+
 // Ngraph Encapsulate Implementation class for EncapsulateOp class
 //---------------------------------------------------------------------------
 //  NGraphEncapsulateImpl::ctor
 //---------------------------------------------------------------------------
 NGraphEncapsulateImpl::NGraphEncapsulateImpl() : m_graph(OpRegistry::Global()) {
+  std::lock_guard<std::mutex> lock(s_instances_mutex);
   my_instance_id = s_instance_count;
   s_instance_count++;
+  s_instances[my_instance_id] = this;
+}
+
+NGraphEncapsulateImpl::~NGraphEncapsulateImpl() {
+  WaitForAsyncCompiles();
+  {
+    std::lock_guard<std::mutex> lock(s_instances_mutex);
+    s_instances.erase(my_instance_id);
+  }
+  ExecCacheBudget::ReleaseAll(my_instance_id);
 }
 
 // Use tensorflow input tensors to get input_shapes, static_input_map
@@ -57,30 +173,43 @@ NGraphEncapsulateImpl::NGraphEncapsulateImpl() : m_graph(OpRegistry::Global()) {
 Status NGraphEncapsulateImpl::ComputeSignature(
     const std::vector<Tensor>& tf_input_tensors,
     std::vector<TensorShape>& input_shapes,
-    std::vector<const Tensor*>& static_input_map,
-    std::stringstream& signature_ss) {
+    std::vector<const Tensor*>& static_input_map, Signature& signature) {
   // Get the inputs
   for (int i = 0; i < tf_input_tensors.size(); i++) {
-    const Tensor& input_tensor = tf_input_tensors[i];
-    input_shapes.push_back(input_tensor.shape());
-    for (const auto& x : input_tensor.shape()) {
-      signature_ss << x.size << ",";
-    }
-    signature_ss << ";";
+    input_shapes.push_back(tf_input_tensors[i].shape());
   }
 
-  signature_ss << "/";
-
   static_input_map.resize(tf_input_tensors.size());
   for (int i = 0; i < tf_input_tensors.size(); i++) {
-    const Tensor& input_tensor = tf_input_tensors[i];
     if (m_input_is_static[i]) {
-      static_input_map[i] = &input_tensor;
-      TF_RETURN_IF_ERROR(TensorToStream(signature_ss, input_tensor));
-      signature_ss << ";";
+      static_input_map[i] = &tf_input_tensors[i];
     }
   }
-  return Status::OK();
+  return ComputeInputSignature(tf_input_tensors, m_input_is_static, signature,
+                               IsShapeGeneric());
+}
+
+bool NGraphEncapsulateImpl::IsShapeGeneric() const {
+#if defined(ENABLE_OPENVINO)
+  // AOT executables are looked up by their exact input shapes
+  return !m_do_aot && m_shape_generic_ops &&
+         std::getenv("NGRAPH_TF_IE_DYNAMIC_SHAPES") != nullptr;
+#else
+  return false;
+#endif
+}
+
+string NGraphEncapsulateImpl::ShapeSignatureString(
+    const std::vector<TensorShape>& input_shapes) {
+  std::stringstream signature_ss;
+  for (const auto& shape : input_shapes) {
+    for (const auto& x : shape) {
+      signature_ss << x.size << ",";
+    }
+    signature_ss << ";";
+  }
+  signature_ss << "/";
+  return signature_ss.str();
 }
 
 // Compiles the ngraph function and returns ngraph executable
@@ -98,6 +227,40 @@ Status NGraphEncapsulateImpl::Compile(
   return Status::OK();
 }
 
+Status NGraphEncapsulateImpl::GetClusterBackend(
+    std::shared_ptr<Backend>& backend) const {
+  return BackendManager::GetBackend(m_backend_name, backend);
+}
+
+Status NGraphEncapsulateImpl::CompileForCluster(
+    std::shared_ptr<ngraph::Function> ng_function,
+    std::shared_ptr<Executable>& ng_exec) {
+  std::shared_ptr<Backend> backend;
+  TF_RETURN_IF_ERROR(GetClusterBackend(backend));
+  ng_exec = nullptr;
+  try {
+#if defined(ENABLE_OPENVINO)
+    if (!m_ie_device.empty() || !m_ie_config.empty()) {
+      auto ie_backend = std::dynamic_pointer_cast<IE_Backend>(backend);
+      if (ie_backend == nullptr) {
+        return errors::Internal("Cluster ", m_name,
+                                " has a device set, but the backend is not "
+                                "an OpenVINO one");
+      }
+      ng_exec = ie_backend->compile(ng_function, m_ie_device, m_ie_config);
+    }
+#endif
+    if (ng_exec == nullptr) {
+      ng_exec = backend->compile(ng_function);
+    }
+  } catch (const std::exception& ex) {
+    string fn_name = ng_function->get_friendly_name();
+    NgraphSerialize("tf_function_" + fn_name + ".json", ng_function);
+    return errors::Internal("Failed to compile ng_function: ", ex.what());
+  }
+  return Status::OK();
+}
+
 // Compiles the ngraph function and returns ngraph executable as a string
 Status NGraphEncapsulateImpl::GetCompiledString(
     std::shared_ptr<ngraph::Function> ng_function, std::string* ng_exec_str) {
@@ -114,132 +277,772 @@ Status NGraphEncapsulateImpl::GetNgExecutable(
     const std::vector<Tensor>& tf_input_tensors,
     std::vector<TensorShape>& input_shapes,
     std::vector<const Tensor*>& static_input_map,
-    std::shared_ptr<Executable>& ng_exec) {
-  std::stringstream signature_ss;
-  string signature;
-
-  std::shared_ptr<ngraph::Function> ng_function;
-  std::shared_ptr<Executable> evicted_ng_exec;
-  auto backend = BackendManager::GetBackend();
+    std::shared_ptr<Executable>& ng_exec,
+    std::shared_ptr<CallLimiter>& ng_exec_call_limiter,
+    std::shared_ptr<TensorBindingPool>& ng_exec_bindings,
+    std::shared_ptr<TrivialOutputs>& ng_exec_trivial_outputs) {
+  Signature signature;
 
   // Compute Signature
   TF_RETURN_IF_ERROR(ComputeSignature(tf_input_tensors, input_shapes,
-                                      static_input_map, signature_ss));
-  signature = signature_ss.str();
-  NGRAPH_VLOG(5) << "Computed signature: " << signature;
-  auto it = m_ng_exec_map.find(signature);
+                                      static_input_map, signature));
+  NGRAPH_VLOG(5) << "Computed signature: " << signature.ToString();
+
+  bool found_in_cache;
+  {
+    absl::ReaderMutexLock lock(&m_exec_cache_mutex);
+    found_in_cache = LookUpExecutable(signature, tf_input_tensors, ng_exec,
+                                      ng_exec_call_limiter, ng_exec_bindings,
+                                      ng_exec_trivial_outputs);
+  }
+
+  // On a miss, wait for the thread compiling this signature if there is one,
+  // otherwise become that thread
+  std::shared_ptr<InFlightCompile> in_flight;
+  if (!found_in_cache) {
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    while (!(found_in_cache = LookUpExecutable(
+                 signature, tf_input_tensors, ng_exec, ng_exec_call_limiter,
+                 ng_exec_bindings, ng_exec_trivial_outputs))) {
+      auto it = m_in_flight_compiles.find(signature);
+      if (it == m_in_flight_compiles.end()) {
+        break;
+      }
+      std::shared_ptr<InFlightCompile> other = it->second;
+      while (!other->done) {
+        m_compile_done.Wait(&m_exec_cache_mutex);
+      }
+      TF_RETURN_IF_ERROR(other->status);
+    }
+
+    if (!found_in_cache) {
+      ExecCacheEntry* cache_entry = m_ng_exec_cache.Peek(signature);
+      if (cache_entry != nullptr) {
+        // Hash collision: the cached executable was compiled for different
+        // inputs. Drop it and compile for the current inputs instead.
+        NGRAPH_VLOG(1) << "Signature collision for " << m_name << ": "
+                       << signature.ToString();
+        ReleaseExecutable(*cache_entry);
+        m_ng_function_map.erase(cache_entry->ng_exec);
+        m_ng_exec_cache.Erase(signature);
+        ExecCacheBudget::Release(
+            ExecCacheBudget::Key(my_instance_id, signature));
+      }
+      in_flight = std::make_shared<InFlightCompile>();
+      m_in_flight_compiles[signature] = in_flight;
+    }
+  }
   NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Compute got inputs for cluster "
                  << m_ngraph_cluster;
 
-  // Translate the TensorFlow graph to nGraph.
-  if (it == m_ng_exec_map.end()) {
-    // Measure the current total memory usage
-    long vm, rss, vm0, rss0;
-    MemoryProfile(vm0, rss0);
-
-    NGRAPH_VLOG(1) << "Compilation cache miss: " << m_name;
-    string serialized_ng_func;
-    if (!m_do_aot) {
-      TF_RETURN_IF_ERROR(Builder::TranslateGraph(input_shapes, static_input_map,
-                                                 &m_graph, ng_function));
-      ng_function->set_friendly_name(m_name);
-      int json_indentation = 4;
-      serialized_ng_func = ngraph::serialize(ng_function, json_indentation);
-    } else {
-      auto itr = m_aot_functions.find(signature);
-      if (itr == m_aot_functions.end()) {
-        return errors::Internal(
-            "Expected to find AOT precompiled ng function of signature: ",
-            signature);
+  if (found_in_cache) {
+    ExecCacheBudget::Touch(ExecCacheBudget::Key(my_instance_id, signature));
+    return Status::OK();
+  }
+
+  // The threads waiting for this compile must be woken up however it ends
+  Status status;
+  try {
+    status = CompileExecutable(signature, tf_input_tensors, input_shapes,
+                               static_input_map, ng_exec, ng_exec_call_limiter,
+                               ng_exec_bindings, ng_exec_trivial_outputs);
+  } catch (const std::exception& exp) {
+    status = errors::Internal("Caught exception while compiling cluster ",
+                              m_ngraph_cluster, ": ", exp.what());
+  } catch (...) {
+    status = errors::Internal("Error in compiling cluster ", m_ngraph_cluster);
+  }
+  {
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    in_flight->done = true;
+    in_flight->status = status;
+    m_in_flight_compiles.erase(signature);
+    m_compile_done.SignalAll();
+  }
+  return status;
+}
+
+Status NGraphEncapsulateImpl::GetNgExecutableAsync(
+    const std::vector<Tensor>& tf_input_tensors,
+    std::vector<TensorShape>& input_shapes,
+    std::vector<const Tensor*>& static_input_map,
+    std::shared_ptr<Executable>& ng_exec,
+    std::shared_ptr<CallLimiter>& ng_exec_call_limiter,
+    std::shared_ptr<TensorBindingPool>& ng_exec_bindings,
+    std::shared_ptr<TrivialOutputs>& ng_exec_trivial_outputs) {
+  Signature signature;
+  TF_RETURN_IF_ERROR(ComputeSignature(tf_input_tensors, input_shapes,
+                                      static_input_map, signature));
+  ng_exec = nullptr;
+
+  bool found_in_cache;
+  {
+    absl::ReaderMutexLock lock(&m_exec_cache_mutex);
+    found_in_cache = LookUpExecutable(signature, tf_input_tensors, ng_exec,
+                                      ng_exec_call_limiter, ng_exec_bindings,
+                                      ng_exec_trivial_outputs);
+  }
+  if (!found_in_cache) {
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    found_in_cache = LookUpExecutable(signature, tf_input_tensors, ng_exec,
+                                      ng_exec_call_limiter, ng_exec_bindings,
+                                      ng_exec_trivial_outputs);
+    if (!found_in_cache) {
+      // A failed compile is reported once, the following call compiles
+      // again in case the failure was transient
+      auto error = m_async_compile_errors.find(signature);
+      if (error != m_async_compile_errors.end()) {
+        Status status = error->second;
+        m_async_compile_errors.erase(error);
+        return status;
+      }
+      if (!m_async_compiles.insert(signature).second) {
+        // Already compiling
+        return Status::OK();
+      }
+    }
+  }
+  if (found_in_cache) {
+    ExecCacheBudget::Touch(ExecCacheBudget::Key(my_instance_id, signature));
+    return Status::OK();
+  }
+
+  NGRAPH_VLOG(1) << "Compiling " << m_name << " in the background for "
+                 << signature.ToString();
+  std::vector<Tensor> inputs(tf_input_tensors);
+  AsyncCompiler::Schedule([this, signature, inputs]() {
+    std::vector<TensorShape> input_shapes;
+    std::vector<const Tensor*> static_input_map;
+    std::shared_ptr<Executable> ng_exec;
+    std::shared_ptr<CallLimiter> ng_exec_call_limiter;
+    std::shared_ptr<TensorBindingPool> ng_exec_bindings;
+    std::shared_ptr<TrivialOutputs> ng_exec_trivial_outputs;
+    Status status = GetNgExecutable(inputs, input_shapes, static_input_map,
+                                    ng_exec, ng_exec_call_limiter,
+                                    ng_exec_bindings, ng_exec_trivial_outputs);
+    if (!status.ok()) {
+      NGRAPH_VLOG(0) << "Background compile of " << m_name
+                     << " failed: " << status.error_message();
+    }
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    if (!status.ok()) {
+      m_async_compile_errors[signature] = status;
+    }
+    m_async_compiles.erase(signature);
+    m_compile_done.SignalAll();
+  });
+  return Status::OK();
+}
+
+void NGraphEncapsulateImpl::WaitForAsyncCompiles() {
+  absl::MutexLock lock(&m_exec_cache_mutex);
+  while (!m_async_compiles.empty()) {
+    m_compile_done.Wait(&m_exec_cache_mutex);
+  }
+}
+
+void NGraphEncapsulateImpl::SetGraphDef(const GraphDef* graph_def) {
+  m_graph_def = graph_def;
+  m_num_ops = 0;
+  m_shape_generic_ops = true;
+  for (const auto& node_def : graph_def->node()) {
+    if (node_def.op() != "_Arg" && node_def.op() != "_Retval") {
+      m_num_ops++;
+    }
+    m_shape_generic_ops &= IsShapeGenericOp(node_def.op());
+  }
+}
+
+void NGraphEncapsulateImpl::SetFunctionDef(
+    const FunctionDef* fdef, const FunctionLibraryDefinition* flib) {
+  m_fdef = fdef;
+  m_flib = flib;
+  // The arguments and return values are in the signature
+  m_num_ops = fdef->node_def_size();
+  m_shape_generic_ops = true;
+  for (const auto& node_def : fdef->node_def()) {
+    m_shape_generic_ops &= IsShapeGenericOp(node_def.op());
+  }
+}
+
+Status NGraphEncapsulateImpl::BuildGraph() {
+  std::lock_guard<std::mutex> lock(m_graph_mutex);
+  if (m_graph_built) {
+    return Status::OK();
+  }
+  if (m_graph_def != nullptr) {
+    GraphConstructorOptions opts;
+    opts.allow_internal_ops = true;
+    TF_RETURN_IF_ERROR(ConvertGraphDefToGraph(opts, *m_graph_def, &m_graph));
+  } else if (m_fdef != nullptr) {
+    // TODO: how to convert from functiondef to graphdef. Anything easier?
+    std::unique_ptr<FunctionBody> fnbody;
+    const FunctionLibraryDefinition* flib = m_flib;
+    const auto get_func_sig = [flib](const string& op, const OpDef** sig) {
+      return flib->LookUpOpDef(op, sig);
+    };
+    TF_RETURN_IF_ERROR(
+        FunctionDefToBodyHelper(*m_fdef, {}, flib, get_func_sig, &fnbody));
+    CopyGraph(*fnbody->graph, &m_graph);
+  }
+  m_graph_built = true;
+  NGRAPH_VLOG(2) << "Built the graph of " << m_name;
+  return Status::OK();
+}
+
+Status NGraphEncapsulateImpl::ExecuteTFGraph(
+    const std::vector<Tensor>& tf_input_tensors, FunctionLibraryRuntime* flib,
+    std::vector<Tensor>& tf_output_tensors) {
+  TF_RETURN_IF_ERROR(BuildGraph());
+  // Feed the outputs of the _Arg nodes, and fetch the inputs of the _Retval
+  // nodes
+  GraphRunner::NamedTensorList inputs;
+  std::map<int32, string> output_names;
+  for (auto node : m_graph.nodes()) {
+    int32 index;
+    if (node->type_string() == "_Arg") {
+      TF_RETURN_IF_ERROR(GetNodeAttr(node->attrs(), "index", &index));
+      if (index < 0 || index >= tf_input_tensors.size()) {
+        return errors::Internal("Input index ", index, " of ", m_name,
+                                " is out of range");
       }
-      serialized_ng_func = itr->second;
+      inputs.emplace_back(node->name() + ":0", tf_input_tensors[index]);
+    } else if (node->type_string() == "_Retval") {
+      TF_RETURN_IF_ERROR(GetNodeAttr(node->attrs(), "index", &index));
+      const Edge* edge;
+      TF_RETURN_IF_ERROR(node->input_edge(0, &edge));
+      output_names[index] =
+          edge->src()->name() + ":" + to_string(edge->src_output());
     }
+  }
+  std::vector<string> fetches;
+  for (const auto& output_name : output_names) {
+    fetches.push_back(output_name.second);
+  }
+
+  GraphRunner graph_runner(Env::Default());
+  return graph_runner.Run(&m_graph, flib, inputs, fetches, &tf_output_tensors);
+}
+
+bool NGraphEncapsulateImpl::LookUpExecutable(
+    const Signature& signature, const std::vector<Tensor>& tf_input_tensors,
+    std::shared_ptr<Executable>& ng_exec,
+    std::shared_ptr<CallLimiter>& ng_exec_call_limiter,
+    std::shared_ptr<TensorBindingPool>& ng_exec_bindings,
+    std::shared_ptr<TrivialOutputs>& ng_exec_trivial_outputs) {
+  const ExecCacheEntry* cache_entry = m_ng_exec_cache.Peek(signature);
+  if (cache_entry == nullptr ||
+      !cache_entry->inputs.Matches(tf_input_tensors)) {
+    return false;
+  }
+  // Hits may only hold the lock for reading, so they flag the entry rather
+  // than reorder the LRU list
+  cache_entry->recently_used->store(true);
+  s_exec_cache_stats.hits++;
+  s_exec_cache_stats.compile_time_saved_ms += cache_entry->compile_time_ms;
+  ng_exec = cache_entry->ng_exec;
+  ng_exec_call_limiter = cache_entry->call_limiter;
+  ng_exec_bindings = cache_entry->bindings;
+  ng_exec_trivial_outputs = cache_entry->trivial_outputs;
+  return true;
+}
 
-    // Serialize to nGraph if needed
-    if (std::getenv("NGRAPH_ENABLE_SERIALIZE") != nullptr) {
-      std::string file_name = "tf_function_" + m_name + ".json";
+Status NGraphEncapsulateImpl::CompileExecutable(
+    const Signature& signature, const std::vector<Tensor>& tf_input_tensors,
+    std::vector<TensorShape>& input_shapes,
+    std::vector<const Tensor*>& static_input_map,
+    std::shared_ptr<Executable>& ng_exec,
+    std::shared_ptr<CallLimiter>& ng_exec_call_limiter,
+    std::shared_ptr<TensorBindingPool>& ng_exec_bindings,
+    std::shared_ptr<TrivialOutputs>& ng_exec_trivial_outputs) {
+  std::shared_ptr<ngraph::Function> ng_function;
+  std::shared_ptr<Backend> backend;
+  TF_RETURN_IF_ERROR(GetClusterBackend(backend));
+  const ExecCacheBudget::Key budget_key(my_instance_id, signature);
+
+  // Translate the TensorFlow graph to nGraph.
+  // Measure the current total memory usage
+  long vm, rss, vm0, rss0;
+  MemoryProfile(vm0, rss0);
+  Timer compile_time;
+
+  NGRAPH_VLOG(1) << "Compilation cache miss: " << m_name;
+  s_exec_cache_stats.misses++;
+  TF_RETURN_IF_ERROR(BuildGraph());
+  string serialized_ng_func;
+  string aot_signature;
+  // Executable saved to the persistent cache by an earlier process, if any
+  string persisted_exec;
+  Signature persistent_key;
+  bool persist = !m_do_aot && PersistentExecCache::IsEnabled();
+  if (persist) {
+    Signature graph_hash;
+    string backend_key;
+    TF_RETURN_IF_ERROR(PersistentExecCache::HashGraph(m_graph, graph_hash));
+    TF_RETURN_IF_ERROR(GetBackendKey(backend_key));
+    persistent_key =
+        PersistentExecCache::MakeKey(graph_hash, signature, backend_key);
+    PersistentExecCache::Load(persistent_key, serialized_ng_func,
+                              persisted_exec);
+  }
+  if (!m_do_aot) {
+    if (persisted_exec.empty()) {
       TF_RETURN_IF_ERROR(
-          StringToFile("tf_function_" + m_name + ".json", serialized_ng_func));
+          TranslateGraph(input_shapes, static_input_map, ng_function));
     }
-    // Evict the cache if the number of elements exceeds the limit
-    const char* cache_depth_specified =
-        std::getenv("NGRAPH_TF_FUNCTION_CACHE_ITEM_DEPTH");
-    if (cache_depth_specified != nullptr) {
-      m_function_cache_depth_in_items = atoi(cache_depth_specified);
+  } else {
+    aot_signature = ShapeSignatureString(input_shapes);
+    auto itr = m_aot_functions.find(aot_signature);
+    if (itr == m_aot_functions.end()) {
+      return errors::Internal(
+          "Expected to find AOT precompiled ng function of signature: ",
+          aot_signature);
     }
-    if (m_ng_exec_map.size() >= m_function_cache_depth_in_items) {
-      evicted_ng_exec = m_ng_exec_map[m_lru.back()];
-      m_ng_exec_map.erase(m_lru.back());
-      m_serialized_ng_function_map.erase(evicted_ng_exec);
+    serialized_ng_func = itr->second;
+  }
 
-      // Call delete function here for the erased func
-      backend->remove_compiled_function(evicted_ng_exec);
+  // The JSON of a large function takes a while to produce and a lot of
+  // memory to hold, so it is only serialized for what needs it
+  auto serialize_ng_function = [&ng_function,
+                                &serialized_ng_func]() -> const string& {
+    if (serialized_ng_func.empty() && ng_function != nullptr) {
+      int json_indentation = 4;
+      serialized_ng_func = ngraph::serialize(ng_function, json_indentation);
+    }
+    return serialized_ng_func;
+  };
 
-      m_lru.pop_back();
+  // Serialize to nGraph if needed
+  if (std::getenv("NGRAPH_ENABLE_SERIALIZE") != nullptr) {
+    TF_RETURN_IF_ERROR(StringToFile("tf_function_" + m_name + ".json",
+                                    serialize_ng_function()));
+  }
+  // Evict the cache if the number of elements exceeds the limit. With a
+  // memory budget the number of items is only capped when asked for
+  // explicitly.
+  const char* cache_depth_specified =
+      std::getenv("NGRAPH_TF_FUNCTION_CACHE_ITEM_DEPTH");
+  int cache_depth = m_function_cache_depth_in_items;
+  if (cache_depth_specified != nullptr) {
+    // The executable being compiled is always cached
+    cache_depth = std::max(atoi(cache_depth_specified), 1);
+  }
+  if (cache_depth_specified != nullptr || !ExecCacheBudget::IsEnabled()) {
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    if (m_ng_exec_cache.size() >= cache_depth) {
+      PromoteRecentlyUsed();
+      Signature evicted_signature;
+      ExecCacheEntry evicted_entry;
+      if (m_ng_exec_cache.PopLeastRecent(&evicted_signature, &evicted_entry)) {
+        m_ng_function_map.erase(evicted_entry.ng_exec);
+        ExecCacheBudget::Release(
+            ExecCacheBudget::Key(my_instance_id, evicted_signature));
+
+        // Call delete function here for the erased func
+        ReleaseExecutable(evicted_entry);
+        s_exec_cache_stats.evictions++;
+      }
     }  // cache eviction if cache size greater than cache depth
+  }
 
-    NG_TRACE("Compile nGraph", m_name, "");
-    if (m_do_aot) {
-      auto itr = m_aot_execs.find(signature);
-      if (itr == m_aot_execs.end()) {
-        return errors::Internal(
-            "Requested AOT, but could not find string with the "
-            "signature: ",
-            signature);
+  NG_TRACE("Compile nGraph", m_name, "");
+  // Reuse the executable of an identical cluster, if any op has compiled
+  // one already
+  ExecCacheEntry new_entry;
+  new_entry.shared = SharedExecCache::IsEnabled();
+  Signature function_check;
+  if (new_entry.shared) {
+    // Without a translated function, the executable is loaded along with
+    // its serialized function
+    std::shared_ptr<ngraph::Function> hashed_function = ng_function;
+    Status status;
+    if (hashed_function == nullptr) {
+      try {
+        std::istringstream serialized_stream(serialized_ng_func);
+        hashed_function = ngraph::deserialize(serialized_stream);
+      } catch (const std::exception& exp) {
+        status =
+            errors::Internal("Cannot deserialize the function: ", exp.what());
       }
+    }
+    Signature function_hash;
+    if (status.ok()) {
+      status = HashFunction(*hashed_function, function_hash, function_check);
+    }
+    if (status.ok()) {
+      string backend_key;
+      TF_RETURN_IF_ERROR(GetBackendKey(backend_key));
+      new_entry.shared_key = SharedExecCache::Key(function_hash, backend_key);
+    } else {
+      NGRAPH_VLOG(1) << "Not sharing the executable of " << m_name << ": "
+                     << status.error_message();
+      new_entry.shared = false;
+    }
+  }
+  SharedExecCache::Item shared_item;
+  // Whether ng_exec was compiled from ng_function, and so holds it already
+  bool compiled_ng_function = false;
+  // Size of the serialized executable ng_exec was loaded from, if any
+  int64 loaded_exec_bytes = 0;
+  if (new_entry.shared &&
+      SharedExecCache::Acquire(new_entry.shared_key, function_check,
+                               shared_item)) {
+    NGRAPH_VLOG(1) << "Sharing the executable of an identical cluster: "
+                   << m_name;
+    ng_exec = shared_item.ng_exec;
+    s_exec_cache_stats.compile_time_saved_ms += shared_item.compile_time_ms;
+  } else if (m_do_aot) {
+    auto itr = m_aot_execs.find(aot_signature);
+    if (itr == m_aot_execs.end()) {
+      return errors::Internal(
+          "Requested AOT, but could not find string with the "
+          "signature: ",
+          aot_signature);
+    }
 
+    try {
+      stringstream serialized_exec_read;
+      serialized_exec_read << (itr->second);
+      ng_exec = backend->load(serialized_exec_read);
+      loaded_exec_bytes = itr->second.size();
+    } catch (const std::exception& exp) {
+      Status st = StringToFile("tf_function_error_" + m_name + ".json",
+                               serialized_ng_func);
+      string status_string =
+          "Caught exception while compiling op_backend: " + string(exp.what()) +
+          (st.ok() ? ""
+                   : (" Also error in dumping serialized function: " +
+                      st.error_message()));
+      return errors::Internal(status_string);
+    } catch (...) {
+      Status st = StringToFile("tf_function_error_" + m_name + ".json",
+                               serialized_ng_func);
+      string status_string =
+          "Error in compiling op_backend." +
+          (st.ok() ? ""
+                   : (" Also error in dumping serialized function: " +
+                      st.error_message()));
+      return errors::Internal(status_string);
+    }
+  } else {
+    bool loaded = false;
+    if (!persisted_exec.empty()) {
       try {
-        stringstream serialized_exec_read;
-        serialized_exec_read << (itr->second);
+        stringstream serialized_exec_read(persisted_exec);
         ng_exec = backend->load(serialized_exec_read);
+        loaded_exec_bytes = persisted_exec.size();
+        loaded = true;
       } catch (const std::exception& exp) {
-        Status st = StringToFile("tf_function_error_" + m_name + ".json",
-                                 serialized_ng_func);
-        string status_string =
-            "Caught exception while compiling op_backend: " +
-            string(exp.what()) +
-            (st.ok() ? "" : (" Also error in dumping serialized function: " +
-                             st.error_message()));
-        return errors::Internal(status_string);
-      } catch (...) {
-        Status st = StringToFile("tf_function_error_" + m_name + ".json",
-                                 serialized_ng_func);
-        string status_string =
-            "Error in compiling op_backend." +
-            (st.ok() ? "" : (" Also error in dumping serialized function: " +
-                             st.error_message()));
-        return errors::Internal(status_string);
+        NGRAPH_VLOG(0) << "Failed to load the persisted executable of "
+                       << m_name << ", compiling it instead: " << exp.what();
+      }
+    }
+    if (!loaded) {
+      if (ng_function == nullptr) {
+        serialized_ng_func.clear();
+        TF_RETURN_IF_ERROR(
+            TranslateGraph(input_shapes, static_input_map, ng_function));
       }
+      // Compiling rewrites the function, sharing its constants with those
+      // of the functions compiled before, so what is persisted, and later
+      // keyed into the shared cache, is serialized first
+      if (persist) {
+        serialize_ng_function();
+      }
+      TF_RETURN_IF_ERROR(CompileForCluster(ng_function, ng_exec));
+      compiled_ng_function = true;
+      if (persist) {
+        PersistExecutable(persistent_key, serialized_ng_func, ng_exec);
+      }
+    }
+  }
+
+  int compile_time_ms = compile_time.ElapsedInMS();
+  if (shared_item.ng_exec == nullptr) {
+    shared_item.ng_exec = ng_exec;
+    shared_item.call_limiter =
+        std::make_shared<CallLimiter>(GetExecutableConcurrency(ng_exec));
+    shared_item.compile_time_ms = compile_time_ms;
+    if (new_entry.shared) {
+      new_entry.shared = SharedExecCache::Publish(new_entry.shared_key,
+                                                  function_check, shared_item);
+      if (shared_item.ng_exec != ng_exec) {
+        // Another op compiled the same cluster in the meantime
+        backend->remove_compiled_function(ng_exec);
+        ng_exec = shared_item.ng_exec;
+        compiled_ng_function = false;
+        loaded_exec_bytes = 0;
+      }
+    }
+  }
+  ng_exec_call_limiter = shared_item.call_limiter;
+  ng_exec_bindings = std::make_shared<TensorBindingPool>(
+      backend, OutputBufferPool::IsEnabled()
+                   ? ng_exec->get_preferred_pipeline_depth()
+                   : 0);
+  TF_RETURN_IF_ERROR(GetTrivialOutputs(ng_exec, ng_exec_trivial_outputs));
+
+  // Memory after
+  MemoryProfile(vm, rss);
+  auto delta_vm_mem = vm - vm0;
+  auto delta_res_mem = rss - rss0;
+
+  // The RSS delta also counts what concurrent compiles allocate, so the
+  // budget is charged an estimate instead: the weights of the executable,
+  // unless another op compiled it and owns them, and its buffers
+  int64 exec_bytes = BufferBytes(ng_exec);
+  if (compiled_ng_function) {
+    exec_bytes += ConstantBytes(ng_function);
+  } else {
+    exec_bytes += loaded_exec_bytes;
+  }
+
+  size_t cache_length;
+  {
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    new_entry.ng_exec = ng_exec;
+    new_entry.backend = backend;
+    new_entry.call_limiter = shared_item.call_limiter;
+    new_entry.bindings = ng_exec_bindings;
+    new_entry.trivial_outputs = ng_exec_trivial_outputs;
+    new_entry.recently_used = std::make_shared<std::atomic<bool>>(false);
+    new_entry.inputs =
+        SignatureInputs(tf_input_tensors, m_input_is_static, IsShapeGeneric());
+    new_entry.compile_time_ms = shared_item.compile_time_ms;
+    m_ng_exec_cache.Insert(signature, std::move(new_entry));
+
+    // Keep what to dump the function from if the executable fails. The
+    // executable keeps the function it was compiled from, so holding it
+    // here costs no memory. The translated function of an executable
+    // compiled by another op is released, along with its constants, and
+    // the function is rebuilt from the executable when dumped.
+    NgFunctionSource& source = m_ng_function_map[ng_exec];
+    if (compiled_ng_function) {
+      source.ng_function = ng_function;
+    } else if (loaded_exec_bytes > 0) {
+      source.serialized_ng_func = serialized_ng_func;
+    }
+    cache_length = m_ng_exec_cache.size();
+  }
+
+  // Charge the executable its estimated footprint, and evict from any op
+  // what no longer fits in the memory budget
+  std::vector<ExecCacheBudget::Key> victims;
+  ExecCacheBudget::Charge(budget_key, exec_bytes, compile_time_ms, &victims);
+  EvictFromBudget(victims);
+
+  NGRAPH_VLOG(1) << "NGRAPH_TF_CACHE_PROFILE: OP_ID: " << my_instance_id
+                 << " Cache length: " << cache_length << " Cluster: " << m_name
+                 << " Compile time: " << compile_time_ms << " ms"
+                 << " Delta VM: " << delta_vm_mem
+                 << " Delta RSS: " << delta_res_mem
+                 << " KB Charged: " << exec_bytes / 1024
+                 << " KB Total RSS: " << rss / (1024 * 1024) << " GB "
+                 << " VM: " << vm / (1024 * 1024) << " GB"
+                 << " Budget evictions: " << victims.size() << endl;
+  return Status::OK();
+}
+
+Status NGraphEncapsulateImpl::GetTrivialOutputs(
+    const std::shared_ptr<Executable>& ng_exec,
+    std::shared_ptr<TrivialOutputs>& trivial_outputs) {
+  trivial_outputs = nullptr;
+  std::map<int32, DataType> output_dtypes;
+  for (auto node : m_graph.nodes()) {
+    if (node->type_string() == "_Retval") {
+      int32 index;
+      DataType dtype;
+      TF_RETURN_IF_ERROR(GetNodeAttr(node->attrs(), "index", &index));
+      TF_RETURN_IF_ERROR(GetNodeAttr(node->attrs(), "T", &dtype));
+      output_dtypes[index] = dtype;
+    }
+  }
+
+  auto outputs = std::make_shared<TrivialOutputs>();
+  const auto& parameters = ng_exec->get_parameters();
+  const auto& results = ng_exec->get_results();
+  for (int i = 0; i < results.size(); i++) {
+    auto parent = results[i]->input_value(0).get_node_shared_ptr();
+    auto param = ng::as_type_ptr<opset::Parameter>(parent);
+    auto constant = ng::as_type_ptr<opset::Constant>(parent);
+    if (param != nullptr) {
+      auto it = std::find(parameters.begin(), parameters.end(), param);
+      if (it == parameters.end()) {
+        return Status::OK();
+      }
+      outputs->input_indices.push_back(it - parameters.begin());
+      outputs->constants.emplace_back();
+    } else if (constant != nullptr && output_dtypes.count(i) != 0) {
+      ng::element::Type expected_elem_type;
+      TF_RETURN_IF_ERROR(
+          TFDataTypeToNGraphElementType(output_dtypes[i], &expected_elem_type));
+      if (constant->get_element_type() != expected_elem_type) {
+        return Status::OK();
+      }
+      TensorShape tf_shape;
+      for (auto dim : constant->get_shape()) {
+        tf_shape.AddDim(dim);
+      }
+      Tensor value(output_dtypes[i], tf_shape);
+      if (value.TotalBytes() !=
+          ng::shape_size(constant->get_shape()) * expected_elem_type.size()) {
+        return Status::OK();
+      }
+      memcpy(value.data(), constant->get_data_ptr(), value.TotalBytes());
+      outputs->input_indices.push_back(-1);
+      outputs->constants.push_back(value);
     } else {
-      TF_RETURN_IF_ERROR(NGraphEncapsulateImpl::Compile(ng_function, ng_exec));
-    }
-
-    SetNgExecMap(signature, ng_exec);
-
-    // caching ng_function to serialize to ngraph if needed
-    m_serialized_ng_function_map[ng_exec] = serialized_ng_func;
-
-    m_lru.push_front(signature);
-    // Memory after
-    MemoryProfile(vm, rss);
-    auto delta_vm_mem = vm - vm0;
-    auto delta_res_mem = rss - rss0;
-    NGRAPH_VLOG(1) << "NGRAPH_TF_CACHE_PROFILE: OP_ID: " << my_instance_id
-                   << " Cache length: " << m_ng_exec_map.size()
-                   << " Cluster: " << m_name << " Delta VM: " << delta_vm_mem
-                   << " Delta RSS: " << delta_res_mem
-                   << " KB Total RSS: " << rss / (1024 * 1024) << " GB "
-                   << " VM: " << vm / (1024 * 1024) << " GB" << endl;
-  }  // end of input signature not found in m_ng_exec_map
-  else {
-    // Found the input signature in m_ng_exec_map, use the cached executable
-    // Update the m_lru
-    if (signature != m_lru.front()) {
-      m_lru.remove(signature);
-      m_lru.push_front(signature);
-    }
-    ng_exec = it->second;
+      return Status::OK();
+    }
   }
+  trivial_outputs = outputs;
+  return Status::OK();
+}
+
+Status NGraphEncapsulateImpl::TranslateGraph(
+    const std::vector<TensorShape>& input_shapes,
+    const std::vector<const Tensor*>& static_input_map,
+    std::shared_ptr<ngraph::Function>& ng_function) {
+  TF_RETURN_IF_ERROR(Builder::TranslateGraph(input_shapes, static_input_map,
+                                             &m_graph, ng_function));
+  ng_function->set_friendly_name(m_name);
+  return Status::OK();
+}
+
+void NGraphEncapsulateImpl::PersistExecutable(
+    const Signature& persistent_key, const string& serialized_ng_func,
+    const std::shared_ptr<Executable>& ng_exec) {
+  // Not every backend can save its executables, which only costs the next
+  // process a compile
+  try {
+    stringstream serialized_exec;
+    ng_exec->save(serialized_exec);
+    Status status = PersistentExecCache::Store(
+        persistent_key, serialized_ng_func, serialized_exec.str());
+    if (!status.ok()) {
+      NGRAPH_VLOG(0) << "Failed to persist the executable of " << m_name << ": "
+                     << status.error_message();
+    }
+  } catch (const std::exception& exp) {
+    NGRAPH_VLOG(1) << "Cannot persist the executable of " << m_name << ": "
+                   << exp.what();
+  }
+}
+
+void NGraphEncapsulateImpl::EvictFromBudget(
+    const std::vector<ExecCacheBudget::Key>& victims) {
+  if (victims.empty()) {
+    return;
+  }
+  // Holding s_instances_mutex keeps the owners alive while evicting
+  std::lock_guard<std::mutex> lock(s_instances_mutex);
+  for (const auto& victim : victims) {
+    auto it = s_instances.find(victim.first);
+    if (it != s_instances.end()) {
+      it->second->EvictExecutable(victim.second);
+    }
+  }
+}
+
+void NGraphEncapsulateImpl::EvictExecutable(const Signature& signature) {
+  ExecCacheEntry evicted_entry;
+  {
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    if (!m_ng_exec_cache.Erase(signature, &evicted_entry)) {
+      return;
+    }
+    m_ng_function_map.erase(evicted_entry.ng_exec);
+  }
+  // The entry may have been replaced since the budget picked it
+  ExecCacheBudget::Release(ExecCacheBudget::Key(my_instance_id, signature));
+  NGRAPH_VLOG(1) << "Evicted executable " << signature.ToString() << " of "
+                 << m_name << " to stay within the memory budget";
+  ReleaseExecutable(evicted_entry);
+  s_exec_cache_stats.evictions++;
+}
+
+void NGraphEncapsulateImpl::ReleaseExecutable(const ExecCacheEntry& entry) {
+  if (entry.shared && !SharedExecCache::Release(entry.shared_key)) {
+    return;
+  }
+  entry.backend->remove_compiled_function(entry.ng_exec);
+}
+
+void NGraphEncapsulateImpl::ReleaseAllExecutables() {
+  m_ng_exec_cache.ForEach([](const Signature&, ExecCacheEntry& entry) {
+    ReleaseExecutable(entry);
+  });
+  m_ng_exec_cache.clear();
+}
+
+void NGraphEncapsulateImpl::PromoteRecentlyUsed() {
+  std::vector<Signature> recently_used;
+  m_ng_exec_cache.ForEach(
+      [&recently_used](const Signature& signature, ExecCacheEntry& entry) {
+        if (entry.recently_used->exchange(false)) {
+          recently_used.push_back(signature);
+        }
+      });
+  // Promote from the least recently used so that the promoted entries keep
+  // their relative order
+  for (auto it = recently_used.rbegin(); it != recently_used.rend(); ++it) {
+    m_ng_exec_cache.Find(*it);
+  }
+}
+
+int NGraphEncapsulateImpl::GetExecutableConcurrency(
+    const std::shared_ptr<Executable>& ng_exec) {
+#if defined(ENABLE_OPENVINO)
+  // IE_Executable runs each call on an infer request of its own
+  return std::max(static_cast<int>(ng_exec->get_preferred_pipeline_depth()), 1);
+#else
+  const char* concurrency = std::getenv("NGRAPH_TF_EXECUTABLE_CONCURRENCY");
+  if (concurrency != nullptr) {
+    return std::max(atoi(concurrency), 1);
+  }
+  // The CPU backend gives each executable NGRAPH_CPU_CONCURRENCY call
+  // contexts. The other backends are not known to be re-entrant.
+  string backend_name;
+  const char* cpu_concurrency = std::getenv("NGRAPH_CPU_CONCURRENCY");
+  if (cpu_concurrency != nullptr &&
+      BackendManager::GetBackendName(backend_name).ok() &&
+      backend_name == "CPU") {
+    return std::max(atoi(cpu_concurrency), 1);
+  }
+  return 1;
+#endif
+}
+
+Status NGraphEncapsulateImpl::GetOutputShapes(
+    const std::shared_ptr<Executable>& ng_exec,
+    const std::vector<Tensor>& tf_input_tensors,
+    std::vector<ng::Shape>& output_shapes) {
+  output_shapes.clear();
+  if (!IsShapeGeneric()) {
+    for (const auto& result : ng_exec->get_results()) {
+      output_shapes.push_back(result->get_shape());
+    }
+    return Status::OK();
+  }
+#if defined(ENABLE_OPENVINO)
+  std::vector<ng::Shape> input_shapes;
+  for (const auto& input_tensor : tf_input_tensors) {
+    ng::Shape ng_shape;
+    for (const auto& dim : input_tensor.shape()) {
+      ng_shape.push_back(dim.size);
+    }
+    input_shapes.push_back(ng_shape);
+  }
+  try {
+    output_shapes = ng_exec->get_result_shapes(input_shapes);
+  } catch (const std::exception& exp) {
+    return errors::Internal("Cannot run the executable of ", m_name,
+                            " on the shapes of its inputs, unset "
+                            "NGRAPH_TF_IE_DYNAMIC_SHAPES if its translation "
+                            "depends on them: ",
+                            exp.what());
+  }
+#endif
   return Status::OK();
 }
 
@@ -255,7 +1058,8 @@ Status NGraphEncapsulateImpl::AllocateNGTensors(
     TF_RETURN_IF_ERROR(
         TFDataTypeToNGraphElementType(tf_tensors[i].dtype(), &ng_element_type));
 
-    auto backend = BackendManager::GetBackend();
+    std::shared_ptr<Backend> backend;
+    TF_RETURN_IF_ERROR(GetClusterBackend(backend));
     std::shared_ptr<ng::runtime::Tensor> ng_tensor =
         backend->create_tensor(ng_element_type, ng_shape, tf_tensors[i].data());
     ng_tensors.push_back(ng_tensor);
@@ -322,20 +1126,110 @@ Status NGraphEncapsulateImpl::ParseNodeAttributes(
   return Status::OK();
 }
 
+Status NGraphEncapsulateImpl::SetBackendAttributes(
+    const std::unordered_map<std::string, std::string>&
+        additional_attribute_map) {
+  int latency_max_ops = 16;
+  auto itr = additional_attribute_map.find("ie_latency_max_ops");
+  if (itr != additional_attribute_map.end() &&
+      !strings::safe_strto32(itr->second, &latency_max_ops)) {
+    return errors::Internal("Expected an integer for ie_latency_max_ops, got ",
+                            itr->second);
+  }
+  int num_ops = m_num_ops;
+  // Small clusters are latency critical, the others rather go for throughput
+  string prefix = "ie_";
+  if (num_ops <= latency_max_ops &&
+      (additional_attribute_map.count("ie_latency_device") != 0 ||
+       std::any_of(additional_attribute_map.begin(),
+                   additional_attribute_map.end(),
+                   [](const pair<string, string>& attr) {
+                     return attr.first.find("ie_latency_config_") == 0;
+                   }))) {
+    prefix = "ie_latency_";
+  }
+
+  m_backend_name.clear();
+  m_ie_device.clear();
+  m_ie_config.clear();
+  for (const auto& attr : additional_attribute_map) {
+    if (attr.first == "backend") {
+      m_backend_name = attr.second;
+    } else if (attr.first == prefix + "device") {
+      m_ie_device = attr.second;
+    } else if (attr.first.find(prefix + "config_") == 0) {
+      m_ie_config[attr.first.substr(prefix.size() + strlen("config_"))] =
+          attr.second;
+    }
+  }
+  if (!m_ie_device.empty() || !m_ie_config.empty()) {
+    NGRAPH_VLOG(1) << "Cluster " << m_name << " of " << num_ops
+                   << " ops compiles for device '" << m_ie_device << "' with "
+                   << m_ie_config.size() << " config keys";
+  }
+  return Status::OK();
+}
+
+Status NGraphEncapsulateImpl::GetBackendKey(string& backend_key) const {
+  backend_key = m_backend_name;
+  if (backend_key.empty()) {
+    TF_RETURN_IF_ERROR(BackendManager::GetBackendName(backend_key));
+  }
+  if (!m_ie_device.empty()) {
+    backend_key += "/" + m_ie_device;
+  }
+  // The configuration the networks are loaded with, that of the cluster on
+  // top of the one set on the backend
+  map<string, string> config;
+#if defined(ENABLE_OPENVINO)
+  std::shared_ptr<Backend> backend;
+  TF_RETURN_IF_ERROR(GetClusterBackend(backend));
+  auto ie_backend = std::dynamic_pointer_cast<IE_Backend>(backend);
+  if (ie_backend != nullptr) {
+    config = ie_backend->get_config();
+  }
+#endif
+  for (const auto& it : m_ie_config) {
+    config[it.first] = it.second;
+  }
+  for (const auto& it : config) {
+    backend_key += ";" + it.first + "=" + it.second;
+  }
+  return Status::OK();
+}
+
 Status NGraphEncapsulateImpl::DumpNgFunction(
     const string& file_name, std::shared_ptr<Executable> ng_exec) {
-  auto itr = m_serialized_ng_function_map.find(ng_exec);
-  if (itr == m_serialized_ng_function_map.end()) {
-    return errors::Internal(
-        "Did not find requested executable in map for exec->serialized ngraph "
-        "function when dumping ngraph function");
+  NgFunctionSource source;
+  {
+    absl::ReaderMutexLock lock(&m_exec_cache_mutex);
+    auto itr = m_ng_function_map.find(ng_exec);
+    if (itr == m_ng_function_map.end()) {
+      return errors::Internal(
+          "Did not find requested executable in map for exec->ngraph "
+          "function when dumping ngraph function");
+    }
+    source = itr->second;
+  }
+  if (source.ng_function != nullptr) {
+    return NgraphSerialize(file_name, source.ng_function);
+  }
+  if (!source.serialized_ng_func.empty()) {
+    return StringToFile(file_name, source.serialized_ng_func);
   }
-  return StringToFile(file_name, itr->second);
+  return NgraphSerialize(
+      file_name, std::make_shared<ngraph::Function>(ng_exec->get_results(),
+                                                    ng_exec->get_parameters()));
 }
 
 void NGraphEncapsulateImpl::NGraphEncapsulateImpl::ClearExecMaps() {
-  m_ng_exec_map.clear();
-  m_serialized_ng_function_map.clear();
+  // Background compiles would otherwise cache executables after the clear
+  WaitForAsyncCompiles();
+  absl::MutexLock lock(&m_exec_cache_mutex);
+  ReleaseAllExecutables();
+  m_ng_function_map.clear();
+  m_async_compile_errors.clear();
+  ExecCacheBudget::ReleaseAll(my_instance_id);
 }
 
 }  // namespace ngraph_bridge
@@ -18,31 +18,85 @@
 #define NGRAPH_TF_ENCAPSULATE_IMPL_H_
 #pragma once
 
+#include <atomic>
+#include <mutex>
 #include <ostream>
+#include <unordered_set>
 #include <vector>
 
+#include "tensorflow/core/framework/function.h"
 #include "tensorflow/core/framework/tensor_shape.h"
 #include "tensorflow/core/graph/graph.h"
 
+#include "absl/synchronization/mutex.h"
 #include "ngraph/ngraph.hpp"
 
 #include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_async_compiler.h"
+#include "ngraph_bridge/ngraph_call_limiter.h"
+#include "ngraph_bridge/ngraph_exec_cache_budget.h"
 #include "ngraph_bridge/ngraph_executable.h"
+#include "ngraph_bridge/ngraph_lru_cache.h"
+#include "ngraph_bridge/ngraph_shared_exec_cache.h"
+#include "ngraph_bridge/ngraph_signature.h"
+#include "ngraph_bridge/ngraph_tensor_bindings.h"
 
 namespace tensorflow {
 namespace ngraph_bridge {
 
+// How to produce the outputs of an executable whose results all come
+// straight from its parameters or from constants, without calling it
+struct TrivialOutputs {
+  // Per output, the index of the input it forwards, or -1 for a constant
+  std::vector<int> input_indices;
+  // Per output, the value of a constant, filled once when compiling
+  std::vector<Tensor> constants;
+};
+
+// The function an executable was compiled from, kept for DumpNgFunction. It
+// is only serialized when dumped, unless the executable was loaded along
+// with its serialized function. Neither is kept for an executable compiled
+// by another op, whose function is rebuilt from the executable.
+struct NgFunctionSource {
+  std::shared_ptr<ngraph::Function> ng_function;
+  std::string serialized_ng_func;
+};
+
+// An executable in the per-op cache, along with what is needed to validate
+// and account for a cache hit
+struct ExecCacheEntry {
+  std::shared_ptr<Executable> ng_exec;
+  // The backend ng_exec was compiled by
+  std::shared_ptr<Backend> backend;
+  // Bounds the concurrent calls into ng_exec, across all the ops sharing it
+  std::shared_ptr<CallLimiter> call_limiter;
+  // nGraph tensors wrapping the TF buffers of the previous calls
+  std::shared_ptr<TensorBindingPool> bindings;
+  // Set if ng_exec is trivial
+  std::shared_ptr<TrivialOutputs> trivial_outputs;
+  SignatureInputs inputs;
+  // Set by cache hits, which only hold the cache lock for reading and so
+  // cannot reorder the LRU list. Flagged entries are moved to the front
+  // before evicting by item count.
+  std::shared_ptr<std::atomic<bool>> recently_used;
+  int compile_time_ms = 0;
+  // Set if ng_exec is referenced from the SharedExecCache
+  bool shared = false;
+  SharedExecCache::Key shared_key;
+};
+
 class NGraphEncapsulateImpl {
  public:
   // Ngraph Encapsulate Implementation class for EncapsulateOp class
   explicit NGraphEncapsulateImpl();
+  ~NGraphEncapsulateImpl();
 
   // Get tensorflow input tensors, input shapes, static_inputs to Compute
   // Signature
   Status ComputeSignature(const std::vector<Tensor>& tf_input_tensors,
                           std::vector<TensorShape>& input_shapes,
                           std::vector<const Tensor*>& static_input_map,
-                          std::stringstream& signature_ss);
+                          Signature& signature);
 
   static Status Compile(std::shared_ptr<ngraph::Function> ng_function,
                         std::shared_ptr<Executable>& ng_exec);
@@ -50,11 +104,56 @@ class NGraphEncapsulateImpl {
   static Status GetCompiledString(std::shared_ptr<ngraph::Function> ng_function,
                                   std::string* ng_exec_str);
 
-  // Calls Compute Signature and gets ngraph executable
-  Status GetNgExecutable(const std::vector<Tensor>& tf_input_tensors,
-                         std::vector<TensorShape>& input_shapes,
-                         std::vector<const Tensor*>& static_input_map,
-                         std::shared_ptr<Executable>& ng_exec);
+  // Calls Compute Signature and gets ngraph executable, along with the
+  // limiter to hold while calling it, the pool of tensor bindings to call
+  // it with and, for trivial executables, how to produce the outputs
+  // without calling it. Safe to call from several threads; concurrent misses
+  // on the same signature compile it only once.
+  Status GetNgExecutable(
+      const std::vector<Tensor>& tf_input_tensors,
+      std::vector<TensorShape>& input_shapes,
+      std::vector<const Tensor*>& static_input_map,
+      std::shared_ptr<Executable>& ng_exec,
+      std::shared_ptr<CallLimiter>& ng_exec_call_limiter,
+      std::shared_ptr<TensorBindingPool>& ng_exec_bindings,
+      std::shared_ptr<TrivialOutputs>& ng_exec_trivial_outputs);
+
+  // Same as GetNgExecutable, except that a cache miss schedules the compile
+  // on the AsyncCompiler and returns with a null ng_exec. The error of a
+  // failed background compile is returned once, to the next call with the
+  // same signature, and the call after that schedules the compile again.
+  Status GetNgExecutableAsync(
+      const std::vector<Tensor>& tf_input_tensors,
+      std::vector<TensorShape>& input_shapes,
+      std::vector<const Tensor*>& static_input_map,
+      std::shared_ptr<Executable>& ng_exec,
+      std::shared_ptr<CallLimiter>& ng_exec_call_limiter,
+      std::shared_ptr<TensorBindingPool>& ng_exec_bindings,
+      std::shared_ptr<TrivialOutputs>& ng_exec_trivial_outputs);
+
+  // Blocks until the background compiles scheduled by this op are done
+  void WaitForAsyncCompiles();
+
+  // Runs m_graph with the TF kernels, for the steps whose executable is not
+  // compiled yet. flib runs the function calls in the graph.
+  Status ExecuteTFGraph(const std::vector<Tensor>& tf_input_tensors,
+                        FunctionLibraryRuntime* flib,
+                        std::vector<Tensor>& tf_output_tensors);
+
+  // Shapes of the outputs of ng_exec when called with tf_input_tensors. They
+  // are the shapes ng_exec was compiled for, unless the executables are
+  // shape generic.
+  Status GetOutputShapes(const std::shared_ptr<Executable>& ng_exec,
+                         const std::vector<Tensor>& tf_input_tensors,
+                         std::vector<ngraph::Shape>& output_shapes);
+
+  // With OpenVINO, NGRAPH_TF_IE_DYNAMIC_SHAPES keys the executables by the
+  // rank rather than the shape of the non-static inputs, and the executables
+  // reshape their network for the shapes they are called with. This is only
+  // correct for clusters whose translation does not depend on those shapes,
+  // so clusters with other ops than the elementwise ones keep the shapes in
+  // their keys.
+  bool IsShapeGeneric() const;
 
   // Allocate nGraph tensors for given TF tensors
   Status AllocateNGTensors(
@@ -64,6 +163,11 @@ class NGraphEncapsulateImpl {
   // Clear all maps with ng_exec as keys
   void ClearExecMaps();
 
+  // Removes the executables the process-wide memory budget picked for
+  // eviction from the caches of the ops owning them. Must not be called with
+  // an executable cache lock held.
+  static void EvictFromBudget(const std::vector<ExecCacheBudget::Key>& victims);
+
   Status DumpNgFunction(const string&, std::shared_ptr<Executable>);
 
   // Accessors(getters and setters) for the private data members of
@@ -99,31 +203,135 @@ class NGraphEncapsulateImpl {
     m_input_is_static[index] = value;
   }
 
-  std::unordered_map<std::string, std::shared_ptr<Executable>> GetNgExecMap() {
-    return m_ng_exec_map;
+  size_t GetNgExecCacheSize() {
+    absl::ReaderMutexLock lock(&m_exec_cache_mutex);
+    return m_ng_exec_cache.size();
   }
 
-  void SetNgExecMap(const std::string& ng_map_key,
-                    const std::shared_ptr<Executable>& exec) {
-    m_ng_exec_map[ng_map_key] = exec;
+  void ClearNgExecMap() {
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    ReleaseAllExecutables();
+    ExecCacheBudget::ReleaseAll(my_instance_id);
   }
 
-  void ClearNgExecMap() { m_ng_exec_map.clear(); }
-
   void ClearNgExecSerializedFunctionCache() {
-    m_serialized_ng_function_map.clear();
+    absl::MutexLock lock(&m_exec_cache_mutex);
+    m_ng_function_map.clear();
   }
 
   void SetName(string name) { m_name = name; }
 
+  // Executable cache statistics, summed over all encapsulate ops
+  static CacheStats& GetExecCacheStats() { return s_exec_cache_stats; }
+
+  // Signature format used to key the AOT executables attached to the node.
+  // It only encodes the input shapes since AOT does not allow static inputs.
+  static string ShapeSignatureString(
+      const std::vector<TensorShape>& input_shapes);
+
+  // Number of threads allowed to call into one executable at once. With
+  // OpenVINO this is the number of infer requests of the executable,
+  // otherwise NGRAPH_TF_EXECUTABLE_CONCURRENCY overrides the backend's
+  // default.
+  static int GetExecutableConcurrency(
+      const std::shared_ptr<Executable>& ng_exec);
+
   Status ParseNodeAttributes(
       const google::protobuf::Map<string, AttrValue>& additional_attributes,
       std::unordered_map<std::string, std::string>* additional_attribute_map);
 
-  // TF Graph for the cluster
+  // Picks the backend, and on OpenVINO the device and plugin configuration,
+  // the executables of this cluster are compiled with, from the optional
+  // attributes collected by ParseNodeAttributes:
+  //   backend: name of the backend the cluster was assigned to, the
+  //     currently set one if missing
+  //   ie_device, ie_config_<KEY>: device config string, such as
+  //     "MULTI:CPU,GPU", and plugin configuration of the cluster
+  //   ie_latency_device, ie_latency_config_<KEY>: used instead for clusters
+  //     of at most ie_latency_max_ops ops (16 by default)
+  // Requires the cluster graph to be set.
+  Status SetBackendAttributes(
+      const std::unordered_map<std::string, std::string>&
+          additional_attribute_map);
+
+  // Name of the backend of this cluster, with the device of this cluster if
+  // any and the plugin configuration its networks are loaded with, for
+  // keying the executables shared across ops and processes
+  Status GetBackendKey(string& backend_key) const;
+
+  // Set the definition of the cluster graph, from the NGraphClusterManager
+  // or from a function of the library. Both must outlive this op. The graph
+  // itself is only built when it is first needed, so that constructing the
+  // ops of large models does not build the graphs of all their clusters.
+  void SetGraphDef(const GraphDef* graph_def);
+  void SetFunctionDef(const FunctionDef* fdef,
+                      const FunctionLibraryDefinition* flib);
+
+  // Builds m_graph from its definition if it is not built yet. Safe to call
+  // from several threads.
+  Status BuildGraph();
+
+  // TF Graph for the cluster, built by BuildGraph
   Graph m_graph;
 
  private:
+  // Uses the cached executable if it was compiled for these inputs. Requires
+  // m_exec_cache_mutex held in either mode.
+  bool LookUpExecutable(
+      const Signature& signature, const std::vector<Tensor>& tf_input_tensors,
+      std::shared_ptr<Executable>& ng_exec,
+      std::shared_ptr<CallLimiter>& ng_exec_call_limiter,
+      std::shared_ptr<TensorBindingPool>& ng_exec_bindings,
+      std::shared_ptr<TrivialOutputs>& ng_exec_trivial_outputs);
+
+  // Translates, compiles and caches the executable for a signature that
+  // missed the cache. Called by one thread at a time per signature.
+  Status CompileExecutable(
+      const Signature& signature, const std::vector<Tensor>& tf_input_tensors,
+      std::vector<TensorShape>& input_shapes,
+      std::vector<const Tensor*>& static_input_map,
+      std::shared_ptr<Executable>& ng_exec,
+      std::shared_ptr<CallLimiter>& ng_exec_call_limiter,
+      std::shared_ptr<TensorBindingPool>& ng_exec_bindings,
+      std::shared_ptr<TrivialOutputs>& ng_exec_trivial_outputs);
+
+  // Sets trivial_outputs if the results of ng_exec all come straight from
+  // its parameters or from constants, and to null otherwise
+  Status GetTrivialOutputs(const std::shared_ptr<Executable>& ng_exec,
+                           std::shared_ptr<TrivialOutputs>& trivial_outputs);
+
+  // Translates m_graph for the given inputs
+  Status TranslateGraph(const std::vector<TensorShape>& input_shapes,
+                        const std::vector<const Tensor*>& static_input_map,
+                        std::shared_ptr<ngraph::Function>& ng_function);
+
+  // The backend this cluster runs on
+  Status GetClusterBackend(std::shared_ptr<Backend>& backend) const;
+
+  // Compiles ng_function on the backend, device and plugin configuration of
+  // this cluster
+  Status CompileForCluster(std::shared_ptr<ngraph::Function> ng_function,
+                           std::shared_ptr<Executable>& ng_exec);
+
+  // Saves a freshly compiled executable to the persistent cache
+  void PersistExecutable(const Signature& persistent_key,
+                         const string& serialized_ng_func,
+                         const std::shared_ptr<Executable>& ng_exec);
+
+  // Removes one executable from this op's cache, if it is still there
+  void EvictExecutable(const Signature& signature);
+
+  // Drops this op's reference to a cached executable, and removes it from
+  // the backend unless other ops still share it
+  static void ReleaseExecutable(const ExecCacheEntry& entry);
+
+  // Releases and clears all the executables in m_ng_exec_cache
+  void ReleaseAllExecutables();
+
+  // Moves the entries hit since the last call to the front of the LRU list.
+  // Requires m_exec_cache_mutex held for writing.
+  void PromoteRecentlyUsed();
+
   int m_ngraph_cluster{-1};
   int m_graph_id{-1};
   int m_function_cache_depth_in_items = 16;
@@ -132,16 +340,57 @@ class NGraphEncapsulateImpl {
   int my_instance_id{0};
   string m_name;
   std::vector<bool> m_input_is_static;
-  std::list<std::string> m_lru;
   static int s_instance_count;
+  static CacheStats s_exec_cache_stats;
   bool m_do_aot = false;
   map<string, string> m_aot_functions;
   map<string, string> m_aot_execs;
-
-  // ng_function, ng_executable, Output and Input Cache maps
-  std::unordered_map<std::string, std::shared_ptr<Executable>> m_ng_exec_map;
-  std::unordered_map<std::shared_ptr<Executable>, std::string>
-      m_serialized_ng_function_map;
+  // Definition of m_graph, one of the two is set
+  const GraphDef* m_graph_def = nullptr;
+  const FunctionDef* m_fdef = nullptr;
+  const FunctionLibraryDefinition* m_flib = nullptr;
+  // Ops in the cluster graph, not counting its arguments and return values
+  int m_num_ops = 0;
+  // Whether all the ops in the cluster graph are elementwise, see
+  // IsShapeGeneric
+  bool m_shape_generic_ops = false;
+  std::mutex m_graph_mutex;
+  bool m_graph_built = false;
+
+  // Backend, device and plugin configuration set by SetBackendAttributes,
+  // the defaults if empty
+  string m_backend_name;
+  string m_ie_device;
+  map<string, string> m_ie_config;
+
+  // All live instances by id, so that the memory budget can evict
+  // executables from the cache of any op
+  static std::unordered_map<int, NGraphEncapsulateImpl*> s_instances;
+  static std::mutex s_instances_mutex;
+
+  // A compile in progress, that other threads missing on the same signature
+  // wait for
+  struct InFlightCompile {
+    bool done = false;
+    Status status;
+  };
+
+  // ng_function, ng_executable, Output and Input Cache maps. Guarded by
+  // m_exec_cache_mutex since Compute runs concurrently and the memory budget
+  // can evict entries from other ops' threads. Cache hits only take it for
+  // reading.
+  absl::Mutex m_exec_cache_mutex;
+  LRUCache<Signature, ExecCacheEntry, SignatureHash> m_ng_exec_cache;
+  std::unordered_map<std::shared_ptr<Executable>, NgFunctionSource>
+      m_ng_function_map;
+  std::unordered_map<Signature, std::shared_ptr<InFlightCompile>, SignatureHash>
+      m_in_flight_compiles;
+  // Signatures compiling in the background, and the errors of the
+  // background compiles that failed, until they are returned
+  std::unordered_set<Signature, SignatureHash> m_async_compiles;
+  std::unordered_map<Signature, Status, SignatureHash> m_async_compile_errors;
+  // Signalled with m_exec_cache_mutex held when a compile completes
+  absl::CondVar m_compile_done;
 };
 
 }  // namespace ngraph_bridge
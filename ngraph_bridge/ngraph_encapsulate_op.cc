@@ -30,6 +30,8 @@
 #include "tensorflow/core/graph/graph_constructor.h"
 
 #include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_async_compiler.h"
+#include "ngraph_bridge/ngraph_async_executor.h"
 #include "ngraph_bridge/ngraph_backend_manager.h"
 #include "ngraph_bridge/ngraph_builder.h"
 #include "ngraph_bridge/ngraph_cluster_manager.h"
@@ -52,7 +54,7 @@ int NGraphEncapsulateOp::s_instance_id = 0;
 //  NGraphEncapsulateOp::ctor
 //---------------------------------------------------------------------------
 NGraphEncapsulateOp::NGraphEncapsulateOp(OpKernelConstruction* ctx)
-    : OpKernel(ctx) {
+    : AsyncOpKernel(ctx) {
   NGRAPH_VLOG(1) << "Create Executor " << name();
   ng_encap_impl_.SetName(name());
 
@@ -76,85 +78,41 @@ NGraphEncapsulateOp::NGraphEncapsulateOp(OpKernelConstruction* ctx)
     string flib_key =
         "ngraph_cluster_" + to_string(ng_encap_impl_.GetNgraphCluster());
     // Read graphdef from function library
-    const FunctionLibraryDefinition flib =
-        *ctx->function_library()->GetFunctionLibraryDefinition();
-    const FunctionDef* fdef = flib.Find(flib_key);
+    const FunctionLibraryDefinition* flib =
+        ctx->function_library()->GetFunctionLibraryDefinition();
+    const FunctionDef* fdef = flib->Find(flib_key);
     OP_REQUIRES(
         ctx, fdef != nullptr,
         errors::Internal("Did not find graphdef for encapsulate ", flib_key,
                          " in NGraphClusterManager or function library"));
-    // TODO: how to convert from functiondef to graphdef. Anything easier?
-    std::unique_ptr<FunctionBody> fnbody;
-    const auto get_func_sig = [&flib](const string& op, const OpDef** sig) {
-      return flib.LookUpOpDef(op, sig);
-    };
-    Status status =
-        FunctionDefToBodyHelper(*fdef, {}, &flib, get_func_sig, &fnbody);
-    if (!status.ok()) {
-      NGRAPH_VLOG(2) << "FunctionDefToBodyHelper returned a not ok status.";
-    }
-    CopyGraph(*fnbody->graph, &ng_encap_impl_.m_graph);
+    ng_encap_impl_.SetFunctionDef(fdef, flib);
   } else {
-    GraphConstructorOptions opts;
-    opts.allow_internal_ops = true;
-    OP_REQUIRES_OK(
-        ctx, ConvertGraphDefToGraph(opts, *graph_def, &ng_encap_impl_.m_graph));
+    ng_encap_impl_.SetGraphDef(graph_def);
   }
 
   int graph_id{-1};
   OP_REQUIRES_OK(ctx, ctx->GetAttr("ngraph_graph_id", &graph_id));
   ng_encap_impl_.SetGraphId(graph_id);
-  //
-  // Initialize the "m_input_is_static" vector as follows:
-  // (1) create m_input_is_static with n+1 elements, where n is the max arg
-  //     index
-  // (2) for each _Arg node n, set m_input_is_static[n.index] to true if n
-  //     is driving any static input; else set it to false.
-  //
-
-  // Create the vector.
-  int32 max_arg_index = -1;
-  std::vector<const Node*> arg_nodes;
-
-  for (auto node : ng_encap_impl_.m_graph.nodes()) {
-    if (node->type_string() == "_Arg") {
-      arg_nodes.push_back(node);
-
-      int32 index;
-      OP_REQUIRES_OK(ctx, GetNodeAttr(node->attrs(), "index", &index));
-      if (index > max_arg_index) max_arg_index = index;
-    }
-  }
 
-  int size = max_arg_index + 1;
+  // EncapsulateClusters lists the inputs that are static, which saves
+  // building the cluster graph to find them
+  int size = ctx->num_inputs();
   ng_encap_impl_.ResizeStaticInputVector(size);
-
   for (int i = 0; i < size; i++) {
     ng_encap_impl_.SetStaticInputVector(i, false);
   }
-
-  // Fill the vector.
-  for (auto node : arg_nodes) {
-    int32 index;
-    OP_REQUIRES_OK(ctx, GetNodeAttr(node->attrs(), "index", &index));
-
-    bool is_static = false;
-    for (auto edge : node->out_edges()) {
-      if (edge->IsControlEdge() || !edge->dst()->IsOp()) {
-        continue;
-      }
-
-      NGRAPH_VLOG(5) << "For arg " << index << " checking edge "
-                     << edge->DebugString();
-
-      if (InputIsStatic(edge->dst(), edge->dst_input())) {
-        NGRAPH_VLOG(5) << "Marking edge static: " << edge->DebugString();
-        is_static = true;
-        break;
-      }
-    }
-    NGRAPH_VLOG(5) << "Marking arg " << index << " is_static: " << is_static;
-    ng_encap_impl_.SetStaticInputVector(index, is_static);
+  std::vector<int32> static_input_indexes;
+  if (!GetNodeAttr(ctx->def(), "_ngraph_static_inputs", &static_input_indexes)
+           .ok()) {
+    OP_REQUIRES_OK(ctx, ng_encap_impl_.BuildGraph());
+    OP_REQUIRES_OK(
+        ctx, GetStaticInputs(&ng_encap_impl_.m_graph, &static_input_indexes));
+  }
+  for (auto index : static_input_indexes) {
+    OP_REQUIRES(ctx, index >= 0 && index < size,
+                errors::Internal("Static input index ", index, " of ", name(),
+                                 " is out of range"));
+    ng_encap_impl_.SetStaticInputVector(index, true);
   }
 
   // Get the optional attributes
@@ -162,6 +120,8 @@ NGraphEncapsulateOp::NGraphEncapsulateOp(OpKernelConstruction* ctx)
   auto node_def = ctx->def();
   OP_REQUIRES_OK(ctx, ng_encap_impl_.ParseNodeAttributes(
                           node_def.attr(), &additional_attribute_map));
+  OP_REQUIRES_OK(ctx,
+                 ng_encap_impl_.SetBackendAttributes(additional_attribute_map));
 }
 
 //---------------------------------------------------------------------------
@@ -176,6 +136,23 @@ NGraphEncapsulateOp::~NGraphEncapsulateOp() {
   ng_encap_impl_.ClearExecMaps();
 }
 
+//---------------------------------------------------------------------------
+// AsyncOpKernel::ComputeAsync
+//---------------------------------------------------------------------------
+void NGraphEncapsulateOp::ComputeAsync(OpKernelContext* ctx,
+                                       DoneCallback done) {
+  if (!AsyncExecutor::IsEnabled()) {
+    Compute(ctx);
+    done();
+    return;
+  }
+  // The context and its inputs stay valid until done is called
+  AsyncExecutor::Schedule([this, ctx, done]() {
+    Compute(ctx);
+    done();
+  });
+}
+
 //---------------------------------------------------------------------------
 // OpKernel::Compute
 //---------------------------------------------------------------------------
@@ -187,7 +164,6 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
   NG_TRACE(oss.str(), name(), "");
 
   Timer compute_time;
-  std::lock_guard<std::mutex> lock(m_compute_lock_);
   NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Compute starting for cluster "
                  << ng_encap_impl_.GetNgraphCluster();
   int time_func_create_or_lookup;
@@ -196,6 +172,9 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
   std::vector<TensorShape> input_shapes;
   std::vector<const Tensor*> static_input_map;
   std::shared_ptr<Executable> ng_exec;
+  std::shared_ptr<CallLimiter> ng_exec_call_limiter;
+  std::shared_ptr<TensorBindingPool> ng_exec_bindings;
+  std::shared_ptr<TrivialOutputs> ng_exec_trivial_outputs;
   // TF input tensor
   std::vector<Tensor> tf_input_tensors;
   int step_id;
@@ -208,9 +187,17 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
     step_id = ctx->step_id();
 
     // Get ngraph executable and inputs information
-    OP_REQUIRES_OK(
-        ctx, ng_encap_impl_.GetNgExecutable(tf_input_tensors, input_shapes,
-                                            static_input_map, ng_exec));
+    if (AsyncCompiler::IsEnabled()) {
+      OP_REQUIRES_OK(ctx, ng_encap_impl_.GetNgExecutableAsync(
+                              tf_input_tensors, input_shapes, static_input_map,
+                              ng_exec, ng_exec_call_limiter, ng_exec_bindings,
+                              ng_exec_trivial_outputs));
+    } else {
+      OP_REQUIRES_OK(ctx, ng_encap_impl_.GetNgExecutable(
+                              tf_input_tensors, input_shapes, static_input_map,
+                              ng_exec, ng_exec_call_limiter, ng_exec_bindings,
+                              ng_exec_trivial_outputs));
+    }
 
     NGRAPH_VLOG(1) << " Step_ID: " << step_id;
     NGRAPH_VLOG(4)
@@ -220,43 +207,103 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
     time_func_create_or_lookup = function_lookup_or_create.ElapsedInMS();
   }
 
+  // The executable is compiling in the background, run this step with the
+  // TF kernels instead
+  if (ng_exec == nullptr) {
+    NG_TRACE("Execute TF graph", name(), "");
+    AsyncCompiler::GetStats().fallbacks++;
+    std::vector<Tensor> tf_output_tensors;
+    OP_REQUIRES_OK(
+        ctx, ng_encap_impl_.ExecuteTFGraph(
+                 tf_input_tensors, ctx->function_library(), tf_output_tensors));
+    OP_REQUIRES(ctx, tf_output_tensors.size() == ctx->num_outputs(),
+                errors::Internal("Expected ", ctx->num_outputs(),
+                                 " outputs from the TF graph of ", name(),
+                                 ", got ", tf_output_tensors.size()));
+    for (int i = 0; i < tf_output_tensors.size(); i++) {
+      OP_REQUIRES(ctx,
+                  tf_output_tensors[i].dtype() == ctx->expected_output_dtype(i),
+                  errors::Internal(
+                      "Expected output ", i, " of the TF graph of ", name(),
+                      " to be ", DataTypeString(ctx->expected_output_dtype(i)),
+                      ", got ", DataTypeString(tf_output_tensors[i].dtype())));
+      ctx->set_output(i, tf_output_tensors[i]);
+    }
+    NGRAPH_VLOG(1) << "NGRAPH_TF_TIMING_PROFILE: OP_ID: "
+                   << ng_encap_impl_.GetInstanceId() << " Step_ID: " << step_id
+                   << " Cluster: " << name()
+                   << " Time-Compute: " << compute_time.ElapsedInMS()
+                   << " TF fallback, compile queue depth: "
+                   << AsyncCompiler::GetStats().queue_depth;
+    return;
+  }
+
   NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Compute got graph for cluster "
                  << ng_encap_impl_.GetNgraphCluster();
 
+  // Trivial executables would only copy their inputs and constants to their
+  // outputs, so forward those instead of calling them
+  if (ng_exec_trivial_outputs != nullptr) {
+    const auto& input_indices = ng_exec_trivial_outputs->input_indices;
+    OP_REQUIRES(ctx, input_indices.size() == ctx->num_outputs(),
+                errors::Internal("Expected ", ctx->num_outputs(),
+                                 " outputs from the executable of ", name(),
+                                 ", got ", input_indices.size()));
+    for (int i = 0; i < input_indices.size(); i++) {
+      const Tensor& output = input_indices[i] < 0
+                                 ? ng_exec_trivial_outputs->constants[i]
+                                 : tf_input_tensors[input_indices[i]];
+      OP_REQUIRES(ctx, output.dtype() == ctx->expected_output_dtype(i),
+                  errors::Internal(
+                      "Expected output ", i, " of the executable of ", name(),
+                      " to be ", DataTypeString(ctx->expected_output_dtype(i)),
+                      ", got ", DataTypeString(output.dtype())));
+      ctx->set_output(i, output);
+    }
+    NGRAPH_VLOG(1) << "NGRAPH_TF_TIMING_PROFILE: OP_ID: "
+                   << ng_encap_impl_.GetInstanceId() << " Step_ID: " << step_id
+                   << " Cluster: " << name()
+                   << " Time-Compute: " << compute_time.ElapsedInMS()
+                   << " Function-Create-or-Lookup: "
+                   << time_func_create_or_lookup << " Outputs forwarded";
+    return;
+  }
+
   Timer create_or_lookup_tensors;
 
-  // Allocate tensors for input arguments.
-  vector<shared_ptr<ng::runtime::Tensor>> ng_inputs;
-  int ng_input_tensor_size_in_bytes = 0;
+  // Take a set of tensor bindings for this call. The nGraph tensors in it
+  // wrap the TF buffers of an earlier call, and are only created again for
+  // the buffers that changed since.
+  auto bindings = ng_exec_bindings->Acquire();
+  int num_tensors_created = 0;
   {
     NG_TRACE("Input: maybe create", name(), "");
     OP_REQUIRES_OK(
-        ctx, ng_encap_impl_.AllocateNGTensors(tf_input_tensors, ng_inputs));
+        ctx, bindings->inputs.Bind(tf_input_tensors, num_tensors_created));
   }
 
   NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Compute allocated argument tensors "
                     "for cluster "
                  << ng_encap_impl_.GetNgraphCluster();
   // Allocate tensors for the output results.
-  vector<shared_ptr<ng::runtime::Tensor>> ng_outputs;
-  int ng_output_tensor_size_in_bytes = 0;
   std::vector<Tensor> tf_output_tensors;
+  std::shared_ptr<OutputBufferPool::BufferSet> output_buffers;
   {
     NG_TRACE("Output: maybe create", name(), "");
+    std::vector<ng::Shape> output_shapes;
+    OP_REQUIRES_OK(ctx, ng_encap_impl_.GetOutputShapes(
+                            ng_exec, tf_input_tensors, output_shapes));
+    std::vector<TensorShape> tf_shapes;
     for (auto i = 0; i < ng_exec->get_results().size(); i++) {
       auto ng_element = ng_exec->get_results()[i];
-      auto ng_shape = ng_element->get_shape();
+      auto ng_shape = output_shapes[i];
       auto ng_element_type = ng_element->get_element_type();
 
-      // Create the TF output tensor
       vector<int64> dims;
       for (auto dim : ng_shape) {
         dims.push_back(dim);
       }
-      TensorShape tf_shape(dims);
-      Tensor* output_tensor = nullptr;
-      OP_REQUIRES_OK(ctx, ctx->allocate_output(i, tf_shape, &output_tensor));
-      tf_output_tensors.push_back(*output_tensor);
+      tf_shapes.push_back(TensorShape(dims));
 
       // Make sure the nGraph-inferred element type agrees with what TensorFlow
       // expected.
@@ -270,8 +317,32 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
                            "the element type expected by TensorFlow"));
     }
 
-    OP_REQUIRES_OK(
-        ctx, ng_encap_impl_.AllocateNGTensors(tf_output_tensors, ng_outputs));
+    // Take pooled buffers when TF has dropped the outputs of an earlier call,
+    // allocate new ones otherwise
+    auto output_pool = ng_exec_bindings->GetOutputBuffers();
+    if (output_pool != nullptr) {
+      std::vector<DataType> dtypes;
+      for (int i = 0; i < tf_shapes.size(); i++) {
+        dtypes.push_back(ctx->expected_output_dtype(i));
+      }
+      OP_REQUIRES_OK(
+          ctx, output_pool->Acquire(dtypes, tf_shapes, output_buffers,
+                                    tf_output_tensors, num_tensors_created));
+    }
+    if (output_buffers != nullptr) {
+      for (int i = 0; i < tf_output_tensors.size(); i++) {
+        ctx->set_output(i, tf_output_tensors[i]);
+      }
+    } else {
+      for (int i = 0; i < tf_shapes.size(); i++) {
+        Tensor* output_tensor = nullptr;
+        OP_REQUIRES_OK(ctx,
+                       ctx->allocate_output(i, tf_shapes[i], &output_tensor));
+        tf_output_tensors.push_back(*output_tensor);
+      }
+      OP_REQUIRES_OK(
+          ctx, bindings->outputs.Bind(tf_output_tensors, num_tensors_created));
+    }
   }
   NGRAPH_VLOG(4)
       << "NGraphEncapsulateOp::Compute allocated result tensors for cluster "
@@ -288,8 +359,13 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
       NGRAPH_VLOG(4)
           << "NGraphEncapsulateOp::Compute call starting for cluster "
           << ng_encap_impl_.GetNgraphCluster();
+      // Stay within the calls the backend can run concurrently, across this
+      // op's threads and the other ops sharing the executable
+      std::lock_guard<CallLimiter> call_lock(*ng_exec_call_limiter);
       try {
-        ng_exec->call(ng_outputs, ng_inputs);
+        ng_exec->call(output_buffers != nullptr ? output_buffers->bindings.Get()
+                                                : bindings->outputs.Get(),
+                      bindings->inputs.Get());
       } catch (const std::exception& exp) {
         Status st = ng_encap_impl_.DumpNgFunction(
             "tf_function_error_" + ctx->op_kernel().name() + ".json", ng_exec);
@@ -311,15 +387,14 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
     }
     time_execute_function = execute_function.ElapsedInMS();
   }
+  ng_exec_bindings->Release(std::move(bindings));
 
   long vm, rss;
   MemoryProfile(vm, rss);
   NGRAPH_VLOG(1) << "NGRAPH_TF_MEM_PROFILE:  OP_ID: "
                  << ng_encap_impl_.GetInstanceId() << " Step_ID: " << step_id
-                 << " Cluster: " << name() << " Input Tensors created: "
-                 << ng_input_tensor_size_in_bytes / (1024 * 1024) << " MB"
-                 << " Output Tensors created: "
-                 << ng_output_tensor_size_in_bytes / (1024 * 1024) << " MB"
+                 << " Cluster: " << name()
+                 << " Tensors created: " << num_tensors_created
                  << " Total process memory: " << rss / (1024 * 1024) << " GB";
 
   NGRAPH_VLOG(4) << "NGraphEncapsulateOp::Compute call done for cluster "
@@ -335,7 +410,8 @@ void NGraphEncapsulateOp::Compute(OpKernelContext* ctx) {
                  << " Function-Create-or-Lookup: " << time_func_create_or_lookup
                  << " Create-and-copy-tensors: "
                  << time_create_or_lookup_tensors
-                 << " Execute: " << time_execute_function;
+                 << " Execute: " << time_execute_function
+                 << " Tensors-created: " << num_tensors_created;
 }  // end compute
 
 int NGraphEncapsulateImpl::s_instance_count = 0;
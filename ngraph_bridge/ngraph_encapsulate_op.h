@@ -21,6 +21,7 @@
 #include <ostream>
 #include <vector>
 
+#include "tensorflow/core/framework/op_kernel.h"
 #include "tensorflow/core/framework/tensor_shape.h"
 #include "tensorflow/core/graph/graph.h"
 
@@ -31,16 +32,18 @@
 namespace tensorflow {
 namespace ngraph_bridge {
 
-class NGraphEncapsulateOp : public OpKernel {
+class NGraphEncapsulateOp : public AsyncOpKernel {
  public:
   explicit NGraphEncapsulateOp(OpKernelConstruction* ctx);
   ~NGraphEncapsulateOp() override;
   void Compute(OpKernelContext* ctx) override;
+  // Runs Compute on the AsyncExecutor pool if it is enabled, and inline
+  // otherwise
+  void ComputeAsync(OpKernelContext* ctx, DoneCallback done) override;
 
  private:
   static int s_instance_id;
   NGraphEncapsulateImpl ng_encap_impl_;
-  std::mutex m_compute_lock_;
 };
 
 }  // namespace ngraph_bridge
@@ -0,0 +1,141 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <algorithm>
+#include <cstdlib>
+#include <iterator>
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_exec_cache_budget.h"
+
+using namespace std;
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// Reads NGRAPH_TF_FUNCTION_CACHE_MEM_BUDGET_MB, 0 meaning no budget
+static int64 BudgetBytesFromEnv() {
+  const char* budget_mb = std::getenv("NGRAPH_TF_FUNCTION_CACHE_MEM_BUDGET_MB");
+  if (budget_mb == nullptr) {
+    return 0;
+  }
+  return std::max<int64>(atoll(budget_mb), 0) * 1024 * 1024;
+}
+
+std::atomic<int64> ExecCacheBudget::s_budget_bytes{BudgetBytesFromEnv()};
+int64 ExecCacheBudget::s_charged_bytes = 0;
+double ExecCacheBudget::s_inflation = 0;
+std::unordered_map<ExecCacheBudget::Key, ExecCacheBudget::Entry,
+                   ExecCacheBudget::KeyHash>
+    ExecCacheBudget::s_entries;
+std::multimap<double, ExecCacheBudget::Key> ExecCacheBudget::s_priorities;
+std::mutex ExecCacheBudget::s_mutex;
+
+bool ExecCacheBudget::IsEnabled() { return s_budget_bytes > 0; }
+
+int64 ExecCacheBudget::GetBudgetBytes() { return s_budget_bytes; }
+
+void ExecCacheBudget::SetBudgetBytes(int64 budget_bytes) {
+  s_budget_bytes = std::max<int64>(budget_bytes, 0);
+}
+
+int64 ExecCacheBudget::GetChargedBytes() {
+  std::lock_guard<std::mutex> lock(s_mutex);
+  return s_charged_bytes;
+}
+
+void ExecCacheBudget::Charge(const Key& key, int64 bytes, int64 compile_time_ms,
+                             std::vector<Key>* victims) {
+  if (!IsEnabled()) {
+    return;
+  }
+  std::lock_guard<std::mutex> lock(s_mutex);
+  auto it = s_entries.find(key);
+  if (it != s_entries.end()) {
+    ReleaseLocked(it);
+  }
+
+  // An executable without weights or buffers can be charged 0 bytes, charge
+  // at least a page so that the priority is finite
+  Entry entry;
+  entry.bytes = std::max<int64>(bytes, 4096);
+  entry.cost = static_cast<double>(std::max<int64>(compile_time_ms, 1));
+  entry.priority_it =
+      s_priorities.emplace(s_inflation + entry.cost / entry.bytes, key);
+  s_entries[key] = entry;
+  s_charged_bytes += entry.bytes;
+
+  auto victim_it = s_priorities.begin();
+  while (s_charged_bytes > s_budget_bytes && victim_it != s_priorities.end()) {
+    if (victim_it->second == key) {
+      ++victim_it;
+      continue;
+    }
+    s_inflation = victim_it->first;
+    victims->push_back(victim_it->second);
+    auto next_it = std::next(victim_it);
+    ReleaseLocked(s_entries.find(victim_it->second));
+    victim_it = next_it;
+  }
+  NGRAPH_VLOG(2) << "ExecCacheBudget: charged " << entry.bytes
+                 << " bytes to op " << key.first << ", " << s_charged_bytes
+                 << " of " << s_budget_bytes << " bytes in use, "
+                 << victims->size() << " to evict";
+}
+
+void ExecCacheBudget::Touch(const Key& key) {
+  if (!IsEnabled()) {
+    return;
+  }
+  std::lock_guard<std::mutex> lock(s_mutex);
+  auto it = s_entries.find(key);
+  if (it == s_entries.end()) {
+    return;
+  }
+  Entry& entry = it->second;
+  s_priorities.erase(entry.priority_it);
+  entry.priority_it =
+      s_priorities.emplace(s_inflation + entry.cost / entry.bytes, key);
+}
+
+void ExecCacheBudget::Release(const Key& key) {
+  std::lock_guard<std::mutex> lock(s_mutex);
+  auto it = s_entries.find(key);
+  if (it != s_entries.end()) {
+    ReleaseLocked(it);
+  }
+}
+
+void ExecCacheBudget::ReleaseAll(int owner) {
+  std::lock_guard<std::mutex> lock(s_mutex);
+  for (auto it = s_entries.begin(); it != s_entries.end();) {
+    auto next_it = std::next(it);
+    if (it->first.first == owner) {
+      ReleaseLocked(it);
+    }
+    it = next_it;
+  }
+}
+
+void ExecCacheBudget::ReleaseLocked(
+    std::unordered_map<Key, Entry, KeyHash>::iterator it) {
+  s_charged_bytes -= it->second.bytes;
+  s_priorities.erase(it->second.priority_it);
+  s_entries.erase(it);
+}
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
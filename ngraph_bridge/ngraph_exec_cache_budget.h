@@ -0,0 +1,111 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+// Process-wide memory budget for the executable caches of all the
+// encapsulate ops
+
+#ifndef NGRAPH_TF_BRIDGE_EXEC_CACHE_BUDGET_H_
+#define NGRAPH_TF_BRIDGE_EXEC_CACHE_BUDGET_H_
+#pragma once
+
+#include <atomic>
+#include <map>
+#include <mutex>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+#include "tensorflow/core/platform/types.h"
+
+#include "ngraph_bridge/ngraph_signature.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// Every executable an encapsulate op caches is charged the memory estimated
+// from its weights and buffers. When the total goes over the budget,
+// executables are picked for eviction across all ops with the GreedyDual-Size
+// policy: each entry has a priority of L + compile_time / bytes, refreshed on
+// every hit, the lowest priority entry is evicted first and L is raised to its
+// priority. Cheap to rebuild, large and cold executables go first.
+//
+// The budget is read from NGRAPH_TF_FUNCTION_CACHE_MEM_BUDGET_MB. When it is
+// not set (or 0) nothing is charged and the caches are only bounded by
+// NGRAPH_TF_FUNCTION_CACHE_ITEM_DEPTH.
+//
+// The budget only does the book keeping. Charge returns the entries to
+// evict, and it is up to the caller to remove them from the owning caches,
+// without holding any cache lock of its own.
+class ExecCacheBudget {
+ public:
+  // An executable is identified by the instance id of the owning
+  // encapsulate op and its input signature
+  using Key = std::pair<int, Signature>;
+
+  static bool IsEnabled();
+
+  static int64 GetBudgetBytes();
+  static void SetBudgetBytes(int64 budget_bytes);
+
+  // Sum of the bytes charged for the executables currently cached
+  static int64 GetChargedBytes();
+
+  // Charges a newly cached executable and appends to victims the entries
+  // that have to be evicted to get back within the budget. The new entry
+  // itself is never picked.
+  static void Charge(const Key& key, int64 bytes, int64 compile_time_ms,
+                     std::vector<Key>* victims);
+
+  // Refreshes the priority of an executable on a cache hit
+  static void Touch(const Key& key);
+
+  // Drops the charge of an executable the owner removed by itself
+  static void Release(const Key& key);
+
+  // Drops the charges of all executables of an op
+  static void ReleaseAll(int owner);
+
+ private:
+  struct KeyHash {
+    size_t operator()(const Key& key) const {
+      return SignatureHash()(key.second) ^
+             (static_cast<size_t>(key.first) * 0x9e3779b97f4a7c15ULL);
+    }
+  };
+
+  struct Entry {
+    int64 bytes;
+    double cost;
+    std::multimap<double, Key>::iterator priority_it;
+  };
+
+  static void ReleaseLocked(
+      std::unordered_map<Key, Entry, KeyHash>::iterator it);
+
+  static std::atomic<int64> s_budget_bytes;
+  static int64 s_charged_bytes;
+  // GreedyDual-Size inflation value
+  static double s_inflation;
+  static std::unordered_map<Key, Entry, KeyHash> s_entries;
+  // Entries ordered by increasing priority, the first one is evicted first
+  static std::multimap<double, Key> s_priorities;
+  static std::mutex s_mutex;
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_EXEC_CACHE_BUDGET_H_
@@ -103,6 +103,29 @@ const ngraph::ResultVector& Executable::get_results() const {
   return m_results;
 }
 
+vector<Shape> Executable::get_result_shapes(const vector<Shape>& input_shapes) {
+  const ParameterVector& parameters = get_parameters();
+  if (parameters.size() != input_shapes.size()) {
+    stringstream ss;
+    ss << "Input count " << input_shapes.size()
+       << " does not match Function's Parameter count " << parameters.size();
+    throw runtime_error(ss.str());
+  }
+  for (size_t i = 0; i < parameters.size(); i++) {
+    if (parameters[i]->get_shape() != input_shapes[i]) {
+      stringstream ss;
+      ss << "Input " << i << " shape " << input_shapes[i]
+         << " does not match Parameter shape " << parameters[i]->get_shape();
+      throw runtime_error(ss.str());
+    }
+  }
+  vector<Shape> result_shapes;
+  for (const auto& result : get_results()) {
+    result_shapes.push_back(result->get_shape());
+  }
+  return result_shapes;
+}
+
 size_t Executable::get_preferred_pipeline_depth() const { return 2; }
 
 void Executable::set_parameters_and_results(const ngraph::Function& func) {
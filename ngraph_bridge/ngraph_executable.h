@@ -65,6 +65,13 @@ class Executable {
   /// \returns an ngraph::ResultVector of all input parameters
   const ngraph::ResultVector& get_results() const;
 
+  /// \brief Query the shapes of the outputs for inputs of the given shapes
+  /// \param input_shapes The shapes of the inputs, in Parameter order
+  /// \returns The shapes of the outputs, in Result order. Throws if the
+  ///     executable cannot be called with inputs of these shapes.
+  virtual vector<ngraph::Shape> get_result_shapes(
+      const vector<ngraph::Shape>& input_shapes);
+
   /// \brief Get the preferred pipeline_depth for this executable
   /// \returns  preferred pipeline_depth
   virtual size_t get_preferred_pipeline_depth() const;
@@ -0,0 +1,259 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <cstdlib>
+#include <map>
+#include <memory>
+#include <set>
+#include <vector>
+
+#include "tensorflow/core/lib/core/errors.h"
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_assign_clusters.h"
+#include "ngraph_bridge/ngraph_fuse_clusters.h"
+#include "ngraph_bridge/ngraph_mark_for_clustering.h"
+#include "ngraph_bridge/tf_deadness_analysis.h"
+#include "ngraph_bridge/tf_graphcycles.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+//
+// Each pair of edge connected clusters becomes two NGraphEncapsulate ops,
+// which costs a TF kernel dispatch, the tensor wrappers and a backend call
+// for each of them on every step. This pass looks at the clusters as a whole
+// and fuses any two of them that are connected by an edge when:
+//
+//   (1) there is no path between them through a node outside of both (it
+//       would become a cycle through the fused encapsulate),
+//   (2) they are on the same backend,
+//   (3) their deadness predicates are the same, or the src cluster is always
+//       live and everything else it feeds has the predicate of the dst
+//       cluster (the outputs of the fused encapsulate are dead as soon as any
+//       of its inputs is), and
+//   (4) the dst cluster does not read a static input computed by the src
+//       cluster.
+//
+// AssignClusters contracts single edges and keeps the edges that became
+// internal to a cluster in its deadness bookkeeping, so it leaves some of
+// these pairs apart. The fused clusters keep the id of the src cluster.
+//
+// The pass runs before DeassignClusters, so that small clusters which are
+// fused no longer count as trivial, and is enabled by setting
+// NGRAPH_TF_FUSE_CLUSTERS.
+//
+
+namespace {
+
+// An nGraph cluster or, for nodes outside of the clusters, a single node
+struct FusionCluster {
+  int index;           // node in the GraphCycles
+  int ngraph_cluster;  // -1 for nodes outside of the clusters
+  std::set<Node*> nodes;
+  std::string backend;
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+  std::string predicate_string;
+#endif
+};
+
+using FusionClusterMap = std::map<Node*, std::shared_ptr<FusionCluster>>;
+
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+bool CanFuseDeadnessCheck(const FusionCluster& src, const FusionCluster& dst,
+                          const FusionClusterMap& cluster_map) {
+  if (src.predicate_string == dst.predicate_string) {
+    return true;
+  }
+  if (!DeadnessAnalysis::IsTruePredString(src.predicate_string)) {
+    return false;
+  }
+  for (auto node : src.nodes) {
+    for (auto edge : node->out_edges()) {
+      if (!edge->dst()->IsOp()) {
+        continue;
+      }
+      const FusionCluster* out_cluster = cluster_map.at(edge->dst()).get();
+      if (out_cluster == &src || out_cluster == &dst) {
+        continue;
+      }
+      if (out_cluster->predicate_string != dst.predicate_string) {
+        return false;
+      }
+    }
+  }
+  return true;
+}
+#endif
+
+}  // namespace
+
+Status FuseClusters(Graph* graph) {
+  if (std::getenv("NGRAPH_TF_FUSE_CLUSTERS") == nullptr) {
+    return Status::OK();
+  }
+
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+  std::unique_ptr<DeadnessAnalysis> deadness_analyzer;
+  TF_RETURN_IF_ERROR(DeadnessAnalysis::Run(*graph, &deadness_analyzer));
+#endif
+
+  GraphCycles gc;
+  FusionClusterMap cluster_map;
+  std::map<int, std::shared_ptr<FusionCluster>> ngraph_clusters;
+
+  for (auto node : graph->nodes()) {
+    int cluster_idx;
+    bool in_cluster = GetNodeCluster(node, &cluster_idx) == Status::OK();
+
+    std::shared_ptr<FusionCluster> cluster;
+    if (in_cluster) {
+      cluster = ngraph_clusters[cluster_idx];
+    }
+    if (cluster == nullptr) {
+      cluster = std::make_shared<FusionCluster>();
+      cluster->index = gc.NewNode();
+      cluster->ngraph_cluster = cluster_idx;
+      cluster->backend = GetNodeBackend(node);
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+      DeadnessAnalysis::GetTruePredString(cluster->predicate_string);
+#endif
+      if (in_cluster) {
+        ngraph_clusters[cluster_idx] = cluster;
+      }
+    }
+    cluster->nodes.insert(node);
+    cluster_map[node] = cluster;
+
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+    // All the nodes of a cluster that are not always live share one predicate
+    string pred_string;
+    TF_RETURN_IF_ERROR(deadness_analyzer->GetNodePredicate(*node, pred_string));
+    if (!DeadnessAnalysis::IsTruePredString(pred_string)) {
+      cluster->predicate_string = pred_string;
+    }
+#endif
+  }
+
+  for (auto edge : graph->edges()) {
+    Node* src = edge->src();
+    Node* dst = edge->dst();
+
+    // Skip source/sink and NextIteration, as AssignClusters does
+    if (!src->IsOp() || !dst->IsOp() || src->IsNextIteration() ||
+        dst->IsNextIteration()) {
+      continue;
+    }
+
+    int src_index = cluster_map[src]->index;
+    int dst_index = cluster_map[dst]->index;
+    if (src_index == dst_index) {
+      continue;
+    }
+    if (!gc.InsertEdge(src_index, dst_index)) {
+      return errors::Internal("Clustered graph has a cycle (inserting an edge ",
+                              "from ", src->DebugString(), " to ",
+                              dst->DebugString(), " would create a cycle)");
+    }
+  }
+
+  // The same shadow node as in AssignClusters keeps a static input outside of
+  // the cluster that reads it
+  for (auto node : graph->op_nodes()) {
+    std::vector<int32> static_inputs;
+    GetStaticInputs(node, &static_inputs);
+    if (static_inputs.size() == 0) {
+      continue;
+    }
+    std::vector<const Edge*> edges_to_node;
+    TF_RETURN_IF_ERROR(node->input_edges(&edges_to_node));
+    for (auto static_inp_idx : static_inputs) {
+      auto static_edge = edges_to_node[static_inp_idx];
+      int src_index = cluster_map[static_edge->src()]->index;
+      int dst_index = cluster_map[node]->index;
+      if (static_edge->src()->type_string() == "Const" ||
+          src_index == dst_index) {
+        continue;
+      }
+      int shadow_node_index = gc.NewNode();
+      if (!gc.InsertEdge(src_index, shadow_node_index) ||
+          !gc.InsertEdge(shadow_node_index, dst_index)) {
+        return errors::Internal("Unable to create shadow edges in GraphCycles");
+      }
+    }
+  }
+
+  int num_fused = 0;
+  bool changed;
+  do {
+    changed = false;
+    for (auto edge : graph->edges()) {
+      auto src_cluster = cluster_map[edge->src()];
+      auto dst_cluster = cluster_map[edge->dst()];
+
+      if (src_cluster == dst_cluster || src_cluster->ngraph_cluster < 0 ||
+          dst_cluster->ngraph_cluster < 0 ||
+          src_cluster->backend != dst_cluster->backend) {
+        continue;
+      }
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+      if (!CanFuseDeadnessCheck(*src_cluster, *dst_cluster, cluster_map)) {
+        continue;
+      }
+#endif
+      // Fails if there is another path from src to dst
+      if (!gc.HasEdge(src_cluster->index, dst_cluster->index) ||
+          !gc.ContractEdge(src_cluster->index, dst_cluster->index)) {
+        continue;
+      }
+
+      NGRAPH_VLOG(2) << "Fusing cluster " << dst_cluster->ngraph_cluster
+                     << " into cluster " << src_cluster->ngraph_cluster;
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+      if (DeadnessAnalysis::IsTruePredString(src_cluster->predicate_string)) {
+        src_cluster->predicate_string = dst_cluster->predicate_string;
+      }
+#endif
+      for (auto node : dst_cluster->nodes) {
+        src_cluster->nodes.insert(node);
+        cluster_map[node] = src_cluster;
+      }
+      num_fused++;
+      changed = true;
+    }
+  } while (changed);
+
+  for (auto& kv : cluster_map) {
+    Node* node = kv.first;
+    int cluster_idx;
+    if (GetNodeCluster(node, &cluster_idx) == Status::OK() &&
+        cluster_idx != kv.second->ngraph_cluster) {
+      node->ClearAttr("_ngraph_cluster");
+      node->AddAttr("_ngraph_cluster", kv.second->ngraph_cluster);
+    }
+  }
+
+  NGRAPH_VLOG(1) << "Fused " << num_fused << " of " << ngraph_clusters.size()
+                 << " clusters";
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
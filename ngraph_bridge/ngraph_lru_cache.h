@@ -0,0 +1,144 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_LRU_CACHE_H_
+#define NGRAPH_TF_BRIDGE_LRU_CACHE_H_
+#pragma once
+
+#include <atomic>
+#include <functional>
+#include <list>
+#include <unordered_map>
+#include <utility>
+
+#include "tensorflow/core/platform/types.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// Counters describing how a cache is doing. Can be updated from several
+// threads.
+struct CacheStats {
+  std::atomic<int64> hits{0};
+  std::atomic<int64> misses{0};
+  std::atomic<int64> evictions{0};
+  // Sum of the compile time of every executable served from the cache
+  std::atomic<int64> compile_time_saved_ms{0};
+
+  void Reset() {
+    hits = 0;
+    misses = 0;
+    evictions = 0;
+    compile_time_saved_ms = 0;
+  }
+};
+
+// Least recently used ordered map. Items are kept in a list ordered by
+// recency, and indexed by a hash map of list iterators, so lookup, promote,
+// insert and evict are all O(1).
+// Not thread safe, callers are expected to hold their own lock.
+template <typename KeyType, typename ValueType,
+          typename Hash = std::hash<KeyType>>
+class LRUCache {
+ public:
+  using Item = std::pair<KeyType, ValueType>;
+
+  // Returns the value for key and marks it as the most recently used, or
+  // nullptr if key is not in the cache
+  ValueType* Find(const KeyType& key) {
+    auto it = m_index.find(key);
+    if (it == m_index.end()) {
+      return nullptr;
+    }
+    m_items.splice(m_items.begin(), m_items, it->second);
+    return &it->second->second;
+  }
+
+  // Same as Find, but leaves the recency order untouched
+  ValueType* Peek(const KeyType& key) {
+    auto it = m_index.find(key);
+    return it == m_index.end() ? nullptr : &it->second->second;
+  }
+
+  // Inserts (or replaces) key as the most recently used item
+  ValueType& Insert(const KeyType& key, ValueType value) {
+    auto it = m_index.find(key);
+    if (it != m_index.end()) {
+      it->second->second = std::move(value);
+      m_items.splice(m_items.begin(), m_items, it->second);
+      return it->second->second;
+    }
+    m_items.emplace_front(key, std::move(value));
+    m_index[key] = m_items.begin();
+    return m_items.front().second;
+  }
+
+  // Removes key. Returns false if it was not in the cache
+  bool Erase(const KeyType& key, ValueType* erased_value = nullptr) {
+    auto it = m_index.find(key);
+    if (it == m_index.end()) {
+      return false;
+    }
+    if (erased_value != nullptr) {
+      *erased_value = std::move(it->second->second);
+    }
+    m_items.erase(it->second);
+    m_index.erase(it);
+    return true;
+  }
+
+  // Removes the least recently used item. Returns false if the cache is empty
+  bool PopLeastRecent(KeyType* key = nullptr, ValueType* value = nullptr) {
+    if (m_items.empty()) {
+      return false;
+    }
+    Item& item = m_items.back();
+    if (key != nullptr) {
+      *key = item.first;
+    }
+    if (value != nullptr) {
+      *value = std::move(item.second);
+    }
+    m_index.erase(item.first);
+    m_items.pop_back();
+    return true;
+  }
+
+  // Visits the items from the most to the least recently used
+  void ForEach(std::function<void(const KeyType&, ValueType&)> visit) {
+    for (auto& item : m_items) {
+      visit(item.first, item.second);
+    }
+  }
+
+  size_t size() const { return m_index.size(); }
+  bool empty() const { return m_index.empty(); }
+
+  void clear() {
+    m_index.clear();
+    m_items.clear();
+  }
+
+ private:
+  // Most recently used item first
+  std::list<Item> m_items;
+  std::unordered_map<KeyType, typename std::list<Item>::iterator, Hash> m_index;
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_LRU_CACHE_H_
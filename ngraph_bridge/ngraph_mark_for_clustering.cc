@@ -822,7 +822,8 @@ Status MarkForClustering(Graph* graph,
   std::unordered_map<string, int> fail_constraint_histogram;
   vector<Node*> nodes_marked_for_clustering;
 
-  shared_ptr<Backend> op_backend = BackendManager::GetBackend();
+  // The backends the nodes are assigned to, by name
+  std::map<string, shared_ptr<Backend>> op_backends;
   for (auto node : graph->op_nodes()) {
     bool mark_for_clustering = false;
 
@@ -874,13 +875,19 @@ Status MarkForClustering(Graph* graph,
       }
 
       // Check if op is supported by backend
+      string backend = GetNodeBackend(node);
+      auto& op_backend = op_backends[backend];
+      if (op_backend == nullptr) {
+        TF_RETURN_IF_ERROR(BackendManager::GetBackend(backend, op_backend));
+      }
       bool is_supported = false;
       TF_RETURN_IF_ERROR(IsSupportedByBackend(node, op_backend, TFtoNgraphOpMap,
                                               is_supported));
 
       if (!is_supported) {
-        string backend;
-        BackendManager::GetBackendName(backend);
+        if (backend.empty()) {
+          BackendManager::GetBackendName(backend);
+        }
         NGRAPH_VLOG(5) << "TF Op " << node->name() << " of type "
                        << node->type_string()
                        << " is not supported by backend: " << backend;
@@ -937,6 +944,15 @@ bool NodeIsMarkedForClustering(const Node* node) {
           is_marked);
 }
 
+string GetNodeBackend(const Node* node) {
+  string backend_name;
+  if (GetNodeAttr(node->attrs(), "_ngraph_backend", &backend_name) !=
+      Status::OK()) {
+    return "";
+  }
+  return backend_name;
+}
+
 void GetStaticInputs(const Node* node, std::vector<int32>* inputs) {
   if (GetNodeAttr(node->attrs(), "_ngraph_static_inputs", inputs) !=
       Status::OK()) {
@@ -37,6 +37,11 @@ Status IsSupportedByBackend(
     bool& is_supported);
 bool NodeIsMarkedForClustering(const Node* node);
 
+// Returns the backend a node is assigned to with the _ngraph_backend
+// attribute, or an empty string for the currently set backend. Clusters only
+// hold nodes of one backend, and run on it.
+string GetNodeBackend(const Node* node);
+
 // Returns the static input indexes in vector static_input_indexes
 void GetStaticInputs(const Node* node,
                      std::vector<int32>* static_input_indexes);
@@ -0,0 +1,280 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <dirent.h>
+#include <fcntl.h>
+#include <sys/file.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#include <utime.h>
+
+#include <algorithm>
+#include <atomic>
+#include <cerrno>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <ctime>
+#include <fstream>
+#include <sstream>
+#include <tuple>
+#include <vector>
+
+#include "tensorflow/core/framework/graph.pb.h"
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/strings/proto_serialization.h"
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/ngraph_persistent_cache.h"
+#include "ngraph_bridge/version.h"
+
+using namespace std;
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+namespace {
+
+const char kEntryMagic[8] = {'N', 'G', 'T', 'F', 'E', 'X', 'C', '1'};
+const char kEntrySuffix[] = ".ngexec";
+const char kLockFileName[] = ".cleanup.lock";
+// Temporary files left behind by a process that died while writing are
+// deleted once they are this old
+const time_t kStaleTmpFileSeconds = 60 * 60;
+
+struct EntryHeader {
+  char magic[8];
+  uint64 key_hi;
+  uint64 key_lo;
+  uint64 function_size;
+  uint64 exec_size;
+  uint64 checksum_hi;
+  uint64 checksum_lo;
+};
+
+Signature Checksum(const string& serialized_ng_func,
+                   const string& serialized_exec) {
+  SignatureBuilder builder;
+  builder.Add(serialized_ng_func.data(), serialized_ng_func.size());
+  builder.Add(serialized_exec.data(), serialized_exec.size());
+  return builder.Get();
+}
+
+bool HasSuffix(const string& name, const string& suffix) {
+  return name.size() >= suffix.size() &&
+         name.compare(name.size() - suffix.size(), suffix.size(), suffix) == 0;
+}
+
+}  // namespace
+
+bool PersistentExecCache::IsEnabled() { return !GetDirectory().empty(); }
+
+string PersistentExecCache::GetDirectory() {
+  const char* directory = std::getenv("NGRAPH_TF_PERSISTENT_CACHE_DIR");
+  return directory == nullptr ? "" : directory;
+}
+
+string PersistentExecCache::EntryPath(const string& directory,
+                                      const Signature& key) {
+  return directory + "/" + key.ToString() + kEntrySuffix;
+}
+
+Status PersistentExecCache::HashGraph(const Graph& graph,
+                                      Signature& graph_hash) {
+  GraphDef graph_def;
+  graph.ToGraphDef(&graph_def);
+  string serialized_graph;
+  if (!SerializeToStringDeterministic(graph_def, &serialized_graph)) {
+    return errors::Internal("Failed to serialize the cluster graph");
+  }
+  SignatureBuilder builder;
+  builder.Add(serialized_graph.data(), serialized_graph.size());
+  graph_hash = builder.Get();
+  return Status::OK();
+}
+
+Signature PersistentExecCache::MakeKey(const Signature& graph_hash,
+                                       const Signature& input_signature,
+                                       const string& backend_name) {
+  SignatureBuilder builder;
+  builder.AddValue(graph_hash.hi);
+  builder.AddValue(graph_hash.lo);
+  builder.AddValue(input_signature.hi);
+  builder.AddValue(input_signature.lo);
+  // Strings are prefixed with their length so that they cannot run into
+  // each other
+  for (const string& str :
+       {backend_name, string(ngraph_tf_version()), string(ngraph_lib_version()),
+        string(tf_version())}) {
+    builder.AddValue(static_cast<uint64>(str.size()));
+    builder.Add(str.data(), str.size());
+  }
+  builder.AddValue(ngraph_tf_is_openvino_enabled());
+  return builder.Get();
+}
+
+bool PersistentExecCache::Load(const Signature& key, string& serialized_ng_func,
+                               string& serialized_exec) {
+  string path = EntryPath(GetDirectory(), key);
+  std::ifstream f(path, std::ios::binary);
+  if (!f.is_open()) {
+    return false;
+  }
+
+  f.seekg(0, std::ios::end);
+  uint64 file_size = f.tellg();
+  f.seekg(0, std::ios::beg);
+
+  EntryHeader header;
+  bool valid = false;
+  if (f.read(reinterpret_cast<char*>(&header), sizeof(header)) &&
+      memcmp(header.magic, kEntryMagic, sizeof(kEntryMagic)) == 0 &&
+      header.key_hi == key.hi && header.key_lo == key.lo &&
+      header.function_size <= file_size && header.exec_size <= file_size &&
+      sizeof(header) + header.function_size + header.exec_size == file_size) {
+    serialized_ng_func.resize(header.function_size);
+    serialized_exec.resize(header.exec_size);
+    if (f.read(&serialized_ng_func[0], header.function_size) &&
+        f.read(&serialized_exec[0], header.exec_size)) {
+      Signature checksum = Checksum(serialized_ng_func, serialized_exec);
+      valid = checksum.hi == header.checksum_hi &&
+              checksum.lo == header.checksum_lo;
+    }
+  }
+  f.close();
+
+  if (!valid) {
+    NGRAPH_VLOG(0) << "Deleting corrupted persistent cache entry " << path;
+    std::remove(path.c_str());
+    serialized_ng_func.clear();
+    serialized_exec.clear();
+    return false;
+  }
+  // Mark the entry as recently used for the cleanup
+  utime(path.c_str(), nullptr);
+  NGRAPH_VLOG(1) << "Loaded persistent cache entry " << path;
+  return true;
+}
+
+Status PersistentExecCache::Store(const Signature& key,
+                                  const string& serialized_ng_func,
+                                  const string& serialized_exec) {
+  string directory = GetDirectory();
+  if (mkdir(directory.c_str(), 0755) != 0 && errno != EEXIST) {
+    return errors::Internal("Failed to create persistent cache directory ",
+                            directory, ": ", strerror(errno));
+  }
+
+  EntryHeader header;
+  memcpy(header.magic, kEntryMagic, sizeof(kEntryMagic));
+  header.key_hi = key.hi;
+  header.key_lo = key.lo;
+  header.function_size = serialized_ng_func.size();
+  header.exec_size = serialized_exec.size();
+  Signature checksum = Checksum(serialized_ng_func, serialized_exec);
+  header.checksum_hi = checksum.hi;
+  header.checksum_lo = checksum.lo;
+
+  // Write to a file no other writer uses, then move it into place in one
+  // step
+  static std::atomic<int> s_tmp_count{0};
+  string path = EntryPath(directory, key);
+  string tmp_path =
+      path + ".tmp." + to_string(getpid()) + "." + to_string(s_tmp_count++);
+  {
+    std::ofstream f(tmp_path, std::ios::binary);
+    f.write(reinterpret_cast<const char*>(&header), sizeof(header));
+    f.write(serialized_ng_func.data(), serialized_ng_func.size());
+    f.write(serialized_exec.data(), serialized_exec.size());
+    f.close();
+    if (!f) {
+      std::remove(tmp_path.c_str());
+      return errors::Internal("Failed to write persistent cache entry ",
+                              tmp_path);
+    }
+  }
+  if (rename(tmp_path.c_str(), path.c_str()) != 0) {
+    std::remove(tmp_path.c_str());
+    return errors::Internal("Failed to rename persistent cache entry to ", path,
+                            ": ", strerror(errno));
+  }
+  NGRAPH_VLOG(1) << "Stored persistent cache entry " << path;
+
+  Cleanup(directory);
+  return Status::OK();
+}
+
+void PersistentExecCache::Cleanup(const string& directory) {
+  int64 max_bytes = 1024;
+  const char* max_mb = std::getenv("NGRAPH_TF_PERSISTENT_CACHE_MAX_MB");
+  if (max_mb != nullptr) {
+    max_bytes = atoll(max_mb);
+  }
+  max_bytes *= 1024 * 1024;
+
+  // Only one process cleans up at a time, the others skip it
+  string lock_path = directory + "/" + kLockFileName;
+  int lock_fd = open(lock_path.c_str(), O_RDWR | O_CREAT, 0644);
+  if (lock_fd < 0) {
+    return;
+  }
+  if (flock(lock_fd, LOCK_EX | LOCK_NB) != 0) {
+    close(lock_fd);
+    return;
+  }
+
+  // (modification time, size, path) of each entry
+  std::vector<std::tuple<time_t, int64, string>> entries;
+  int64 total_bytes = 0;
+  time_t now = time(nullptr);
+  DIR* dir = opendir(directory.c_str());
+  if (dir != nullptr) {
+    struct dirent* dir_entry;
+    while ((dir_entry = readdir(dir)) != nullptr) {
+      string name = dir_entry->d_name;
+      string path = directory + "/" + name;
+      struct stat file_stat;
+      if (stat(path.c_str(), &file_stat) != 0) {
+        continue;
+      }
+      if (name.find(string(kEntrySuffix) + ".tmp.") != string::npos &&
+          now - file_stat.st_mtime > kStaleTmpFileSeconds) {
+        std::remove(path.c_str());
+      } else if (HasSuffix(name, kEntrySuffix)) {
+        entries.emplace_back(file_stat.st_mtime, file_stat.st_size, path);
+        total_bytes += file_stat.st_size;
+      }
+    }
+    closedir(dir);
+  }
+
+  std::sort(entries.begin(), entries.end());
+  for (const auto& entry : entries) {
+    if (total_bytes <= max_bytes) {
+      break;
+    }
+    if (std::remove(std::get<2>(entry).c_str()) == 0) {
+      NGRAPH_VLOG(1) << "Evicted persistent cache entry " << std::get<2>(entry);
+      total_bytes -= std::get<1>(entry);
+    }
+  }
+
+  flock(lock_fd, LOCK_UN);
+  close(lock_fd);
+}
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
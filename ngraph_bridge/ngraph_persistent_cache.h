@@ -0,0 +1,77 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+// On-disk cache of compiled executables, so that restarted processes do not
+// translate and compile their clusters again
+
+#ifndef NGRAPH_TF_BRIDGE_PERSISTENT_CACHE_H_
+#define NGRAPH_TF_BRIDGE_PERSISTENT_CACHE_H_
+#pragma once
+
+#include <string>
+
+#include "tensorflow/core/graph/graph.h"
+#include "tensorflow/core/lib/core/status.h"
+#include "tensorflow/core/platform/types.h"
+
+#include "ngraph_bridge/ngraph_signature.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// Enabled by pointing NGRAPH_TF_PERSISTENT_CACHE_DIR to a directory, which
+// can be shared by several processes. Each entry holds the serialized nGraph
+// function and the executable the backend saved for it, and is keyed by the
+// cluster graph, the input signature, the backend and the bridge, nGraph and
+// TF versions.
+//
+// Entries are written to a temporary file and renamed into place, so readers
+// only ever see complete files, and carry a checksum that is verified on
+// load; corrupted entries are deleted. Loading an entry refreshes its
+// modification time, and when the directory grows over
+// NGRAPH_TF_PERSISTENT_CACHE_MAX_MB (1024 by default) the least recently
+// used entries are deleted by whichever process holds the cleanup lock.
+class PersistentExecCache {
+ public:
+  static bool IsEnabled();
+
+  // Hash of the TF graph of a cluster, stable across processes
+  static Status HashGraph(const Graph& graph, Signature& graph_hash);
+
+  static Signature MakeKey(const Signature& graph_hash,
+                           const Signature& input_signature,
+                           const string& backend_name);
+
+  // Returns false if there is no valid entry for key
+  static bool Load(const Signature& key, string& serialized_ng_func,
+                   string& serialized_exec);
+
+  static Status Store(const Signature& key, const string& serialized_ng_func,
+                      const string& serialized_exec);
+
+ private:
+  static string GetDirectory();
+  static string EntryPath(const string& directory, const Signature& key);
+
+  // Deletes the least recently used entries until the directory fits in its
+  // size cap
+  static void Cleanup(const string& directory);
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_PERSISTENT_CACHE_H_
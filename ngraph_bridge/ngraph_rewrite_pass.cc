@@ -28,6 +28,7 @@
 #include "ngraph_bridge/ngraph_cluster_manager.h"
 #include "ngraph_bridge/ngraph_deassign_clusters.h"
 #include "ngraph_bridge/ngraph_encapsulate_clusters.h"
+#include "ngraph_bridge/ngraph_fuse_clusters.h"
 #include "ngraph_bridge/ngraph_mark_for_clustering.h"
 #include "ngraph_bridge/ngraph_utils.h"
 
@@ -62,7 +63,8 @@ mutex NGraphRewritePass::s_serial_counter_mutex;
 //
 //   1. Marking [ngraph_mark_for_clustering.cc]
 //   2. Cluster Assignment [ngraph_assign_clusters.cc]
-//   3. Cluster Deassignment [ngraph_deassign_clusters.cc]
+//   3. Cluster Fusion [ngraph_fuse_clusters.cc] and Deassignment
+//      [ngraph_deassign_clusters.cc]
 //   4. Cluster Encapsulation [ngraph_encapsulate_clusters.cc]
 //
 // Between phases, graph dumps (in both .dot and .pbtxt format) may be
@@ -127,7 +129,9 @@ class NGraphEncapsulationPass : public NGraphRewritePass {
       DumpGraphs(options, idx, "clustered", "Graph with Clusters Assigned");
     }
 
-    // 3. Deassign trivial clusters then, if requested, dump the graphs.
+    // 3. Fuse clusters if requested, deassign trivial clusters then, if
+    // requested, dump the graphs.
+    TF_RETURN_IF_ERROR(FuseClusters(options.graph->get()));
     TF_RETURN_IF_ERROR(DeassignClusters(options.graph->get()));
     if (DumpDeclusteredGraphs()) {
       DumpGraphs(options, idx, "declustered",
@@ -0,0 +1,268 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <cstdlib>
+#include <unordered_map>
+
+#include "tensorflow/core/lib/core/errors.h"
+
+#include "ngraph/attribute_visitor.hpp"
+
+#include "logging/ngraph_log.h"
+#include "ngraph_bridge/default_opset.h"
+#include "ngraph_bridge/ngraph_shared_exec_cache.h"
+
+using namespace std;
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+namespace {
+
+// Seeds the hash that confirms the shared cache hits
+const uint64 kCheckSeed = 0x5851f42d4c957f2dULL;
+
+// Feeds the same bytes to the key and the check hashes of a function
+class FunctionHasher {
+ public:
+  FunctionHasher() : m_check(kCheckSeed) {}
+
+  void Add(const void* data, size_t size) {
+    m_hash.Add(data, size);
+    m_check.Add(data, size);
+  }
+
+  template <typename T>
+  void AddValue(const T& value) {
+    Add(&value, sizeof(T));
+  }
+
+  // Strings are prefixed with their length so that they cannot run into
+  // each other
+  void AddString(const string& str) {
+    AddValue(static_cast<uint64>(str.size()));
+    Add(str.data(), str.size());
+  }
+
+  template <typename T>
+  void AddVector(const vector<T>& values) {
+    AddValue(static_cast<uint64>(values.size()));
+    Add(values.data(), values.size() * sizeof(T));
+  }
+
+  void AddElementType(const ngraph::element::Type& type) {
+    AddValue(static_cast<uint64>(type.hash()));
+  }
+
+  void AddShape(const ngraph::PartialShape& shape) {
+    AddValue(shape.is_static());
+    if (shape.is_static()) {
+      AddVector(vector<size_t>(shape.to_shape()));
+    }
+  }
+
+  Signature GetHash() const { return m_hash.Get(); }
+  Signature GetCheck() const { return m_check.Get(); }
+
+ private:
+  SignatureBuilder m_hash;
+  SignatureBuilder m_check;
+};
+
+// Hashes the attributes of a node, by name and value. Attributes of a type
+// it cannot read make the node unhashable, except for element types, which
+// are those of the outputs of the ops that have one.
+class AttributeHasher : public ngraph::AttributeVisitor {
+ public:
+  AttributeHasher(FunctionHasher& hasher) : m_hasher(hasher) {}
+
+  bool IsComplete() const { return m_complete; }
+
+  void on_adapter(const string& name,
+                  ngraph::ValueAccessor<void>& adapter) override {
+    if (adapter.get_type_info() ==
+        ngraph::AttributeAdapter<ngraph::element::Type>::type_info) {
+      m_hasher.AddString(name);
+      return;
+    }
+    NGRAPH_VLOG(2) << "Cannot hash attribute " << name << " of type "
+                   << adapter.get_type_info().name;
+    m_complete = false;
+  }
+  void on_adapter(const string& name,
+                  ngraph::ValueAccessor<string>& adapter) override {
+    m_hasher.AddString(name);
+    m_hasher.AddString(adapter.get());
+  }
+  void on_adapter(const string& name,
+                  ngraph::ValueAccessor<bool>& adapter) override {
+    m_hasher.AddString(name);
+    m_hasher.AddValue(adapter.get());
+  }
+  void on_adapter(const string& name,
+                  ngraph::ValueAccessor<int64_t>& adapter) override {
+    m_hasher.AddString(name);
+    m_hasher.AddValue(adapter.get());
+  }
+  void on_adapter(const string& name,
+                  ngraph::ValueAccessor<double>& adapter) override {
+    m_hasher.AddString(name);
+    m_hasher.AddValue(adapter.get());
+  }
+  void on_adapter(const string& name,
+                  ngraph::ValueAccessor<vector<int64_t>>& adapter) override {
+    m_hasher.AddString(name);
+    m_hasher.AddVector(adapter.get());
+  }
+  void on_adapter(const string& name,
+                  ngraph::ValueAccessor<vector<float>>& adapter) override {
+    m_hasher.AddString(name);
+    m_hasher.AddVector(adapter.get());
+  }
+  void on_adapter(const string& name,
+                  ngraph::ValueAccessor<vector<string>>& adapter) override {
+    m_hasher.AddString(name);
+    m_hasher.AddValue(static_cast<uint64>(adapter.get().size()));
+    for (const auto& value : adapter.get()) {
+      m_hasher.AddString(value);
+    }
+  }
+
+ private:
+  FunctionHasher& m_hasher;
+  bool m_complete = true;
+};
+
+}  // namespace
+
+Status HashFunction(const ngraph::Function& ng_function, Signature& hash,
+                    Signature& check) {
+  FunctionHasher hasher;
+  // Nodes are referred to by their position in the topological order, and
+  // the parameters and results by their position in the function
+  std::unordered_map<const ngraph::Node*, uint64> node_ids;
+  for (const auto& node : ng_function.get_ordered_ops()) {
+    const auto& type_info = node->get_type_info();
+    hasher.AddString(type_info.name);
+    hasher.AddValue(static_cast<uint64>(type_info.version));
+
+    hasher.AddValue(static_cast<uint64>(node->get_input_size()));
+    for (const auto& input : node->input_values()) {
+      hasher.AddValue(node_ids.at(input.get_node()));
+      hasher.AddValue(static_cast<uint64>(input.get_index()));
+    }
+    hasher.AddValue(static_cast<uint64>(node->get_output_size()));
+    for (size_t i = 0; i < node->get_output_size(); i++) {
+      hasher.AddElementType(node->get_output_element_type(i));
+      hasher.AddShape(node->get_output_partial_shape(i));
+    }
+
+    // The values of a constant are hashed as they are, rather than visited
+    // as attributes
+    auto constant = ngraph::as_type_ptr<opset::Constant>(node);
+    if (constant != nullptr) {
+      hasher.Add(constant->get_data_ptr(),
+                 ngraph::shape_size(constant->get_shape()) *
+                     constant->get_element_type().size());
+    } else {
+      AttributeHasher attribute_hasher(hasher);
+      if (!node->visit_attributes(attribute_hasher) ||
+          !attribute_hasher.IsComplete()) {
+        return errors::Unimplemented("Cannot hash the attributes of ",
+                                     type_info.name, " ", node->get_name());
+      }
+    }
+    node_ids.emplace(node.get(), node_ids.size());
+  }
+  for (const auto& parameter : ng_function.get_parameters()) {
+    hasher.AddValue(node_ids.at(parameter.get()));
+  }
+  for (const auto& result : ng_function.get_results()) {
+    hasher.AddValue(node_ids.at(result.get()));
+  }
+  hash = hasher.GetHash();
+  check = hasher.GetCheck();
+  return Status::OK();
+}
+
+std::unordered_map<SharedExecCache::Key, SharedExecCache::Entry,
+                   SharedExecCache::KeyHash>
+    SharedExecCache::s_entries;
+std::mutex SharedExecCache::s_mutex;
+
+bool SharedExecCache::IsEnabled() {
+  return std::getenv("NGRAPH_TF_DISABLE_SHARED_EXEC_CACHE") == nullptr;
+}
+
+bool SharedExecCache::Acquire(const Key& key, const Signature& check,
+                              Item& item) {
+  std::lock_guard<std::mutex> lock(s_mutex);
+  auto it = s_entries.find(key);
+  if (it == s_entries.end()) {
+    return false;
+  }
+  if (it->second.check != check) {
+    NGRAPH_VLOG(1) << "SharedExecCache: hash collision for "
+                   << key.first.ToString() << " on " << key.second;
+    return false;
+  }
+  it->second.ref_count++;
+  item = it->second.item;
+  NGRAPH_VLOG(2) << "SharedExecCache: reusing " << key.first.ToString()
+                 << " on " << key.second << ", " << it->second.ref_count
+                 << " references";
+  return true;
+}
+
+bool SharedExecCache::Publish(const Key& key, const Signature& check,
+                              Item& item) {
+  std::lock_guard<std::mutex> lock(s_mutex);
+  auto& entry = s_entries[key];
+  if (entry.ref_count == 0) {
+    entry.item = item;
+    entry.check = check;
+  } else if (entry.check != check) {
+    NGRAPH_VLOG(1) << "SharedExecCache: hash collision for "
+                   << key.first.ToString() << " on " << key.second
+                   << ", not sharing";
+    return false;
+  } else {
+    item = entry.item;
+  }
+  entry.ref_count++;
+  return true;
+}
+
+bool SharedExecCache::Release(const Key& key) {
+  std::lock_guard<std::mutex> lock(s_mutex);
+  auto it = s_entries.find(key);
+  if (it == s_entries.end()) {
+    return false;
+  }
+  if (--it->second.ref_count > 0) {
+    return false;
+  }
+  s_entries.erase(it);
+  return true;
+}
+
+size_t SharedExecCache::Size() {
+  std::lock_guard<std::mutex> lock(s_mutex);
+  return s_entries.size();
+}
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
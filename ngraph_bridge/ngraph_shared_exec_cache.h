@@ -0,0 +1,117 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+// Process-wide cache of compiled executables, shared by all encapsulate ops
+// and sessions
+
+#ifndef NGRAPH_TF_BRIDGE_SHARED_EXEC_CACHE_H_
+#define NGRAPH_TF_BRIDGE_SHARED_EXEC_CACHE_H_
+#pragma once
+
+#include <memory>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <utility>
+
+#include "tensorflow/core/lib/core/status.h"
+
+#include "ngraph/function.hpp"
+
+#include "ngraph_bridge/ngraph_call_limiter.h"
+#include "ngraph_bridge/ngraph_executable.h"
+#include "ngraph_bridge/ngraph_signature.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// Hashes the structure of a function: the type, attributes, output types
+// and shapes of its ops, how they are connected, and the values of its
+// constants. Names are left out, since they are unique per process or come
+// from the TF graph, so that identical clusters hash the same whichever op
+// or session they come from. Two hashes are computed from independent seeds:
+// the hash keys the shared executables and the check confirms a hit. Fails
+// if an op has attributes that cannot be hashed.
+Status HashFunction(const ngraph::Function& ng_function, Signature& hash,
+                    Signature& check);
+
+// Encapsulate ops look up the executable for a translated function here
+// before compiling it, so that N replicas of a model, or repeated blocks in
+// one graph, pay for a single compile and a single copy of the weights.
+//
+// Entries are reference counted: every op caching an executable holds one
+// reference, and the last op to release it removes the compiled function
+// from the backend. Calls into a shared executable go through the
+// CallLimiter handed out along with it, so that all its users together stay
+// within what the backend can run concurrently.
+//
+// Set NGRAPH_TF_DISABLE_SHARED_EXEC_CACHE to compile every op separately.
+class SharedExecCache {
+ public:
+  // Function hash and name of the backend the function is
+  // compiled for
+  using Key = std::pair<Signature, std::string>;
+
+  struct Item {
+    std::shared_ptr<Executable> ng_exec;
+    std::shared_ptr<CallLimiter> call_limiter;
+    int compile_time_ms = 0;
+  };
+
+  static bool IsEnabled();
+
+  // Returns true and takes a reference if an executable was compiled for key
+  // from a function of the given check hash. The check is compared on every
+  // hit, so that a collision of the key is a miss rather than the wrong
+  // executable.
+  static bool Acquire(const Key& key, const Signature& check, Item& item);
+
+  // Shares a newly compiled executable and takes a reference on it. If
+  // another op has published one for the same key in the meantime, item is
+  // replaced with that one and the caller's executable should be dropped.
+  // Returns false, and takes no reference, if the executable published for
+  // key was compiled from a function of another check hash.
+  static bool Publish(const Key& key, const Signature& check, Item& item);
+
+  // Drops a reference. Returns true if it was the last one, in which case
+  // the caller is expected to remove the compiled function from the backend.
+  static bool Release(const Key& key);
+
+  // Number of distinct executables shared
+  static size_t Size();
+
+ private:
+  struct KeyHash {
+    size_t operator()(const Key& key) const {
+      return SignatureHash()(key.first) ^ std::hash<std::string>()(key.second);
+    }
+  };
+
+  struct Entry {
+    Item item;
+    // Second hash of the function the key was hashed from
+    Signature check;
+    int ref_count = 0;
+  };
+
+  static std::unordered_map<Key, Entry, KeyHash> s_entries;
+  static std::mutex s_mutex;
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_SHARED_EXEC_CACHE_H_
@@ -0,0 +1,138 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <cstring>
+#include <iomanip>
+#include <sstream>
+
+#include "tensorflow/core/framework/tensor_util.h"
+#include "tensorflow/core/framework/types.h"
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/lib/hash/hash.h"
+
+#include "ngraph_bridge/ngraph_signature.h"
+
+using namespace std;
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// The two halves of the signature are chained from different seeds so that
+// they behave as independent 64-bit hashes
+static const uint64 kSignatureSeedHi = 0x9ae16a3b2f90404fULL;
+static const uint64 kSignatureSeedLo = 0xc3a5c85c97cb3127ULL;
+
+string Signature::ToString() const {
+  std::stringstream ss;
+  ss << std::hex << std::setfill('0') << std::setw(16) << hi << std::setw(16)
+     << lo;
+  return ss.str();
+}
+
+SignatureBuilder::SignatureBuilder() {
+  m_signature.hi = kSignatureSeedHi;
+  m_signature.lo = kSignatureSeedLo;
+}
+
+SignatureBuilder::SignatureBuilder(uint64 seed) : SignatureBuilder() {
+  AddValue(seed);
+}
+
+void SignatureBuilder::Add(const void* data, size_t size) {
+  const char* bytes = static_cast<const char*>(data);
+  m_signature.hi = Hash64(bytes, size, m_signature.hi);
+  m_signature.lo = Hash64(bytes, size, m_signature.lo);
+}
+
+SignatureInputs::SignatureInputs(const std::vector<Tensor>& tf_input_tensors,
+                                 const std::vector<bool>& input_is_static,
+                                 bool shape_generic)
+    : m_input_is_static(input_is_static), m_shape_generic(shape_generic) {
+  m_static_inputs.resize(tf_input_tensors.size());
+  for (size_t i = 0; i < tf_input_tensors.size(); i++) {
+    m_dtypes.push_back(tf_input_tensors[i].dtype());
+    m_shapes.push_back(tf_input_tensors[i].shape());
+    if (m_input_is_static[i]) {
+      m_static_inputs[i] = tensor::DeepCopy(tf_input_tensors[i]);
+    }
+  }
+}
+
+bool SignatureInputs::Matches(
+    const std::vector<Tensor>& tf_input_tensors) const {
+  if (tf_input_tensors.size() != m_dtypes.size()) {
+    return false;
+  }
+  for (size_t i = 0; i < tf_input_tensors.size(); i++) {
+    const Tensor& input_tensor = tf_input_tensors[i];
+    if (input_tensor.dtype() != m_dtypes[i]) {
+      return false;
+    }
+    if (m_shape_generic && !m_input_is_static[i]
+            ? input_tensor.dims() != m_shapes[i].dims()
+            : input_tensor.shape() != m_shapes[i]) {
+      return false;
+    }
+    if (m_input_is_static[i]) {
+      auto data = input_tensor.tensor_data();
+      auto cached_data = m_static_inputs[i].tensor_data();
+      if (data.size() != cached_data.size() ||
+          memcmp(data.data(), cached_data.data(), data.size()) != 0) {
+        return false;
+      }
+    }
+  }
+  return true;
+}
+
+Status ComputeInputSignature(const std::vector<Tensor>& tf_input_tensors,
+                             const std::vector<bool>& input_is_static,
+                             Signature& signature, bool shape_generic) {
+  SignatureBuilder builder;
+  for (size_t i = 0; i < tf_input_tensors.size(); i++) {
+    const Tensor& input_tensor = tf_input_tensors[i];
+    builder.AddValue(static_cast<int32>(input_tensor.dtype()));
+    builder.AddValue(static_cast<int32>(input_tensor.dims()));
+    if (shape_generic && !input_is_static[i]) {
+      continue;
+    }
+    for (const auto& dim : input_tensor.shape()) {
+      builder.AddValue(static_cast<int64>(dim.size));
+    }
+  }
+
+  for (size_t i = 0; i < tf_input_tensors.size(); i++) {
+    if (!input_is_static[i]) {
+      continue;
+    }
+    const Tensor& input_tensor = tf_input_tensors[i];
+    if (!DataTypeCanUseMemcpy(input_tensor.dtype())) {
+      return errors::Internal("Cannot compute signature of static input ", i,
+                              " with data type ",
+                              DataType_Name(input_tensor.dtype()));
+    }
+    auto data = input_tensor.tensor_data();
+    builder.AddValue(static_cast<int64>(i));
+    builder.AddValue(static_cast<int64>(data.size()));
+    builder.Add(data.data(), data.size());
+  }
+
+  signature = builder.Get();
+  return Status::OK();
+}
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
@@ -0,0 +1,103 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_SIGNATURE_H_
+#define NGRAPH_TF_BRIDGE_SIGNATURE_H_
+#pragma once
+
+#include <string>
+#include <vector>
+
+#include "tensorflow/core/framework/tensor.h"
+#include "tensorflow/core/framework/tensor_shape.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// A 128-bit hash of the dtypes, shapes and static input values an
+// encapsulate is called with. This is the key of the executable cache.
+struct Signature {
+  uint64 hi = 0;
+  uint64 lo = 0;
+
+  bool operator==(const Signature& other) const {
+    return hi == other.hi && lo == other.lo;
+  }
+  bool operator!=(const Signature& other) const { return !(*this == other); }
+
+  // Returns the signature as 32 hex characters
+  std::string ToString() const;
+};
+
+struct SignatureHash {
+  size_t operator()(const Signature& signature) const {
+    return static_cast<size_t>(signature.lo);
+  }
+};
+
+// Incrementally hashes raw bytes into a Signature
+class SignatureBuilder {
+ public:
+  SignatureBuilder();
+  // Builders of different seeds compute independent hashes of the same bytes
+  explicit SignatureBuilder(uint64 seed);
+
+  void Add(const void* data, size_t size);
+
+  template <typename T>
+  void AddValue(const T& value) {
+    Add(&value, sizeof(T));
+  }
+
+  Signature Get() const { return m_signature; }
+
+ private:
+  Signature m_signature;
+};
+
+// The inputs an executable was compiled for. The executable cache keeps one
+// of these per entry so that a hash hit can be confirmed against the actual
+// dtypes, shapes and static values without rebuilding a key. Shape generic
+// inputs only match on the rank of the non-static inputs.
+class SignatureInputs {
+ public:
+  SignatureInputs() = default;
+  SignatureInputs(const std::vector<Tensor>& tf_input_tensors,
+                  const std::vector<bool>& input_is_static,
+                  bool shape_generic = false);
+
+  bool Matches(const std::vector<Tensor>& tf_input_tensors) const;
+
+ private:
+  std::vector<DataType> m_dtypes;
+  std::vector<TensorShape> m_shapes;
+  // Deep copies of the static inputs. Non-static slots are left empty.
+  std::vector<Tensor> m_static_inputs;
+  std::vector<bool> m_input_is_static;
+  bool m_shape_generic = false;
+};
+
+// Hashes dtype and dims of every input and the raw bytes of every static
+// input into signature. With shape_generic only the rank of the non-static
+// inputs is hashed, so that all their shapes of a rank share a signature.
+Status ComputeInputSignature(const std::vector<Tensor>& tf_input_tensors,
+                             const std::vector<bool>& input_is_static,
+                             Signature& signature, bool shape_generic = false);
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_SIGNATURE_H_
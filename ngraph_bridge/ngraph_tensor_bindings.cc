@@ -0,0 +1,183 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#include <cstdlib>
+
+#include "tensorflow/core/framework/allocation_description.pb.h"
+#include "tensorflow/core/framework/allocator.h"
+#include "tensorflow/core/lib/core/errors.h"
+#include "tensorflow/core/platform/mem.h"
+
+#include "ngraph_bridge/ngraph_tensor_bindings.h"
+#include "ngraph_bridge/ngraph_backend_manager.h"
+#include "ngraph_bridge/ngraph_utils.h"
+
+using namespace std;
+namespace ng = ngraph;
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+namespace {
+
+// One buffer of a set, lent to a TF tensor. The set is free again once the
+// TF tensors over all of its buffers are gone.
+class PooledBuffer : public TensorBuffer {
+ public:
+  PooledBuffer(const std::shared_ptr<OutputBufferPool::BufferSet>& set,
+               int index)
+      : TensorBuffer(set->buffers[index]),
+        m_set(set),
+        m_size(set->sizes[index]) {}
+
+  ~PooledBuffer() override { m_set->num_held--; }
+
+  size_t size() const override { return m_size; }
+  TensorBuffer* root_buffer() override { return this; }
+  void FillAllocationDescription(AllocationDescription* proto) const override {
+    proto->set_requested_bytes(m_size);
+    proto->set_allocator_name("ngraph_output_pool");
+  }
+
+ private:
+  std::shared_ptr<OutputBufferPool::BufferSet> m_set;
+  size_t m_size;
+};
+
+}  // namespace
+
+Status TensorBindings::Bind(const std::vector<Tensor>& tf_tensors,
+                            int& num_created) {
+  m_ng_tensors.resize(tf_tensors.size());
+  m_buffers.resize(tf_tensors.size(), nullptr);
+  for (int i = 0; i < tf_tensors.size(); i++) {
+    ng::Shape ng_shape(tf_tensors[i].shape().dims());
+    for (int j = 0; j < tf_tensors[i].shape().dims(); ++j) {
+      ng_shape[j] = tf_tensors[i].shape().dim_size(j);
+    }
+    ng::element::Type ng_element_type;
+    TF_RETURN_IF_ERROR(
+        TFDataTypeToNGraphElementType(tf_tensors[i].dtype(), &ng_element_type));
+
+    const void* buffer = tf_tensors[i].data();
+    if (m_ng_tensors[i] != nullptr && m_buffers[i] == buffer &&
+        m_ng_tensors[i]->get_shape() == ng_shape &&
+        m_ng_tensors[i]->get_element_type() == ng_element_type) {
+      continue;
+    }
+
+    auto backend =
+        m_backend != nullptr ? m_backend : BackendManager::GetBackend();
+    m_ng_tensors[i] =
+        backend->create_tensor(ng_element_type, ng_shape, tf_tensors[i].data());
+    m_buffers[i] = buffer;
+    num_created++;
+  }
+  return Status::OK();
+}
+
+OutputBufferPool::BufferSet::~BufferSet() {
+  for (auto buffer : buffers) {
+    port::AlignedFree(buffer);
+  }
+}
+
+bool OutputBufferPool::IsEnabled() {
+  return std::getenv("NGRAPH_TF_POOL_OUTPUTS") != nullptr;
+}
+
+Status OutputBufferPool::Acquire(const std::vector<DataType>& dtypes,
+                                 const std::vector<TensorShape>& shapes,
+                                 std::shared_ptr<BufferSet>& set,
+                                 std::vector<Tensor>& tf_tensors,
+                                 int& num_created) {
+  set = nullptr;
+  tf_tensors.clear();
+  if (dtypes.empty()) {
+    return Status::OK();
+  }
+  for (auto dtype : dtypes) {
+    if (DataTypeSize(dtype) == 0) {
+      return errors::Unimplemented("Cannot pool output buffers of type ",
+                                   DataTypeString(dtype));
+    }
+  }
+
+  {
+    std::lock_guard<std::mutex> lock(m_mutex);
+    for (auto& candidate : m_sets) {
+      if (candidate->num_held == 0) {
+        set = candidate;
+        break;
+      }
+    }
+    if (set == nullptr) {
+      if (m_sets.size() >= m_depth) {
+        return Status::OK();
+      }
+      set = std::make_shared<BufferSet>(m_backend);
+      m_sets.push_back(set);
+    }
+    // Every output gets a buffer, even an empty one, so the set stays taken
+    // until TF has dropped all the tensors made below
+    set->num_held = dtypes.size();
+  }
+
+  for (size_t i = dtypes.size(); i < set->buffers.size(); i++) {
+    port::AlignedFree(set->buffers[i]);
+  }
+  set->buffers.resize(dtypes.size(), nullptr);
+  set->sizes.resize(dtypes.size(), 0);
+  for (int i = 0; i < dtypes.size(); i++) {
+    size_t bytes =
+        std::max<size_t>(shapes[i].num_elements() * DataTypeSize(dtypes[i]), 1);
+    if (set->sizes[i] < bytes) {
+      port::AlignedFree(set->buffers[i]);
+      set->buffers[i] =
+          port::AlignedMalloc(bytes, Allocator::kAllocatorAlignment);
+      set->sizes[i] = set->buffers[i] == nullptr ? 0 : bytes;
+      if (set->buffers[i] == nullptr) {
+        set->num_held -= dtypes.size() - i;
+        tf_tensors.clear();
+        set = nullptr;
+        return errors::ResourceExhausted("Failed to allocate ", bytes,
+                                         " bytes for a pooled output buffer");
+      }
+    }
+    auto buffer = new PooledBuffer(set, i);
+    tf_tensors.emplace_back(dtypes[i], shapes[i], buffer);
+    buffer->Unref();
+  }
+  return set->bindings.Bind(tf_tensors, num_created);
+}
+
+std::unique_ptr<TensorBindingPool::Bindings> TensorBindingPool::Acquire() {
+  std::lock_guard<std::mutex> lock(m_mutex);
+  if (m_free.empty()) {
+    return std::unique_ptr<Bindings>(new Bindings(m_backend));
+  }
+  std::unique_ptr<Bindings> bindings = std::move(m_free.back());
+  m_free.pop_back();
+  return bindings;
+}
+
+void TensorBindingPool::Release(std::unique_ptr<Bindings> bindings) {
+  std::lock_guard<std::mutex> lock(m_mutex);
+  m_free.push_back(std::move(bindings));
+}
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
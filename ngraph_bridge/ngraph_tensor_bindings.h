@@ -0,0 +1,139 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+
+#ifndef NGRAPH_TF_BRIDGE_TENSOR_BINDINGS_H_
+#define NGRAPH_TF_BRIDGE_TENSOR_BINDINGS_H_
+#pragma once
+
+#include <algorithm>
+#include <atomic>
+#include <memory>
+#include <mutex>
+#include <vector>
+
+#include "tensorflow/core/framework/tensor.h"
+#include "tensorflow/core/lib/core/status.h"
+
+#include "ngraph/ngraph.hpp"
+
+#include "ngraph_bridge/ngraph_backend.h"
+
+namespace tensorflow {
+namespace ngraph_bridge {
+
+// The nGraph tensors wrapping the TF buffers of one argument list of a call.
+// They are kept across steps, and a wrapper is only created again when the
+// buffer, shape or type of its slot changes: nGraph tensors cannot be
+// pointed to another buffer.
+class TensorBindings {
+ public:
+  // The wrappers are created by backend, the currently set one if null
+  explicit TensorBindings(std::shared_ptr<Backend> backend = nullptr)
+      : m_backend(backend) {}
+
+  // Wraps tf_tensors, reusing the wrappers of the previous Bind where
+  // possible, and adds the number of wrappers created to num_created
+  Status Bind(const std::vector<Tensor>& tf_tensors, int& num_created);
+
+  const std::vector<std::shared_ptr<ngraph::runtime::Tensor>>& Get() const {
+    return m_ng_tensors;
+  }
+
+ private:
+  std::shared_ptr<Backend> m_backend;
+  std::vector<std::shared_ptr<ngraph::runtime::Tensor>> m_ng_tensors;
+  std::vector<const void*> m_buffers;
+};
+
+// Output buffers kept across steps, enabled by setting NGRAPH_TF_POOL_OUTPUTS.
+// The pool of an executable holds up to depth sets of output buffers and the
+// nGraph tensors wrapping them. A set is handed to TF as the outputs of one
+// call and goes back into the pool once TF has dropped all of its tensors, so
+// in steady state the calls write into the same few buffers and their
+// wrappers are not created again.
+class OutputBufferPool {
+ public:
+  struct BufferSet {
+    explicit BufferSet(const std::shared_ptr<Backend>& backend)
+        : bindings(backend), num_held(0) {}
+    ~BufferSet();
+    std::vector<void*> buffers;
+    std::vector<size_t> sizes;
+    TensorBindings bindings;
+    // TF tensors over the buffers that are still alive
+    std::atomic<int> num_held;
+  };
+
+  explicit OutputBufferPool(size_t depth,
+                            std::shared_ptr<Backend> backend = nullptr)
+      : m_depth(std::max(depth, size_t(1))), m_backend(backend) {}
+
+  static bool IsEnabled();
+
+  // Makes tf_tensors of the given types and shapes over a set of buffers TF
+  // no longer holds, growing the buffers that are too small, and wraps them
+  // in nGraph tensors. Leaves set null if TF still holds all the sets.
+  Status Acquire(const std::vector<DataType>& dtypes,
+                 const std::vector<TensorShape>& shapes,
+                 std::shared_ptr<BufferSet>& set,
+                 std::vector<Tensor>& tf_tensors, int& num_created);
+
+ private:
+  const size_t m_depth;
+  std::shared_ptr<Backend> m_backend;
+  std::mutex m_mutex;
+  std::vector<std::shared_ptr<BufferSet>> m_sets;
+};
+
+// The bindings of the calls into one executable. Concurrent calls each take
+// their own, so the pool grows to the number of calls in flight.
+class TensorBindingPool {
+ public:
+  struct Bindings {
+    explicit Bindings(const std::shared_ptr<Backend>& backend)
+        : inputs(backend), outputs(backend) {}
+    TensorBindings inputs;
+    TensorBindings outputs;
+  };
+
+  // The bindings wrap the buffers with tensors of backend, the currently set
+  // one if null. Output buffers are pooled if output_buffers_depth is not 0.
+  explicit TensorBindingPool(std::shared_ptr<Backend> backend = nullptr,
+                             size_t output_buffers_depth = 0)
+      : m_backend(backend) {
+    if (output_buffers_depth > 0) {
+      m_output_buffers.reset(
+          new OutputBufferPool(output_buffers_depth, backend));
+    }
+  }
+
+  std::unique_ptr<Bindings> Acquire();
+  void Release(std::unique_ptr<Bindings> bindings);
+
+  // Null unless output buffers are pooled
+  OutputBufferPool* GetOutputBuffers() { return m_output_buffers.get(); }
+
+ private:
+  std::shared_ptr<Backend> m_backend;
+  std::unique_ptr<OutputBufferPool> m_output_buffers;
+  std::mutex m_mutex;
+  std::vector<std::unique_ptr<Bindings>> m_free;
+};
+
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
+
+#endif  // NGRAPH_TF_BRIDGE_TENSOR_BINDINGS_H_
@@ -136,66 +136,6 @@ void SummarizeOp(OpKernelConstruction* ctx, std::ostream& out) {
   out << "\n";
 }
 
-//---------------------------------------------------------------------------
-//  TensorToStream
-//---------------------------------------------------------------------------
-Status TensorToStream(std::ostream& ostream, const Tensor& tensor) {
-  const char* data = tensor.tensor_data().data();
-  int64 n_elements = tensor.NumElements();
-  switch (tensor.dtype()) {
-    case DT_HALF:
-      TensorDataToStream<Eigen::half>(ostream, n_elements, data);
-      break;
-    case DT_FLOAT:
-      TensorDataToStream<float>(ostream, n_elements, data);
-      break;
-    case DT_DOUBLE:
-      TensorDataToStream<double>(ostream, n_elements, data);
-      break;
-    case DT_UINT32:
-      TensorDataToStream<uint32>(ostream, n_elements, data);
-      break;
-    case DT_INT32:
-      TensorDataToStream<int32>(ostream, n_elements, data);
-      break;
-    case DT_UINT8:
-    case DT_QUINT8:
-      TensorDataToStream<uint8>(ostream, n_elements, data);
-      break;
-    case DT_UINT16:
-    case DT_QUINT16:
-      TensorDataToStream<uint16>(ostream, n_elements, data);
-      break;
-    case DT_INT8:
-    case DT_QINT8:
-      TensorDataToStream<int8>(ostream, n_elements, data);
-      break;
-    case DT_INT16:
-    case DT_QINT16:
-      TensorDataToStream<int16>(ostream, n_elements, data);
-      break;
-    case DT_UINT64:
-      TensorDataToStream<uint64>(ostream, n_elements, data);
-      break;
-    case DT_INT64:
-      TensorDataToStream<int64>(ostream, n_elements, data);
-      break;
-    case DT_BOOL:
-      TensorDataToStream<bool>(ostream, n_elements, data);
-      break;
-    case DT_BFLOAT16:
-      return errors::Internal(
-          "TensorToStream got data type bfloat16. No compatible standard C++ "
-          "data type.");
-      break;
-    default:
-      return errors::Internal("TensorToStream got unsupported data type ",
-                              DataType_Name(tensor.dtype()));
-      break;
-  }
-  return Status::OK();
-}
-
 Status TFDataTypeToNGraphElementType(DataType tf_dt,
                                      ngraph::element::Type* ng_et) {
   switch (tf_dt) {
@@ -291,18 +231,32 @@ void print_node_histogram(const std::unordered_map<string, int>& histogram,
   }
 }
 
+// The OpenVINO backend also runs f16 networks
 const gtl::ArraySlice<DataType>& NGraphDTypes() {
+#if defined(ENABLE_OPENVINO)
+  static gtl::ArraySlice<DataType> result{
+      DT_FLOAT, DT_DOUBLE, DT_INT8,   DT_INT16,    DT_INT32,
+      DT_INT64, DT_UINT8,  DT_UINT16, DT_UINT32,   DT_UINT64,
+      DT_BOOL,  DT_QINT8,  DT_QUINT8, DT_BFLOAT16, DT_HALF};
+#else
   static gtl::ArraySlice<DataType> result{
       DT_FLOAT, DT_DOUBLE, DT_INT8,   DT_INT16,   DT_INT32,
       DT_INT64, DT_UINT8,  DT_UINT16, DT_UINT32,  DT_UINT64,
       DT_BOOL,  DT_QINT8,  DT_QUINT8, DT_BFLOAT16};
+#endif
   return result;
 }
 
 const gtl::ArraySlice<DataType>& NGraphNumericDTypes() {
+#if defined(ENABLE_OPENVINO)
+  static gtl::ArraySlice<DataType> result{
+      DT_FLOAT, DT_DOUBLE, DT_INT8,   DT_INT16,  DT_INT32,    DT_INT64,
+      DT_UINT8, DT_UINT16, DT_UINT32, DT_UINT64, DT_BFLOAT16, DT_HALF};
+#else
   static gtl::ArraySlice<DataType> result{
       DT_FLOAT, DT_DOUBLE, DT_INT8,   DT_INT16,  DT_INT32,   DT_INT64,
       DT_UINT8, DT_UINT16, DT_UINT32, DT_UINT64, DT_BFLOAT16};
+#endif
   return result;
 }
 
@@ -330,7 +284,12 @@ const gtl::ArraySlice<DataType>& NGraphSupportedQuantizedDTypes() {
 }
 
 const gtl::ArraySlice<DataType>& NGraphRealDTypes() {
+#if defined(ENABLE_OPENVINO)
+  static gtl::ArraySlice<DataType> result{DT_FLOAT, DT_DOUBLE, DT_BFLOAT16,
+                                          DT_HALF};
+#else
   static gtl::ArraySlice<DataType> result{DT_FLOAT, DT_DOUBLE, DT_BFLOAT16};
+#endif
   return result;
 }
 
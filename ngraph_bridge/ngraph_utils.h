@@ -271,17 +271,6 @@ std::ostream& DumpNGTensor(std::ostream& s, const string& name,
   return s;
 }
 
-template <typename T>
-static void TensorDataToStream(std::ostream& ostream, int64 n_elements,
-                               const char* data) {
-  const T* data_T = reinterpret_cast<const T*>(data);
-  for (size_t i = 0; i < n_elements; i++) {
-    ostream << data_T[i] << ",";
-  }
-}
-
-Status TensorToStream(std::ostream& ostream, const Tensor& tensor);
-
 // Converts a TensorFlow DataType to an nGraph element::Type. Returns
 // errors::Unimplemented if the element type is not supported by nGraph
 // Core. Otherwise returns Status::OK().
@@ -23,6 +23,7 @@ import os
 import sys
 import time
 import getpass
+from concurrent.futures import ThreadPoolExecutor
 from platform import system
 
 import numpy as np
@@ -47,7 +48,8 @@ __all__ = [
     'is_logging_placement', '__version__', 'cxx11_abi_flag'
     'is_grappler_enabled', 'update_config',
     'set_disabled_ops', 'get_disabled_ops',
-    'is_openvino_enabled',
+    'is_openvino_enabled', 'get_cache_stats', 'reset_cache_stats',
+    'get_async_compile_stats', 'reset_async_compile_stats', 'warmup',
 ]
 
 ext = 'dylib' if system() == 'Darwin' else 'so'
@@ -128,6 +130,8 @@ if ngraph_classic_loaded:
     ngraph_bridge_lib.ngraph_set_disabled_ops.argtypes = [ctypes.c_char_p]
     ngraph_bridge_lib.ngraph_get_disabled_ops.restype = ctypes.c_char_p
     ngraph_bridge_lib.ngraph_tf_is_openvino_enabled.restype = ctypes.c_bool
+    ngraph_bridge_lib.ngraph_get_cache_stats.argtypes = [ctypes.POINTER(ctypes.c_int64)] * 4
+    ngraph_bridge_lib.ngraph_get_async_compile_stats.argtypes = [ctypes.POINTER(ctypes.c_int64)] * 3
 
     def enable():
         ngraph_bridge_lib.ngraph_enable()
@@ -218,6 +222,93 @@ if ngraph_classic_loaded:
     def get_disabled_ops():
         return ngraph_bridge_lib.ngraph_get_disabled_ops()
 
+    def get_cache_stats():
+        hits = ctypes.c_int64()
+        misses = ctypes.c_int64()
+        evictions = ctypes.c_int64()
+        compile_time_saved_ms = ctypes.c_int64()
+        ngraph_bridge_lib.ngraph_get_cache_stats(
+            ctypes.byref(hits), ctypes.byref(misses), ctypes.byref(evictions),
+            ctypes.byref(compile_time_saved_ms))
+        return {
+            'hits': hits.value,
+            'misses': misses.value,
+            'evictions': evictions.value,
+            'compile_time_saved_ms': compile_time_saved_ms.value,
+        }
+
+    def reset_cache_stats():
+        ngraph_bridge_lib.ngraph_reset_cache_stats()
+
+    def get_async_compile_stats():
+        fallbacks = ctypes.c_int64()
+        queue_depth = ctypes.c_int64()
+        compiles = ctypes.c_int64()
+        ngraph_bridge_lib.ngraph_get_async_compile_stats(
+            ctypes.byref(fallbacks), ctypes.byref(queue_depth),
+            ctypes.byref(compiles))
+        return {
+            'fallbacks': fallbacks.value,
+            'queue_depth': queue_depth.value,
+            'compiles': compiles.value,
+        }
+
+    def reset_async_compile_stats():
+        ngraph_bridge_lib.ngraph_reset_async_compile_stats()
+
+    def warmup(session, feeds_shape_list, fetches=None, parallelism=1):
+        """Compiles the executables of the encapsulates of session's graph
+        for every listed set of input shapes, so that the first requests
+        do not wait for them. The graph is run, not rewritten.
+
+        feeds_shape_list holds one dict per shape set, mapping placeholders
+        (or their names) to a shape, for which zeros are fed, or to a numpy
+        array for the inputs whose value and not only shape selects the
+        executable, like the shape argument of a Reshape. fetches default
+        to the stateless ops whose outputs nothing consumes. Up to
+        parallelism shape sets are run at once.
+
+        Returns the number of executables compiled.
+        """
+        graph = session.graph
+        if fetches is None:
+            consumed = set(
+                tensor.op for op in graph.get_operations()
+                for tensor in op.inputs)
+            fetches = [
+                op for op in graph.get_operations()
+                if op.outputs and op not in consumed and
+                not op.op_def.is_stateful
+            ]
+
+        def make_feeds(shapes):
+            feeds = {}
+            for placeholder, shape_or_value in shapes.items():
+                if isinstance(placeholder, str):
+                    if ':' not in placeholder:
+                        placeholder += ':0'
+                    placeholder = graph.get_tensor_by_name(placeholder)
+                if isinstance(shape_or_value, np.ndarray):
+                    feeds[placeholder] = shape_or_value
+                else:
+                    feeds[placeholder] = np.zeros(
+                        shape_or_value,
+                        dtype=placeholder.dtype.as_numpy_dtype)
+            return feeds
+
+        misses = get_cache_stats()['misses']
+        with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as pool:
+            runs = [
+                pool.submit(session.run, fetches, make_feeds(shapes))
+                for shapes in feeds_shape_list
+            ]
+            for run in runs:
+                run.result()
+        # In the asynchronous compile mode the runs only queue the compiles
+        while get_async_compile_stats()['queue_depth'] > 0:
+            time.sleep(0.01)
+        return get_cache_stats()['misses'] - misses
+
     __version__ = \
     "nGraph bridge version: " + str(ngraph_bridge_lib.ngraph_tf_version()) + "\n" + \
     "nGraph version used for this build: " + str(ngraph_bridge_lib.ngraph_lib_version()) + "\n" + \
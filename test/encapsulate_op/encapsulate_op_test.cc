@@ -14,14 +14,24 @@
  * limitations under the License.
  *******************************************************************************/
 
+#include <atomic>
+#include <thread>
+
 #include "gtest/gtest.h"
 #include "tensorflow/core/graph/node_builder.h"
+#include "tensorflow/core/lib/gtl/cleanup.h"
+#include "tensorflow/core/platform/env.h"
 
 #include "ngraph_bridge/default_opset.h"
+#if defined(ENABLE_OPENVINO)
+#include "ngraph_bridge/ie_backend.h"
+#endif
 #include "ngraph_bridge/ngraph_backend_manager.h"
 #include "ngraph_bridge/ngraph_encapsulate_impl.h"
 #include "ngraph_bridge/ngraph_encapsulate_op.h"
 #include "ngraph_bridge/ngraph_executable.h"
+#include "ngraph_bridge/ngraph_shared_exec_cache.h"
+#include "ngraph_bridge/ngraph_tensor_bindings.h"
 #include "ngraph_bridge/ngraph_utils.h"
 #include "test/test_utilities.h"
 
@@ -64,10 +74,151 @@ TEST(EncapsulateOp, ComputeSignature) {
       static_input_map[i] = &input_tensor;
     }
   }
-  std::stringstream signature_ss;
+  Signature signature;
+  ASSERT_OK(ng_encap_impl.ComputeSignature(input_tensors, input_shapes,
+                                           static_input_map, signature));
+
+  // Same dtypes and shapes give the same signature, regardless of the values
+  // of non-static inputs
+  std::vector<tensorflow::TensorShape> same_shapes;
+  std::vector<tensorflow::Tensor> same_tensors;
+  for (auto const& input_tensor : input_tensors) {
+    Tensor input_data(DT_FLOAT, input_tensor.shape());
+    AssignInputValuesRandom<float>(input_data, -10.0, 20.0f);
+    same_tensors.push_back(input_data);
+  }
+  Signature same_signature;
+  ASSERT_OK(ng_encap_impl.ComputeSignature(same_tensors, same_shapes,
+                                           static_input_map, same_signature));
+  ASSERT_EQ(signature, same_signature);
+
+  // A different shape gives a different signature
+  std::vector<tensorflow::TensorShape> other_shapes;
+  std::vector<tensorflow::Tensor> other_tensors(input_tensors);
+  other_tensors[1] = Tensor(DT_FLOAT, TensorShape({3}));
+  Signature other_signature;
+  ASSERT_OK(ng_encap_impl.ComputeSignature(other_tensors, other_shapes,
+                                           static_input_map, other_signature));
+  ASSERT_NE(signature, other_signature);
+
+  ASSERT_EQ(NGraphEncapsulateImpl::ShapeSignatureString(same_shapes),
+            "0,;2,;6,10,;10,10,10,;/");
+}
+
+// Test: The values of static inputs are part of the signature
+TEST(EncapsulateOp, ComputeSignatureStaticInput) {
+  NGraphEncapsulateImpl ng_encap_impl;
+  ng_encap_impl.ResizeStaticInputVector(2);
+  ng_encap_impl.SetStaticInputVector(0, false);
+  ng_encap_impl.SetStaticInputVector(1, true);
+
+  Tensor data(DT_FLOAT, TensorShape({2, 3}));
+  AssignInputValuesRandom<float>(data, -10.0, 20.0f);
+  Tensor paddings(DT_INT32, TensorShape({2, 2}));
+  AssignInputValues<int32>(paddings, {0, 1, 1, 0});
+  Tensor other_paddings(DT_INT32, TensorShape({2, 2}));
+  AssignInputValues<int32>(other_paddings, {1, 0, 0, 1});
+
+  std::vector<Tensor> input_tensors{data, paddings};
+  std::vector<Tensor> other_input_tensors{data, other_paddings};
+
+  std::vector<tensorflow::TensorShape> input_shapes;
+  std::vector<const Tensor*> static_input_map;
+  Signature signature;
   ASSERT_OK(ng_encap_impl.ComputeSignature(input_tensors, input_shapes,
-                                           static_input_map, signature_ss));
-  ASSERT_EQ(signature_ss.str(), "0,;2,;6,10,;10,10,10,;/");
+                                           static_input_map, signature));
+  ASSERT_EQ(static_input_map[0], nullptr);
+  ASSERT_EQ(static_input_map[1], &input_tensors[1]);
+
+  input_shapes.clear();
+  Signature other_signature;
+  ASSERT_OK(ng_encap_impl.ComputeSignature(other_input_tensors, input_shapes,
+                                           static_input_map, other_signature));
+  ASSERT_NE(signature, other_signature);
+
+  // The inputs recorded for a cache entry only match the same static values
+  SignatureInputs signature_inputs(input_tensors,
+                                   ng_encap_impl.GetStaticInputVector());
+  ASSERT_TRUE(signature_inputs.Matches(input_tensors));
+  ASSERT_FALSE(signature_inputs.Matches(other_input_tensors));
+}
+
+// Test: Shape generic signatures only depend on the rank of the non-static
+// inputs
+TEST(EncapsulateOp, ComputeSignatureShapeGeneric) {
+  std::vector<bool> input_is_static{false, true};
+  Tensor data(DT_FLOAT, TensorShape({2, 3}));
+  Tensor other_data(DT_FLOAT, TensorShape({4, 5}));
+  Tensor other_rank_data(DT_FLOAT, TensorShape({6}));
+  Tensor axis(DT_INT32, TensorShape({1}));
+  AssignInputValues<int32>(axis, {1});
+  Tensor other_axis(DT_INT32, TensorShape({2}));
+  AssignInputValues<int32>(other_axis, {1, 1});
+
+  std::vector<Tensor> input_tensors{data, axis};
+  std::vector<Tensor> other_shape_tensors{other_data, axis};
+  std::vector<Tensor> other_rank_tensors{other_rank_data, axis};
+  std::vector<Tensor> other_static_tensors{data, other_axis};
+
+  Signature signature, other_shape, other_rank, other_static;
+  ASSERT_OK(
+      ComputeInputSignature(input_tensors, input_is_static, signature, true));
+  ASSERT_OK(ComputeInputSignature(other_shape_tensors, input_is_static,
+                                  other_shape, true));
+  ASSERT_OK(ComputeInputSignature(other_rank_tensors, input_is_static,
+                                  other_rank, true));
+  ASSERT_OK(ComputeInputSignature(other_static_tensors, input_is_static,
+                                  other_static, true));
+  ASSERT_EQ(signature, other_shape);
+  ASSERT_NE(signature, other_rank);
+  ASSERT_NE(signature, other_static);
+
+  SignatureInputs signature_inputs(input_tensors, input_is_static, true);
+  ASSERT_TRUE(signature_inputs.Matches(other_shape_tensors));
+  ASSERT_FALSE(signature_inputs.Matches(other_rank_tensors));
+  ASSERT_FALSE(signature_inputs.Matches(other_static_tensors));
+
+  // Without it the shapes have to match
+  ASSERT_FALSE(SignatureInputs(input_tensors, input_is_static)
+                   .Matches(other_shape_tensors));
+}
+
+// Test: The signature covers every byte of a static input, however large,
+// and none of the values of the other inputs
+TEST(EncapsulateOp, ComputeSignatureStaticInputValues) {
+  NGraphEncapsulateImpl ng_encap_impl;
+  ng_encap_impl.ResizeStaticInputVector(2);
+  ng_encap_impl.SetStaticInputVector(0, false);
+  ng_encap_impl.SetStaticInputVector(1, true);
+
+  auto compute_signature = [&ng_encap_impl](const Tensor& data,
+                                            const Tensor& indices) {
+    std::vector<tensorflow::TensorShape> input_shapes;
+    std::vector<const Tensor*> static_input_map;
+    Signature signature;
+    EXPECT_EQ(ng_encap_impl.ComputeSignature({data, indices}, input_shapes,
+                                             static_input_map, signature),
+              Status::OK());
+    return signature;
+  };
+
+  for (int64 num_elements : {1, 1 << 8, 1 << 20}) {
+    Tensor data(DT_FLOAT, TensorShape({2, 3}));
+    AssignInputValues<float>(data, 1.0f);
+    Tensor indices(DT_INT32, TensorShape({num_elements}));
+    AssignInputValues<int32>(indices, 7);
+    Signature signature = compute_signature(data, indices);
+
+    Tensor other_data(DT_FLOAT, TensorShape({2, 3}));
+    AssignInputValues<float>(other_data, 2.0f);
+    ASSERT_EQ(compute_signature(other_data, indices), signature);
+
+    // Only the last element differs
+    Tensor other_indices(DT_INT32, TensorShape({num_elements}));
+    AssignInputValues<int32>(other_indices, 7);
+    other_indices.flat<int32>()(num_elements - 1) = 8;
+    ASSERT_NE(compute_signature(data, other_indices), signature);
+  }
 }
 
 // Test: Create backend and get ngraph executable
@@ -102,8 +253,180 @@ TEST(EncapsulateOp, GetNgExecutable) {
   }
 
   std::shared_ptr<Executable> ng_exec;
-  ASSERT_OK(ng_encap_impl.GetNgExecutable(input_tensors, input_shapes,
-                                          static_input_map, ng_exec));
+  std::shared_ptr<CallLimiter> ng_exec_call_limiter;
+  std::shared_ptr<TensorBindingPool> ng_exec_bindings;
+  std::shared_ptr<TrivialOutputs> ng_exec_trivial_outputs;
+  ASSERT_OK(ng_encap_impl.GetNgExecutable(
+      input_tensors, input_shapes, static_input_map, ng_exec,
+      ng_exec_call_limiter, ng_exec_bindings, ng_exec_trivial_outputs));
+  ASSERT_NE(ng_exec_call_limiter, nullptr);
+}
+
+// Test: Threads missing on the same signature compile it only once
+TEST(EncapsulateOp, GetNgExecutableMultiThread) {
+  NGraphEncapsulateImpl ng_encap_impl;
+  std::vector<tensorflow::Tensor> input_tensors;
+  for (auto const& shape : {TensorShape({2}), TensorShape({6, 10})}) {
+    Tensor input_data(DT_FLOAT, shape);
+    AssignInputValuesRandom<float>(input_data, -10.0, 20.0f);
+    input_tensors.push_back(input_data);
+  }
+  ng_encap_impl.ResizeStaticInputVector(input_tensors.size());
+
+  auto misses = NGraphEncapsulateImpl::GetExecCacheStats().misses.load();
+  const int num_threads = 8;
+  std::vector<std::shared_ptr<Executable>> ng_execs(num_threads);
+  std::vector<Status> statuses(num_threads);
+  std::vector<std::thread> threads;
+  for (int i = 0; i < num_threads; i++) {
+    threads.emplace_back([&, i]() {
+      std::vector<tensorflow::TensorShape> input_shapes;
+      std::vector<const Tensor*> static_input_map;
+      std::shared_ptr<CallLimiter> ng_exec_call_limiter;
+      std::shared_ptr<TensorBindingPool> ng_exec_bindings;
+      std::shared_ptr<TrivialOutputs> ng_exec_trivial_outputs;
+      statuses[i] = ng_encap_impl.GetNgExecutable(
+          input_tensors, input_shapes, static_input_map, ng_execs[i],
+          ng_exec_call_limiter, ng_exec_bindings, ng_exec_trivial_outputs);
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+
+  for (int i = 0; i < num_threads; i++) {
+    ASSERT_OK(statuses[i]);
+    ASSERT_EQ(ng_execs[i], ng_execs[0]);
+  }
+  ASSERT_EQ(NGraphEncapsulateImpl::GetExecCacheStats().misses.load(),
+            misses + 1);
+  ASSERT_EQ(ng_encap_impl.GetNgExecCacheSize(), 1);
+}
+
+// Test: A miss returns without an executable and compiles it in the
+// background
+TEST(EncapsulateOp, GetNgExecutableAsync) {
+  NGraphEncapsulateImpl ng_encap_impl;
+  std::vector<tensorflow::Tensor> input_tensors;
+  Tensor input_data(DT_FLOAT, TensorShape({2}));
+  AssignInputValuesRandom<float>(input_data, -10.0, 20.0f);
+  input_tensors.push_back(input_data);
+  ng_encap_impl.ResizeStaticInputVector(input_tensors.size());
+
+  std::vector<tensorflow::TensorShape> input_shapes;
+  std::vector<const Tensor*> static_input_map;
+  std::shared_ptr<Executable> ng_exec;
+  std::shared_ptr<CallLimiter> ng_exec_call_limiter;
+  std::shared_ptr<TensorBindingPool> ng_exec_bindings;
+  std::shared_ptr<TrivialOutputs> ng_exec_trivial_outputs;
+  ASSERT_OK(ng_encap_impl.GetNgExecutableAsync(
+      input_tensors, input_shapes, static_input_map, ng_exec,
+      ng_exec_call_limiter, ng_exec_bindings, ng_exec_trivial_outputs));
+  ASSERT_EQ(ng_exec, nullptr);
+
+  ng_encap_impl.WaitForAsyncCompiles();
+  ASSERT_EQ(ng_encap_impl.GetNgExecCacheSize(), 1);
+  input_shapes.clear();
+  ASSERT_OK(ng_encap_impl.GetNgExecutableAsync(
+      input_tensors, input_shapes, static_input_map, ng_exec,
+      ng_exec_call_limiter, ng_exec_bindings, ng_exec_trivial_outputs));
+  ASSERT_NE(ng_exec, nullptr);
+  ASSERT_NE(ng_exec_call_limiter, nullptr);
+}
+
+// Test: A failed background compile is returned once, the step after that
+// compiles again
+TEST(EncapsulateOp, GetNgExecutableAsyncError) {
+  // There is no translation for Unique
+  Graph g(OpRegistry::Global());
+  Node* arg;
+  ASSERT_OK(NodeBuilder("arg", "_Arg")
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&g, &arg));
+  Node* unique;
+  ASSERT_OK(NodeBuilder("unique", "Unique")
+                .Input(arg, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("out_idx", DT_INT32)
+                .Finalize(&g, &unique));
+  Node* ret;
+  ASSERT_OK(NodeBuilder("ret", "_Retval")
+                .Input(unique, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&g, &ret));
+  GraphDef graph_def;
+  g.ToGraphDef(&graph_def);
+
+  NGraphEncapsulateImpl ng_encap_impl;
+  ng_encap_impl.SetGraphDef(&graph_def);
+  std::vector<tensorflow::Tensor> input_tensors;
+  Tensor input_data(DT_FLOAT, TensorShape({4}));
+  AssignInputValuesRandom<float>(input_data, -10.0, 20.0f);
+  input_tensors.push_back(input_data);
+  ng_encap_impl.ResizeStaticInputVector(input_tensors.size());
+  ng_encap_impl.SetStaticInputVector(0, false);
+
+  auto get_executable = [&]() {
+    std::vector<tensorflow::TensorShape> input_shapes;
+    std::vector<const Tensor*> static_input_map;
+    std::shared_ptr<Executable> ng_exec;
+    std::shared_ptr<CallLimiter> ng_exec_call_limiter;
+    std::shared_ptr<TensorBindingPool> ng_exec_bindings;
+    std::shared_ptr<TrivialOutputs> ng_exec_trivial_outputs;
+    return ng_encap_impl.GetNgExecutableAsync(
+        input_tensors, input_shapes, static_input_map, ng_exec,
+        ng_exec_call_limiter, ng_exec_bindings, ng_exec_trivial_outputs);
+  };
+  ASSERT_OK(get_executable());
+  ng_encap_impl.WaitForAsyncCompiles();
+
+  auto misses = NGraphEncapsulateImpl::GetExecCacheStats().misses.load();
+  ASSERT_NOT_OK(get_executable());
+  ng_encap_impl.WaitForAsyncCompiles();
+  ASSERT_EQ(NGraphEncapsulateImpl::GetExecCacheStats().misses.load(), misses);
+
+  ASSERT_OK(get_executable());
+  ng_encap_impl.WaitForAsyncCompiles();
+  ASSERT_EQ(NGraphEncapsulateImpl::GetExecCacheStats().misses.load(),
+            misses + 1);
+  ASSERT_NOT_OK(get_executable());
+
+  // The step still runs with the TF kernels
+  std::vector<Tensor> tf_output_tensors;
+  ASSERT_OK(
+      ng_encap_impl.ExecuteTFGraph(input_tensors, nullptr, tf_output_tensors));
+  ASSERT_EQ(tf_output_tensors.size(), 1);
+  ASSERT_EQ(tf_output_tensors[0].dtype(), DT_FLOAT);
+}
+
+// Test: No more than the allowed number of threads hold a CallLimiter
+TEST(EncapsulateOp, CallLimiter) {
+  CallLimiter limiter(2);
+  ASSERT_EQ(limiter.GetMaxCalls(), 2);
+  std::atomic<int> active{0};
+  std::atomic<int> max_active{0};
+  std::vector<std::thread> threads;
+  for (int i = 0; i < 8; i++) {
+    threads.emplace_back([&]() {
+      for (int j = 0; j < 100; j++) {
+        std::lock_guard<CallLimiter> lock(limiter);
+        int now_active = ++active;
+        int seen = max_active.load();
+        while (now_active > seen &&
+               !max_active.compare_exchange_weak(seen, now_active)) {
+        }
+        std::this_thread::yield();
+        active--;
+      }
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  ASSERT_LE(max_active.load(), 2);
+  ASSERT_EQ(CallLimiter(0).GetMaxCalls(), 1);
 }
 
 // Test: Allocating ngraph tensors
@@ -135,6 +458,394 @@ TEST(EncapsulateOp, AllocateNGTensors) {
   std::vector<shared_ptr<ng::runtime::Tensor>> ng_inputs;
   ASSERT_OK(ng_encap_impl.AllocateNGTensors(input_tensors, ng_inputs));
 }
+
+// Test: Tensor wrappers are only created again for buffers that changed
+TEST(EncapsulateOp, TensorBindings) {
+  Tensor a(DT_FLOAT, TensorShape({2, 3}));
+  Tensor b(DT_FLOAT, TensorShape({4}));
+  AssignInputValuesRandom<float>(a, -10.0, 20.0f);
+  AssignInputValuesRandom<float>(b, -10.0, 20.0f);
+
+  TensorBindingPool pool;
+  auto bindings = pool.Acquire();
+  int num_created = 0;
+  ASSERT_OK(bindings->inputs.Bind({a, b}, num_created));
+  ASSERT_EQ(num_created, 2);
+  auto first_a = bindings->inputs.Get()[0];
+
+  // Same buffers
+  num_created = 0;
+  ASSERT_OK(bindings->inputs.Bind({a, b}, num_created));
+  ASSERT_EQ(num_created, 0);
+  ASSERT_EQ(bindings->inputs.Get()[0], first_a);
+
+  // A new buffer in the second slot
+  Tensor c(DT_FLOAT, TensorShape({4}));
+  num_created = 0;
+  ASSERT_OK(bindings->inputs.Bind({a, c}, num_created));
+  ASSERT_EQ(num_created, 1);
+  ASSERT_EQ(bindings->inputs.Get()[0], first_a);
+
+  // Released bindings are handed out again, with their wrappers
+  pool.Release(std::move(bindings));
+  bindings = pool.Acquire();
+  num_created = 0;
+  ASSERT_OK(bindings->inputs.Bind({a, c}, num_created));
+  ASSERT_EQ(num_created, 0);
+
+  // Concurrent calls get bindings of their own
+  auto other_bindings = pool.Acquire();
+  ASSERT_NE(other_bindings.get(), bindings.get());
+  ASSERT_TRUE(other_bindings->inputs.Get().empty());
+}
+
+// Test: Pooled output buffers are reused, with their wrappers, once TF has
+// dropped them
+TEST(EncapsulateOp, OutputBufferPool) {
+  OutputBufferPool pool(2);
+  std::vector<DataType> dtypes{DT_FLOAT, DT_INT32};
+  std::vector<TensorShape> shapes{TensorShape({2, 3}), TensorShape({4})};
+
+  std::shared_ptr<OutputBufferPool::BufferSet> set1, set2, set3;
+  std::vector<Tensor> outputs1, outputs2, outputs3;
+  int num_created = 0;
+  ASSERT_OK(pool.Acquire(dtypes, shapes, set1, outputs1, num_created));
+  ASSERT_NE(set1, nullptr);
+  ASSERT_EQ(num_created, 2);
+  ASSERT_EQ(outputs1[0].shape(), shapes[0]);
+  ASSERT_EQ(outputs1[1].dtype(), DT_INT32);
+  ASSERT_OK(pool.Acquire(dtypes, shapes, set2, outputs2, num_created));
+  ASSERT_NE(set2, nullptr);
+  ASSERT_NE(set2, set1);
+
+  // Both sets are still held
+  ASSERT_OK(pool.Acquire(dtypes, shapes, set3, outputs3, num_created));
+  ASSERT_EQ(set3, nullptr);
+  Tensor held = outputs1[0];
+  outputs1.clear();
+  ASSERT_OK(pool.Acquire(dtypes, shapes, set3, outputs3, num_created));
+  ASSERT_EQ(set3, nullptr);
+
+  // Once all its tensors are gone the set comes back with the same buffers
+  const void* data = held.data();
+  auto wrapper = set1->bindings.Get()[0];
+  held = Tensor();
+  num_created = 0;
+  ASSERT_OK(pool.Acquire(dtypes, shapes, set3, outputs3, num_created));
+  ASSERT_EQ(set3, set1);
+  ASSERT_EQ(num_created, 0);
+  ASSERT_EQ(outputs3[0].data(), data);
+  ASSERT_EQ(set3->bindings.Get()[0], wrapper);
+}
+
+// Test: Identical functions hash the same, whatever their node names
+TEST(EncapsulateOp, HashFunction) {
+  auto make_function = [](bool multiply, float weight,
+                          const string& friendly_name) {
+    ngraph::Shape shape{100};
+    auto A = make_shared<opset::Parameter>(ngraph::element::f32, shape);
+    auto B = make_shared<opset::Constant>(ngraph::element::f32, shape,
+                                          vector<float>(100, weight));
+    shared_ptr<ngraph::Node> op;
+    if (multiply) {
+      op = make_shared<opset::Multiply>(A, B);
+    } else {
+      op = make_shared<opset::Add>(A, B);
+    }
+    op->set_friendly_name(friendly_name + "/op");
+    auto f = make_shared<ngraph::Function>(op, ngraph::ParameterVector{A});
+    f->set_friendly_name(friendly_name);
+    return f;
+  };
+  auto hash_function = [](const shared_ptr<ngraph::Function>& f) {
+    Signature hash, check;
+    EXPECT_EQ(HashFunction(*f, hash, check), Status::OK());
+    // The two hashes are independent
+    EXPECT_NE(hash, check);
+    return make_pair(hash, check);
+  };
+
+  auto add_0 = hash_function(make_function(false, 1, "ngraph_cluster_0"));
+  auto add_1 = hash_function(make_function(false, 1, "ngraph_cluster_1"));
+  auto mul_0 = hash_function(make_function(true, 1, "ngraph_cluster_0"));
+  auto add_2 = hash_function(make_function(false, 2, "ngraph_cluster_0"));
+  ASSERT_EQ(add_0.first, add_1.first);
+  ASSERT_EQ(add_0.second, add_1.second);
+  ASSERT_NE(add_0.first, mul_0.first);
+  ASSERT_NE(add_0.second, mul_0.second);
+  // The weights are part of the hash
+  ASSERT_NE(add_0.first, add_2.first);
+  ASSERT_NE(add_0.second, add_2.second);
+}
+
+// Test: Shared executables are refcounted
+TEST(EncapsulateOp, SharedExecCache) {
+  Signature hash, function;
+  hash.lo = 1;
+  function.lo = 2;
+  SharedExecCache::Key key(hash, "SharedExecCacheTest");
+  SharedExecCache::Item item;
+  ASSERT_FALSE(SharedExecCache::Acquire(key, function, item));
+
+  SharedExecCache::Item first;
+  first.call_limiter = make_shared<CallLimiter>(1);
+  first.compile_time_ms = 10;
+  ASSERT_TRUE(SharedExecCache::Publish(key, function, first));
+
+  // Racing compile of the same function gets the published one back
+  SharedExecCache::Item second;
+  second.call_limiter = make_shared<CallLimiter>(1);
+  ASSERT_TRUE(SharedExecCache::Publish(key, function, second));
+  ASSERT_EQ(second.call_limiter, first.call_limiter);
+  ASSERT_EQ(second.compile_time_ms, 10);
+
+  // A different function with the same key is not shared
+  Signature colliding_function = function;
+  colliding_function.lo++;
+  SharedExecCache::Item colliding;
+  colliding.call_limiter = make_shared<CallLimiter>(1);
+  ASSERT_FALSE(SharedExecCache::Acquire(key, colliding_function, item));
+  ASSERT_FALSE(SharedExecCache::Publish(key, colliding_function, colliding));
+  ASSERT_NE(colliding.call_limiter, first.call_limiter);
+
+  ASSERT_TRUE(SharedExecCache::Acquire(key, function, item));
+  ASSERT_EQ(item.call_limiter, first.call_limiter);
+
+  ASSERT_FALSE(SharedExecCache::Release(key));
+  ASSERT_FALSE(SharedExecCache::Release(key));
+  ASSERT_TRUE(SharedExecCache::Release(key));
+  ASSERT_FALSE(SharedExecCache::Acquire(key, function, item));
+}
+
+// Test: An executable loaded from the persistent cache is keyed into the
+// shared cache as the one compiled from the same cluster
+TEST(EncapsulateOp, PersistedSharedExecutable) {
+  auto env_map = StoreEnv({"NGRAPH_TF_PERSISTENT_CACHE_DIR",
+                           "NGRAPH_TF_DISABLE_SHARED_EXEC_CACHE"});
+  const string directory =
+      ::testing::TempDir() + "/ngraph_persisted_shared_exec_test";
+  SetEnvVariable("NGRAPH_TF_PERSISTENT_CACHE_DIR", directory);
+  UnsetEnvVariable("NGRAPH_TF_DISABLE_SHARED_EXEC_CACHE");
+
+  // The constant is rewritten by the compile when weights are shared
+  Graph g(OpRegistry::Global());
+  Node* arg;
+  ASSERT_OK(NodeBuilder("arg", "_Arg")
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&g, &arg));
+  Tensor weights(DT_FLOAT, TensorShape({2, 3}));
+  AssignInputValuesRandom<float>(weights, -10.0, 20.0f);
+  Node* weights_node;
+  ASSERT_OK(NodeBuilder("weights", "Const")
+                .Attr("dtype", DT_FLOAT)
+                .Attr("value", weights)
+                .Finalize(&g, &weights_node));
+  Node* mul;
+  ASSERT_OK(NodeBuilder("mul", "Mul")
+                .Input(arg, 0)
+                .Input(weights_node, 0)
+                .Attr("T", DT_FLOAT)
+                .Finalize(&g, &mul));
+  Node* ret;
+  ASSERT_OK(NodeBuilder("ret", "_Retval")
+                .Input(mul, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&g, &ret));
+  GraphDef graph_def;
+  g.ToGraphDef(&graph_def);
+
+  std::vector<tensorflow::Tensor> input_tensors;
+  Tensor input_data(DT_FLOAT, TensorShape({2, 3}));
+  AssignInputValuesRandom<float>(input_data, -10.0, 20.0f);
+  input_tensors.push_back(input_data);
+  auto get_executable = [&](NGraphEncapsulateImpl& ng_encap_impl,
+                            std::shared_ptr<Executable>& ng_exec) {
+    ng_encap_impl.SetGraphDef(&graph_def);
+    ng_encap_impl.ResizeStaticInputVector(input_tensors.size());
+    ng_encap_impl.SetStaticInputVector(0, false);
+    std::vector<tensorflow::TensorShape> input_shapes;
+    std::vector<const Tensor*> static_input_map;
+    std::shared_ptr<CallLimiter> ng_exec_call_limiter;
+    std::shared_ptr<TensorBindingPool> ng_exec_bindings;
+    std::shared_ptr<TrivialOutputs> ng_exec_trivial_outputs;
+    return ng_encap_impl.GetNgExecutable(
+        input_tensors, input_shapes, static_input_map, ng_exec,
+        ng_exec_call_limiter, ng_exec_bindings, ng_exec_trivial_outputs);
+  };
+
+  NGraphEncapsulateImpl compiling_impl;
+  std::shared_ptr<Executable> compiled_exec;
+  ASSERT_OK(get_executable(compiling_impl, compiled_exec));
+
+  std::vector<string> entries;
+  Env::Default()->GetChildren(directory, &entries).IgnoreError();
+  // Backends that cannot save their executables persist nothing
+  if (!entries.empty()) {
+    NGraphEncapsulateImpl loading_impl;
+    std::shared_ptr<Executable> loaded_exec;
+    ASSERT_OK(get_executable(loading_impl, loaded_exec));
+    ASSERT_EQ(loaded_exec, compiled_exec);
+  }
+
+  int64 undeleted_files, undeleted_dirs;
+  Env::Default()
+      ->DeleteRecursively(directory, &undeleted_files, &undeleted_dirs)
+      .IgnoreError();
+  RestoreEnv(env_map);
+}
+
+// Test: The memory budget is charged the weights and buffers of an
+// executable, whatever else the process allocates while compiling it
+TEST(EncapsulateOp, BudgetCharge) {
+  auto env_map = StoreEnv({"NGRAPH_TF_DISABLE_SHARED_EXEC_CACHE"});
+  SetEnvVariable("NGRAPH_TF_DISABLE_SHARED_EXEC_CACHE", "1");
+  auto budget_bytes = ExecCacheBudget::GetBudgetBytes();
+  ExecCacheBudget::SetBudgetBytes(int64{1} << 30);
+
+  const TensorShape shape({64, 64});
+  const int64 tensor_bytes = shape.num_elements() * sizeof(float);
+  Graph g(OpRegistry::Global());
+  Node* arg;
+  ASSERT_OK(NodeBuilder("arg", "_Arg")
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&g, &arg));
+  Tensor weights(DT_FLOAT, shape);
+  AssignInputValuesRandom<float>(weights, -10.0, 20.0f);
+  Node* weights_node;
+  ASSERT_OK(NodeBuilder("weights", "Const")
+                .Attr("dtype", DT_FLOAT)
+                .Attr("value", weights)
+                .Finalize(&g, &weights_node));
+  Node* mul;
+  ASSERT_OK(NodeBuilder("mul", "Mul")
+                .Input(arg, 0)
+                .Input(weights_node, 0)
+                .Attr("T", DT_FLOAT)
+                .Finalize(&g, &mul));
+  Node* ret;
+  ASSERT_OK(NodeBuilder("ret", "_Retval")
+                .Input(mul, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&g, &ret));
+  GraphDef graph_def;
+  g.ToGraphDef(&graph_def);
+
+  NGraphEncapsulateImpl ng_encap_impl;
+  ng_encap_impl.SetGraphDef(&graph_def);
+  std::vector<tensorflow::Tensor> input_tensors;
+  Tensor input_data(DT_FLOAT, shape);
+  AssignInputValuesRandom<float>(input_data, -10.0, 20.0f);
+  input_tensors.push_back(input_data);
+  ng_encap_impl.ResizeStaticInputVector(input_tensors.size());
+  ng_encap_impl.SetStaticInputVector(0, false);
+
+  auto charged_bytes = ExecCacheBudget::GetChargedBytes();
+  std::vector<tensorflow::TensorShape> input_shapes;
+  std::vector<const Tensor*> static_input_map;
+  std::shared_ptr<Executable> ng_exec;
+  std::shared_ptr<CallLimiter> ng_exec_call_limiter;
+  std::shared_ptr<TensorBindingPool> ng_exec_bindings;
+  std::shared_ptr<TrivialOutputs> ng_exec_trivial_outputs;
+  ASSERT_OK(ng_encap_impl.GetNgExecutable(
+      input_tensors, input_shapes, static_input_map, ng_exec,
+      ng_exec_call_limiter, ng_exec_bindings, ng_exec_trivial_outputs));
+  // The weights, the input and the output
+  ASSERT_EQ(ExecCacheBudget::GetChargedBytes(),
+            charged_bytes + 3 * tensor_bytes);
+
+  ng_encap_impl.ClearExecMaps();
+  ASSERT_EQ(ExecCacheBudget::GetChargedBytes(), charged_bytes);
+  ExecCacheBudget::SetBudgetBytes(budget_bytes);
+  RestoreEnv(env_map);
+}
+
+// Test: The cluster graph is only built when it is needed
+TEST(EncapsulateOp, BuildGraph) {
+  Graph g(OpRegistry::Global());
+  Node* arg;
+  ASSERT_OK(NodeBuilder("arg", "_Arg")
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&g, &arg));
+  Node* abs;
+  ASSERT_OK(NodeBuilder("abs", "Abs")
+                .Input(arg, 0)
+                .Attr("T", DT_FLOAT)
+                .Finalize(&g, &abs));
+  Node* ret;
+  ASSERT_OK(NodeBuilder("ret", "_Retval")
+                .Input(abs, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("index", 0)
+                .Finalize(&g, &ret));
+  GraphDef graph_def;
+  g.ToGraphDef(&graph_def);
+
+  NGraphEncapsulateImpl ng_encap_impl;
+  ng_encap_impl.SetGraphDef(&graph_def);
+  ASSERT_EQ(ng_encap_impl.m_graph.num_op_nodes(), 0);
+  ASSERT_OK(ng_encap_impl.BuildGraph());
+  ASSERT_EQ(ng_encap_impl.m_graph.num_op_nodes(), 3);
+  ASSERT_OK(ng_encap_impl.BuildGraph());
+  ASSERT_EQ(ng_encap_impl.m_graph.num_op_nodes(), 3);
+}
+
+// Test: The device and plugin config attributes of a cluster pick the
+// latency profile for small clusters
+TEST(EncapsulateOp, SetBackendAttributes) {
+  NGraphEncapsulateImpl ng_encap_impl;
+  string default_key;
+  ASSERT_OK(ng_encap_impl.GetBackendKey(default_key));
+
+  std::unordered_map<string, string> attributes{
+      {"ie_device", "MULTI:CPU"},
+      {"ie_config_CPU_THROUGHPUT_STREAMS", "CPU_THROUGHPUT_AUTO"},
+      {"ie_latency_config_CPU_THROUGHPUT_STREAMS", "1"},
+      {"ie_latency_max_ops", "0"}};
+  // The cluster graph is empty, so it is small enough for the latency profile
+  ASSERT_OK(ng_encap_impl.SetBackendAttributes(attributes));
+  string latency_key;
+  ASSERT_OK(ng_encap_impl.GetBackendKey(latency_key));
+  ASSERT_EQ(latency_key, default_key + ";CPU_THROUGHPUT_STREAMS=1");
+
+  attributes["ie_latency_max_ops"] = "-1";
+  ASSERT_OK(ng_encap_impl.SetBackendAttributes(attributes));
+  string throughput_key;
+  ASSERT_OK(ng_encap_impl.GetBackendKey(throughput_key));
+  ASSERT_EQ(
+      throughput_key,
+      default_key + "/MULTI:CPU;CPU_THROUGHPUT_STREAMS=CPU_THROUGHPUT_AUTO");
+
+  attributes["ie_latency_max_ops"] = "few";
+  ASSERT_NOT_OK(ng_encap_impl.SetBackendAttributes(attributes));
+
+#if defined(ENABLE_OPENVINO)
+  // The configuration set on the backend is part of the key. PERF_COUNT is
+  // off by default. The backend is shared with the other tests, so its
+  // configuration is restored at the end.
+  auto ie_backend =
+      dynamic_pointer_cast<IE_Backend>(BackendManager::GetBackend());
+  ASSERT_NE(ie_backend, nullptr);
+  map<string, string> saved_config = ie_backend->get_config();
+  auto restore_config = gtl::MakeCleanup(
+      [ie_backend, saved_config]() { ie_backend->reset_config(saved_config); });
+  string error;
+  ASSERT_TRUE(ie_backend->set_config({{"PERF_COUNT", "NO"}}, error));
+  attributes["ie_latency_max_ops"] = "-1";
+  ASSERT_OK(ng_encap_impl.SetBackendAttributes(attributes));
+  string backend_name, configured_key;
+  ASSERT_OK(BackendManager::GetBackendName(backend_name));
+  ASSERT_OK(ng_encap_impl.GetBackendKey(configured_key));
+  ASSERT_EQ(configured_key,
+            backend_name +
+                "/MULTI:CPU;CPU_THROUGHPUT_STREAMS=CPU_THROUGHPUT_AUTO;"
+                "PERF_COUNT=NO");
+#endif
+}
 }
 }
 }
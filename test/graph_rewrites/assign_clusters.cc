@@ -20,6 +20,7 @@
 
 #include "logging/tf_graph_writer.h"
 #include "ngraph_bridge/ngraph_assign_clusters.h"
+#include "ngraph_bridge/ngraph_mark_for_clustering.h"
 #include "ngraph_bridge/ngraph_utils.h"
 #include "test/test_utilities.h"
 
@@ -168,6 +169,54 @@ TEST(AssignClusters, Cone) {
   ASSERT_EQ(node3_cluster, -1);
 }
 
+// Test: Nodes assigned to different backends are not clustered together
+TEST(AssignClusters, Backends) {
+  Graph g(OpRegistry::Global());
+
+  Tensor t(DT_FLOAT, TensorShape{2, 3});
+
+  Node* node1;
+  ASSERT_OK(NodeBuilder("node1", "Const")
+                .Attr("dtype", DT_FLOAT)
+                .Attr("value", t)
+                .Attr("_ngraph_marked_for_clustering", true)
+                .Attr("_ngraph_backend", "INTERPRETER")
+                .Finalize(&g, &node1));
+
+  Node* node2;
+  ASSERT_OK(NodeBuilder("node2", "Abs")
+                .Input(node1, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("_ngraph_marked_for_clustering", true)
+                .Attr("_ngraph_backend", "INTERPRETER")
+                .Finalize(&g, &node2));
+
+  Node* node3;
+  ASSERT_OK(NodeBuilder("node3", "Abs")
+                .Input(node2, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("_ngraph_marked_for_clustering", true)
+                .Attr("_ngraph_backend", "CPU")
+                .Finalize(&g, &node3));
+
+  Node* source = g.source_node();
+  Node* sink = g.sink_node();
+  g.AddEdge(source, Graph::kControlSlot, node1, Graph::kControlSlot);
+  g.AddEdge(node3, Graph::kControlSlot, sink, Graph::kControlSlot);
+
+  ASSERT_OK(AssignClusters(&g));
+
+  int node1_cluster, node2_cluster, node3_cluster;
+  ASSERT_OK(GetNodeCluster(node1, &node1_cluster));
+  ASSERT_OK(GetNodeCluster(node2, &node2_cluster));
+  ASSERT_OK(GetNodeCluster(node3, &node3_cluster));
+
+  ASSERT_EQ(node1_cluster, node2_cluster);
+  ASSERT_NE(node2_cluster, node3_cluster);
+  ASSERT_EQ(GetNodeBackend(node2), "INTERPRETER");
+  ASSERT_EQ(GetNodeBackend(node3), "CPU");
+}
+
 }  // namespace testing
 
 }  // namespace ngraph_bridge
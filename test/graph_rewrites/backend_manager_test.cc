@@ -95,6 +95,36 @@ TEST(BackendManager, GetBackendName) {
   RestoreEnv(env_map);
 }
 
+// Test: Backends are kept by name, alongside the currently set one
+TEST(BackendManager, GetBackendByName) {
+  auto env_map = StoreEnv({"NGRAPH_TF_BACKEND"});
+  UnsetBackendUsingEnvVar();
+  ASSERT_OK(BackendManager::SetBackend("CPU"));
+
+  shared_ptr<Backend> current, cpu;
+  ASSERT_OK(BackendManager::GetBackend("", current));
+  ASSERT_EQ(current, BackendManager::GetBackend());
+  ASSERT_OK(BackendManager::GetBackend("CPU", cpu));
+  ASSERT_EQ(cpu, current);
+
+#if !defined(ENABLE_OPENVINO)
+  shared_ptr<Backend> interpreter, interpreter_again;
+  ASSERT_OK(BackendManager::GetBackend("INTERPRETER", interpreter));
+  ASSERT_NE(interpreter, cpu);
+  ASSERT_OK(BackendManager::GetBackend("INTERPRETER", interpreter_again));
+  ASSERT_EQ(interpreter_again, interpreter);
+#endif
+
+  // The currently set backend does not change
+  string backend;
+  ASSERT_OK(BackendManager::GetBackendName(backend));
+  ASSERT_EQ(backend, "CPU");
+  shared_ptr<Backend> dummy;
+  ASSERT_NOT_OK(BackendManager::GetBackend("DUMMY", dummy));
+
+  RestoreEnv(env_map);
+}
+
 }  // namespace testing
 }  // namespace ngraph_bridge
 }  // namespace tensorflow
@@ -0,0 +1,199 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+#include "gtest/gtest.h"
+
+#include "tensorflow/core/graph/graph.h"
+#include "tensorflow/core/graph/node_builder.h"
+
+#include "ngraph_bridge/ngraph_assign_clusters.h"
+#include "ngraph_bridge/ngraph_fuse_clusters.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+
+namespace ngraph_bridge {
+
+namespace testing {
+
+class FuseClustersTest : public ::testing::Test {
+ protected:
+  void SetUp() override {
+    m_env_map = StoreEnv({"NGRAPH_TF_FUSE_CLUSTERS"});
+    SetEnvVariable("NGRAPH_TF_FUSE_CLUSTERS", "1");
+  }
+
+  void TearDown() override { RestoreEnv(m_env_map); }
+
+  // Adds a float Const in cluster (-1 for no cluster)
+  Node* AddConst(Graph& g, const string& name, int cluster) {
+    Tensor t(DT_FLOAT, TensorShape{2, 3});
+    NodeBuilder builder(name, "Const");
+    builder.Attr("dtype", DT_FLOAT).Attr("value", t);
+    return Finalize(g, builder, cluster);
+  }
+
+  // Adds an Abs of input in cluster (-1 for no cluster)
+  Node* AddAbs(Graph& g, const string& name, Node* input, int cluster) {
+    NodeBuilder builder(name, "Abs");
+    builder.Input(input, 0).Attr("T", DT_FLOAT);
+    return Finalize(g, builder, cluster);
+  }
+
+  Node* Finalize(Graph& g, NodeBuilder& builder, int cluster) {
+    if (cluster >= 0) {
+      builder.Attr("_ngraph_marked_for_clustering", true)
+          .Attr("_ngraph_cluster", cluster);
+    }
+    Node* node;
+    EXPECT_EQ(builder.Finalize(&g, &node), Status::OK());
+    return node;
+  }
+
+  int Cluster(const Node* node) {
+    int cluster;
+    EXPECT_EQ(GetNodeCluster(node, &cluster), Status::OK());
+    return cluster;
+  }
+
+  unordered_map<string, string> m_env_map;
+};
+
+// Const(0) -> Abs(0) -> Abs(1) -> Abs(1)
+TEST_F(FuseClustersTest, Chain) {
+  Graph g(OpRegistry::Global());
+  Node* node1 = AddConst(g, "node1", 0);
+  Node* node2 = AddAbs(g, "node2", node1, 0);
+  Node* node3 = AddAbs(g, "node3", node2, 1);
+  Node* node4 = AddAbs(g, "node4", node3, 1);
+
+  // Nothing changes unless the pass is enabled
+  UnsetEnvVariable("NGRAPH_TF_FUSE_CLUSTERS");
+  ASSERT_OK(FuseClusters(&g));
+  ASSERT_EQ(Cluster(node3), 1);
+
+  SetEnvVariable("NGRAPH_TF_FUSE_CLUSTERS", "1");
+  ASSERT_OK(FuseClusters(&g));
+  ASSERT_EQ(Cluster(node1), 0);
+  ASSERT_EQ(Cluster(node2), 0);
+  ASSERT_EQ(Cluster(node3), 0);
+  ASSERT_EQ(Cluster(node4), 0);
+}
+
+// Clusters are not fused when there is a path between them through a node
+// that runs on TF, or when they are on different backends
+//
+//  Const(0) -> Abs(0) -> Abs(-1) -> Abs(1) -> Abs(2, CPU)
+//                 \                  ^
+//                  ------------------
+TEST_F(FuseClustersTest, NotFused) {
+  Graph g(OpRegistry::Global());
+  Node* node1 = AddConst(g, "node1", 0);
+  Node* node2 = AddAbs(g, "node2", node1, 0);
+  Node* node3 = AddAbs(g, "node3", node2, -1);
+
+  Node* node4;
+  ASSERT_OK(NodeBuilder("node4", "AddV2")
+                .Input(node3, 0)
+                .Input(node2, 0)
+                .Attr("T", DT_FLOAT)
+                .Attr("_ngraph_marked_for_clustering", true)
+                .Attr("_ngraph_cluster", 1)
+                .Finalize(&g, &node4));
+
+  NodeBuilder builder("node5", "Abs");
+  builder.Input(node4, 0).Attr("T", DT_FLOAT).Attr("_ngraph_backend", "CPU");
+  Node* node5 = Finalize(g, builder, 2);
+
+  ASSERT_OK(FuseClusters(&g));
+  ASSERT_EQ(Cluster(node2), 0);
+  ASSERT_EQ(Cluster(node4), 1);
+  ASSERT_EQ(Cluster(node5), 2);
+}
+
+// A static input computed in one cluster keeps the cluster reading it apart
+TEST_F(FuseClustersTest, StaticInput) {
+  Graph g(OpRegistry::Global());
+  Node* node1 = AddConst(g, "node1", 0);
+
+  NodeBuilder shape_builder("node2", "Shape");
+  shape_builder.Input(node1, 0).Attr("T", DT_FLOAT).Attr("out_type", DT_INT32);
+  Node* node2 = Finalize(g, shape_builder, 0);
+
+  NodeBuilder reshape_builder("node3", "Reshape");
+  reshape_builder.Input(node1, 0)
+      .Input(node2, 0)
+      .Attr("T", DT_FLOAT)
+      .Attr("Tshape", DT_INT32)
+      .Attr("_ngraph_static_inputs", std::vector<int32>{1});
+  Node* node3 = Finalize(g, reshape_builder, 1);
+
+  ASSERT_OK(FuseClusters(&g));
+  ASSERT_EQ(Cluster(node2), 0);
+  ASSERT_EQ(Cluster(node3), 1);
+}
+
+#if !defined(NGRAPH_TF_DISABLE_DEADNESS_CHECK)
+// An always live cluster is fused into the cluster it feeds, whose nodes
+// are only live when the Switch forwards to them, unless it also feeds a
+// node that is always live
+//
+//  Const(0) -> Abs(0) ------------> AddV2(1) -> Abs(1)
+//                 \                  ^
+//                  -> Abs(-1)        |
+//  Switch(-1) -----------------------
+TEST_F(FuseClustersTest, Deadness) {
+  for (bool live_output : {false, true}) {
+    Graph g(OpRegistry::Global());
+    Node* data = AddConst(g, "data", -1);
+    Tensor pred_value(DT_BOOL, TensorShape{});
+    pred_value.scalar<bool>()() = true;
+    Node* pred;
+    ASSERT_OK(NodeBuilder("pred", "Const")
+                  .Attr("dtype", DT_BOOL)
+                  .Attr("value", pred_value)
+                  .Finalize(&g, &pred));
+    Node* switch_node;
+    ASSERT_OK(NodeBuilder("switch", "Switch")
+                  .Input(data, 0)
+                  .Input(pred, 0)
+                  .Attr("T", DT_FLOAT)
+                  .Finalize(&g, &switch_node));
+
+    Node* node1 = AddConst(g, "node1", 0);
+    Node* node2 = AddAbs(g, "node2", node1, 0);
+    NodeBuilder add_builder("node3", "AddV2");
+    add_builder.Input(node2, 0).Input(switch_node, 1).Attr("T", DT_FLOAT);
+    Node* node3 = Finalize(g, add_builder, 1);
+    Node* node4 = AddAbs(g, "node4", node3, 1);
+    if (live_output) {
+      AddAbs(g, "node5", node2, -1);
+    }
+
+    ASSERT_OK(FuseClusters(&g));
+    ASSERT_EQ(Cluster(node2), 0);
+    ASSERT_EQ(Cluster(node3), live_output ? 1 : 0);
+    ASSERT_EQ(Cluster(node4), live_output ? 1 : 0);
+  }
+}
+#endif
+
+}  // namespace testing
+
+}  // namespace ngraph_bridge
+
+}  // namespace tensorflow
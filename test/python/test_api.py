@@ -58,3 +58,19 @@ class TestNgraphAPI(NgraphTest):
     def test_stop_logging_placement(self):
         ngraph_bridge.stop_logging_placement()
         assert ngraph_bridge.is_logging_placement() == 0
+
+    def test_cache_stats(self):
+        ngraph_bridge.reset_cache_stats()
+        stats = ngraph_bridge.get_cache_stats()
+        assert stats == {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'compile_time_saved_ms': 0
+        }
+
+    def test_async_compile_stats(self):
+        ngraph_bridge.reset_async_compile_stats()
+        stats = ngraph_bridge.get_async_compile_stats()
+        assert stats['fallbacks'] == 0
+        assert stats['compiles'] == 0
@@ -0,0 +1,99 @@
+# ==============================================================================
+#  Copyright 2020 Intel Corporation
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ==============================================================================
+"""nGraph TensorFlow bridge float16 tests on the OpenVINO backend
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import pytest
+import numpy as np
+
+import tensorflow as tf
+tf.compat.v1.disable_eager_execution()
+from common import NgraphTest
+import ngraph_bridge
+
+np.random.seed(5)
+
+
+@pytest.mark.skipif(
+    not ngraph_bridge.is_openvino_enabled(),
+    reason="Only the OpenVINO backend runs float16 clusters")
+class TestFloat16(NgraphTest):
+
+    def run_clustered(self, run_test):
+        misses = ngraph_bridge.get_cache_stats()['misses']
+        result = self.with_ngraph(run_test)
+        # The cluster was compiled, rather than left to TF
+        assert ngraph_bridge.get_cache_stats()['misses'] > misses
+        return result
+
+    def test_matmul_float16(self):
+        a = tf.compat.v1.placeholder(tf.float16, [2, 3], name='a')
+        x = tf.compat.v1.placeholder(tf.float16, [3, 4], name='x')
+        b = tf.compat.v1.placeholder(tf.float16, [4], name='b')
+        a_inp = np.random.rand(2, 3).astype(np.float16)
+        x_inp = np.random.rand(3, 4).astype(np.float16)
+        b_inp = np.random.rand(4).astype(np.float16)
+        out = tf.nn.relu(tf.matmul(a, x) + b)
+
+        def run_test(sess):
+            return sess.run(out, feed_dict={a: a_inp, x: x_inp, b: b_inp})
+
+        ng_val = self.run_clustered(run_test)
+        assert ng_val.dtype == np.float16
+        assert np.allclose(
+            ng_val, self.without_ngraph(run_test), rtol=1e-2, atol=1e-2)
+
+    def test_cast_float16(self):
+        a = tf.compat.v1.placeholder(tf.float32, [2, 3], name='a')
+        a_inp = np.random.rand(2, 3).astype(np.float32)
+        half = tf.cast(a, dtype=tf.float16)
+        out = tf.cast(half * tf.constant(2.0, dtype=tf.float16), tf.float32)
+
+        def run_test(sess):
+            return sess.run(out, feed_dict={a: a_inp})
+
+        assert np.allclose(
+            self.run_clustered(run_test), 2 * a_inp, rtol=1e-2, atol=1e-2)
+
+    # NGRAPH_TF_IE_LOWER_PRECISION runs the f32 computations in f16
+    def test_lower_precision_float16(self):
+        env_value = os.environ.get('NGRAPH_TF_IE_LOWER_PRECISION')
+        os.environ['NGRAPH_TF_IE_LOWER_PRECISION'] = 'f16'
+        try:
+            a = tf.compat.v1.placeholder(tf.float32, [2, 3], name='a')
+            x = tf.compat.v1.placeholder(tf.float32, [3, 4], name='x')
+            a_inp = np.random.rand(2, 3).astype(np.float32)
+            x_inp = np.random.rand(3, 4).astype(np.float32)
+            out = tf.nn.sigmoid(tf.matmul(a, x))
+
+            def run_test(sess):
+                return sess.run(out, feed_dict={a: a_inp, x: x_inp})
+
+            ng_val = self.run_clustered(run_test)
+            assert ng_val.dtype == np.float32
+            assert np.allclose(
+                ng_val, self.without_ngraph(run_test), rtol=1e-2, atol=1e-2)
+        finally:
+            if env_value is None:
+                os.environ.pop('NGRAPH_TF_IE_LOWER_PRECISION', None)
+            else:
+                os.environ['NGRAPH_TF_IE_LOWER_PRECISION'] = env_value
@@ -0,0 +1,88 @@
+# ==============================================================================
+#  Copyright 2020 Intel Corporation
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ==============================================================================
+"""nGraph TensorFlow bridge NHWC blobs tests
+
+With NGRAPH_TF_IE_NHWC_BLOBS set, the OpenVINO backend drops the transposes
+from NHWC at the inputs and to NHWC at the outputs of a cluster and passes
+NHWC blobs instead. The results must be the same as without it.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import pytest
+import numpy as np
+
+import tensorflow as tf
+from tensorflow.python.ops import nn_ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.framework import dtypes
+
+from common import NgraphTest
+
+
+class TestIENHWCBlobs(NgraphTest):
+    INPUT_SIZES = [2, 5, 6, 3]
+    FILTER_SIZES = [3, 3, 3, 3]
+
+    def setup_method(self):
+        self.env_value = os.environ.get('NGRAPH_TF_IE_NHWC_BLOBS')
+        os.environ['NGRAPH_TF_IE_NHWC_BLOBS'] = '1'
+
+    def teardown_method(self):
+        if self.env_value is None:
+            os.environ.pop('NGRAPH_TF_IE_NHWC_BLOBS', None)
+        else:
+            os.environ['NGRAPH_TF_IE_NHWC_BLOBS'] = self.env_value
+
+    def test_conv2d_pool(self):
+        inp_values = np.random.rand(*self.INPUT_SIZES)
+        filt_values = np.random.rand(*self.FILTER_SIZES)
+
+        def run_test(sess):
+            inp = array_ops.placeholder(dtypes.float32)
+            filt = array_ops.placeholder(dtypes.float32)
+            conv = nn_ops.conv2d(
+                inp, filt, strides=[1, 1, 1, 1], padding="SAME")
+            pool = nn_ops.max_pool(
+                nn_ops.relu(conv), [1, 2, 2, 1], [1, 2, 2, 1], padding="VALID")
+            return sess.run(pool, {inp: inp_values, filt: filt_values})
+
+        assert np.allclose(
+            self.without_ngraph(run_test), self.with_ngraph(run_test))
+
+    # The input also feeds an elementwise op, so only some of its uses are
+    # transposes
+    def test_conv2d_residual(self):
+        inp_values = np.random.rand(*self.INPUT_SIZES)
+        filt_values = np.random.rand(*self.FILTER_SIZES)
+
+        def run_test(sess):
+            inp = array_ops.placeholder(dtypes.float32)
+            filt = array_ops.placeholder(dtypes.float32)
+            conv = nn_ops.conv2d(
+                inp, filt, strides=[1, 1, 1, 1], padding="SAME")
+            return sess.run([conv + inp, conv], {
+                inp: inp_values,
+                filt: filt_values
+            })
+
+        expected = self.without_ngraph(run_test)
+        actual = self.with_ngraph(run_test)
+        for exp, act in zip(expected, actual):
+            assert np.allclose(exp, act)
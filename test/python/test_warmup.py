@@ -0,0 +1,50 @@
+# ==============================================================================
+#  Copyright 2020 Intel Corporation
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ==============================================================================
+"""nGraph TensorFlow bridge warmup API test
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import pytest
+
+import numpy as np
+import tensorflow as tf
+tf.compat.v1.disable_eager_execution()
+
+from common import NgraphTest
+import ngraph_bridge
+
+
+class TestWarmup(NgraphTest):
+
+    def test_warmup(self):
+        x = tf.compat.v1.placeholder(tf.float32, shape=(None, 3), name='x')
+        out = tf.tanh(x * 2.0 + 1.0)
+
+        def run_test(sess):
+            shapes = [{'x': (1, 3)}, {'x': (2, 3)}, {x: (4, 3)}]
+            compiled = ngraph_bridge.warmup(sess, shapes, parallelism=3)
+            misses = ngraph_bridge.get_cache_stats()['misses']
+            # Traffic with the warmed up shapes does not compile again
+            for batch in (1, 2, 4):
+                sess.run(out, feed_dict={x: np.ones((batch, 3))})
+            return compiled, ngraph_bridge.get_cache_stats()['misses'] - misses
+
+        compiled, misses = self.with_ngraph(run_test)
+        assert compiled >= 3
+        assert misses == 0
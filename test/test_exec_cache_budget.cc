@@ -0,0 +1,119 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+#include <vector>
+
+#include "gtest/gtest.h"
+
+#include "ngraph_bridge/ngraph_exec_cache_budget.h"
+
+using namespace std;
+
+namespace tensorflow {
+namespace ngraph_bridge {
+namespace testing {
+
+class ExecCacheBudgetTest : public ::testing::Test {
+ protected:
+  void SetUp() override {
+    m_saved_budget = ExecCacheBudget::GetBudgetBytes();
+    ExecCacheBudget::SetBudgetBytes(100 * 1024);
+  }
+
+  void TearDown() override {
+    for (int owner = 0; owner < 3; owner++) {
+      ExecCacheBudget::ReleaseAll(kFirstOwner + owner);
+    }
+    ExecCacheBudget::SetBudgetBytes(m_saved_budget);
+  }
+
+  static ExecCacheBudget::Key MakeKey(int owner, uint64 id) {
+    Signature signature;
+    signature.lo = id;
+    return ExecCacheBudget::Key(kFirstOwner + owner, signature);
+  }
+
+  // Owner ids that do not clash with live encapsulate ops
+  static const int kFirstOwner = 1 << 20;
+  int64 m_saved_budget;
+};
+
+// Executables that fit in the budget are never evicted
+TEST_F(ExecCacheBudgetTest, WithinBudget) {
+  vector<ExecCacheBudget::Key> victims;
+  ExecCacheBudget::Charge(MakeKey(0, 1), 40 * 1024, 10, &victims);
+  ExecCacheBudget::Charge(MakeKey(1, 1), 40 * 1024, 10, &victims);
+  ASSERT_TRUE(victims.empty());
+  ASSERT_EQ(ExecCacheBudget::GetChargedBytes(), 80 * 1024);
+
+  ExecCacheBudget::Release(MakeKey(0, 1));
+  ASSERT_EQ(ExecCacheBudget::GetChargedBytes(), 40 * 1024);
+}
+
+// Going over budget evicts the executable with the lowest compile time per
+// byte, whichever op owns it, and never the one just charged
+TEST_F(ExecCacheBudgetTest, EvictsCheapestPerByteAcrossOps) {
+  vector<ExecCacheBudget::Key> victims;
+  ExecCacheBudget::Charge(MakeKey(0, 1), 40 * 1024, 1000, &victims);
+  ExecCacheBudget::Charge(MakeKey(1, 1), 40 * 1024, 10, &victims);
+  ExecCacheBudget::Charge(MakeKey(2, 1), 40 * 1024, 1, &victims);
+  ASSERT_EQ(victims.size(), 1);
+  ASSERT_EQ(victims[0], MakeKey(1, 1));
+  ASSERT_EQ(ExecCacheBudget::GetChargedBytes(), 80 * 1024);
+}
+
+// A large executable displaces several small ones
+TEST_F(ExecCacheBudgetTest, EvictsUntilWithinBudget) {
+  vector<ExecCacheBudget::Key> victims;
+  ExecCacheBudget::Charge(MakeKey(0, 1), 30 * 1024, 10, &victims);
+  ExecCacheBudget::Charge(MakeKey(0, 2), 30 * 1024, 10, &victims);
+  ExecCacheBudget::Charge(MakeKey(1, 1), 30 * 1024, 10, &victims);
+  ASSERT_TRUE(victims.empty());
+  ExecCacheBudget::Charge(MakeKey(2, 1), 70 * 1024, 10, &victims);
+  ASSERT_EQ(victims.size(), 2);
+  ASSERT_EQ(ExecCacheBudget::GetChargedBytes(), 100 * 1024);
+}
+
+// A hit raises the priority of an executable above entries that were not
+// used since the last eviction
+TEST_F(ExecCacheBudgetTest, TouchProtectsRecentlyUsed) {
+  vector<ExecCacheBudget::Key> victims;
+  ExecCacheBudget::Charge(MakeKey(0, 1), 40 * 1024, 10, &victims);
+  ExecCacheBudget::Charge(MakeKey(0, 2), 40 * 1024, 10, &victims);
+  ExecCacheBudget::Charge(MakeKey(1, 1), 40 * 1024, 10, &victims);
+  ASSERT_EQ(victims.size(), 1);
+  ASSERT_EQ(victims[0], MakeKey(0, 1));
+  victims.clear();
+
+  // Without the hit, the oldest entry (0, 2) would be evicted next
+  ExecCacheBudget::Touch(MakeKey(0, 2));
+  ExecCacheBudget::Charge(MakeKey(2, 1), 40 * 1024, 10, &victims);
+  ASSERT_EQ(victims.size(), 1);
+  ASSERT_EQ(victims[0], MakeKey(1, 1));
+}
+
+// Entries of an op are all released when the op goes away
+TEST_F(ExecCacheBudgetTest, ReleaseAll) {
+  vector<ExecCacheBudget::Key> victims;
+  ExecCacheBudget::Charge(MakeKey(0, 1), 10 * 1024, 10, &victims);
+  ExecCacheBudget::Charge(MakeKey(0, 2), 10 * 1024, 10, &victims);
+  ExecCacheBudget::Charge(MakeKey(1, 1), 10 * 1024, 10, &victims);
+  ExecCacheBudget::ReleaseAll(kFirstOwner);
+  ASSERT_EQ(ExecCacheBudget::GetChargedBytes(), 10 * 1024);
+}
+
+}  // namespace testing
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
@@ -17,7 +17,8 @@
 #include <memory>
 #include <thread>
 
-#include "absl/synchronization/barrier.h"
+#include "absl/synchronization/mutex.h"
+#include "absl/synchronization/notification.h"
 #include "gtest/gtest.h"
 
 #include "tensorflow/core/common_runtime/optimization_registry.h"
@@ -42,20 +43,35 @@ namespace testing {
 class NGraphDataCacheTest : public ::testing::Test {
  protected:
   NgraphDataCache<std::string, int> m_ng_data_cache{3};
-  int num_threads = 2;
-  absl::Barrier* barrier_ = new absl::Barrier(num_threads);
+  int num_threads = 8;
   std::atomic<int> create_count{0};
   int destroy_count = 0;
   bool item_evicted = false;
 
+  // Blocks until all the other threads wait for the item being created
+  void WaitForOtherThreads() {
+    auto& cache = m_ng_data_cache;
+    int64 num_waits = num_threads - 1;
+    absl::MutexLock lock(&cache.m_mutex);
+    auto all_waiting = [&cache, num_waits]() {
+      return cache.m_num_waits >= num_waits;
+    };
+    cache.m_mutex.Await(
+        absl::Condition(&all_waiting, &decltype(all_waiting)::operator()));
+  }
+
   std::pair<Status, int> CreateItem(std::string abc) {
     create_count++;
-    if (barrier_->Block()) {
-      delete barrier_;
-    }
+    WaitForOtherThreads();
     return std::make_pair(Status::OK(), 3);
   }
 
+  std::pair<Status, int> CreateItemWaitError(std::string abc) {
+    create_count++;
+    WaitForOtherThreads();
+    return std::make_pair(errors::Internal("Failed to create item"), 0);
+  }
+
   std::pair<Status, int> CreateItemNoBarrier(std::string abc) {
     return std::make_pair(Status::OK(), 3);
   }
@@ -79,10 +95,13 @@ TEST_F(NGraphDataCacheTest, SameKeyMultiThread) {
         &NGraphDataCacheTest_SameKeyMultiThread_Test::CreateItemReturnError,
         this, std::placeholders::_1);
     bool cache_hit;
-    ASSERT_OK(
-        (m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit)).first);
+    auto status_item =
+        m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit);
+    ASSERT_OK(status_item.first);
+    ASSERT_EQ(status_item.second, 3);
     ASSERT_OK(
         m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit).first);
+    ASSERT_EQ(cache_hit, true);
     ASSERT_NOT_OK(
         m_ng_data_cache.LookUpOrCreate("def", create_item_ret_err, cache_hit)
             .first);
@@ -90,19 +109,83 @@ TEST_F(NGraphDataCacheTest, SameKeyMultiThread) {
         m_ng_data_cache.LookUpOrCreate("def", create_item_ret_err, cache_hit)
             .first.error_message(),
         "Failed to create item");
+  };
+
+  std::vector<std::thread> threads;
+  for (int i = 0; i < num_threads; i++) {
+    threads.emplace_back(worker, i);
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  // The threads missing on "abc" together waited for a single create
+  ASSERT_EQ(create_count, 1);
+  ASSERT_EQ(m_ng_data_cache.m_num_waits, num_threads - 1);
+  ASSERT_EQ(m_ng_data_cache.m_ng_items.size(), 1);
+  ASSERT_EQ(m_ng_data_cache.m_ng_items.Peek("def"), nullptr);
+  ASSERT_EQ(m_ng_data_cache.m_in_flight.size(), 0);
+}
 
+// Tests that the threads waiting for an item get the error of its create,
+// and that the error is not cached
+TEST_F(NGraphDataCacheTest, CreateErrorMultiThread) {
+  auto create_item_err = std::bind(
+      &NGraphDataCacheTest_CreateErrorMultiThread_Test::CreateItemWaitError,
+      this, std::placeholders::_1);
+  auto worker = [&](size_t thread_id) {
+    bool cache_hit;
+    auto status_item =
+        m_ng_data_cache.LookUpOrCreate("abc", create_item_err, cache_hit);
+    ASSERT_EQ(status_item.first.error_message(), "Failed to create item");
+    ASSERT_EQ(cache_hit, false);
   };
 
-  std::thread thread0(worker, 0);
-  std::thread thread1(worker, 1);
+  std::vector<std::thread> threads;
+  for (int i = 0; i < num_threads; i++) {
+    threads.emplace_back(worker, i);
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  ASSERT_EQ(create_count, 1);
+  ASSERT_EQ(m_ng_data_cache.m_ng_items.size(), 0);
+  ASSERT_EQ(m_ng_data_cache.m_in_flight.size(), 0);
 
-  thread0.join();
-  thread1.join();
-  // This is ensured by using Barrier inside CreateItem()
+  // The next look up tries again
+  bool cache_hit;
+  ASSERT_NOT_OK(
+      m_ng_data_cache.LookUpOrCreate("abc", create_item_err, cache_hit).first);
   ASSERT_EQ(create_count, 2);
-  ASSERT_EQ(m_ng_data_cache.m_ng_items_map.size(), 1);
-  ASSERT_EQ(m_ng_data_cache.m_ng_items_map.find("def"),
-            m_ng_data_cache.m_ng_items_map.end());
+}
+
+// Tests that waiting for another thread's create gives up after the timeout
+TEST_F(NGraphDataCacheTest, CreateTimeout) {
+  NgraphDataCache<std::string, int> ng_data_cache(3, 10);
+  absl::Notification create_started;
+  absl::Notification timed_out;
+  auto create_item = [&](std::string key) {
+    create_count++;
+    create_started.Notify();
+    timed_out.WaitForNotification();
+    return std::make_pair(Status::OK(), 3);
+  };
+
+  bool cache_hit;
+  std::thread creator([&]() {
+    bool cache_hit;
+    ASSERT_OK(
+        ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit).first);
+  });
+  create_started.WaitForNotification();
+  auto status_item =
+      ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit);
+  ASSERT_EQ(status_item.first.code(), error::DEADLINE_EXCEEDED);
+  timed_out.Notify();
+  creator.join();
+
+  ASSERT_EQ(create_count, 1);
+  ASSERT_OK(ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit).first);
+  ASSERT_EQ(cache_hit, true);
 }
 
 // Testing to ensure destoy called back is called, when cache is full.
@@ -129,6 +212,39 @@ TEST_F(NGraphDataCacheTest, TestItemEviction) {
   ASSERT_EQ(item_evicted, true);
 }
 
+// Testing that a cache hit makes the item the most recently used, so that
+// the next eviction picks a different one
+TEST_F(NGraphDataCacheTest, HitPromotesItem) {
+  auto create_item =
+      std::bind(&NGraphDataCacheTest_HitPromotesItem_Test::CreateItemNoBarrier,
+                this, std::placeholders::_1);
+  bool cache_hit;
+  ASSERT_OK(
+      m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit).first);
+  ASSERT_OK(
+      m_ng_data_cache.LookUpOrCreate("def", create_item, cache_hit).first);
+  ASSERT_OK(
+      m_ng_data_cache.LookUpOrCreate("efg", create_item, cache_hit).first);
+  ASSERT_OK(
+      m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit).first);
+  ASSERT_EQ(cache_hit, true);
+  // "def" is now the least recently used item
+  ASSERT_OK(
+      m_ng_data_cache.LookUpOrCreate("hij", create_item, cache_hit).first);
+  ASSERT_EQ(cache_hit, false);
+  ASSERT_OK(
+      m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit).first);
+  ASSERT_EQ(cache_hit, true);
+  ASSERT_OK(
+      m_ng_data_cache.LookUpOrCreate("def", create_item, cache_hit).first);
+  ASSERT_EQ(cache_hit, false);
+
+  const CacheStats& stats = m_ng_data_cache.GetStats();
+  ASSERT_EQ(stats.hits, 2);
+  ASSERT_EQ(stats.misses, 5);
+  ASSERT_EQ(stats.evictions, 2);
+}
+
 // Testing all variations of RemoveItem/All functionality
 TEST_F(NGraphDataCacheTest, RemoveItemTest) {
   auto create_item =
@@ -155,13 +271,13 @@ TEST_F(NGraphDataCacheTest, RemoveItemTest) {
       m_ng_data_cache.LookUpOrCreate("abc", create_item, cache_hit).first);
   ASSERT_OK(
       m_ng_data_cache.LookUpOrCreate("def", create_item, cache_hit).first);
-  ASSERT_EQ(m_ng_data_cache.m_ng_items_map.size(), 2);
+  ASSERT_EQ(m_ng_data_cache.m_ng_items.size(), 2);
   m_ng_data_cache.RemoveItem("def");
   m_ng_data_cache.RemoveItem("def", destroy_item);
   ASSERT_EQ(destroy_count, 0);
   m_ng_data_cache.RemoveItem("abc", destroy_item);
   ASSERT_EQ(destroy_count, 1);
-  ASSERT_EQ(m_ng_data_cache.m_ng_items_map.size(), 0);
+  ASSERT_EQ(m_ng_data_cache.m_ng_items.size(), 0);
 }
 }
 }
@@ -0,0 +1,107 @@
+/*******************************************************************************
+ * Copyright 2020 Intel Corporation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *******************************************************************************/
+#include <fstream>
+#include <string>
+
+#include "gtest/gtest.h"
+
+#include "tensorflow/core/platform/env.h"
+
+#include "ngraph_bridge/ngraph_persistent_cache.h"
+#include "test/test_utilities.h"
+
+using namespace std;
+
+namespace tensorflow {
+namespace ngraph_bridge {
+namespace testing {
+
+class PersistentExecCacheTest : public ::testing::Test {
+ protected:
+  void SetUp() override {
+    m_env_map = StoreEnv({"NGRAPH_TF_PERSISTENT_CACHE_DIR",
+                          "NGRAPH_TF_PERSISTENT_CACHE_MAX_MB"});
+    m_directory = ::testing::TempDir() + "/ngraph_persistent_cache_test";
+    SetEnvVariable("NGRAPH_TF_PERSISTENT_CACHE_DIR", m_directory);
+    UnsetEnvVariable("NGRAPH_TF_PERSISTENT_CACHE_MAX_MB");
+  }
+
+  void TearDown() override {
+    int64 undeleted_files, undeleted_dirs;
+    Env::Default()
+        ->DeleteRecursively(m_directory, &undeleted_files, &undeleted_dirs)
+        .IgnoreError();
+    RestoreEnv(m_env_map);
+  }
+
+  Signature MakeKey(const string& backend_name) {
+    Signature graph_hash, input_signature;
+    graph_hash.lo = 1;
+    input_signature.lo = 2;
+    return PersistentExecCache::MakeKey(graph_hash, input_signature,
+                                        backend_name);
+  }
+
+  unordered_map<string, string> m_env_map;
+  string m_directory;
+};
+
+TEST_F(PersistentExecCacheTest, StoreAndLoad) {
+  ASSERT_TRUE(PersistentExecCache::IsEnabled());
+  auto key = MakeKey("CPU");
+  string function, exec;
+  ASSERT_FALSE(PersistentExecCache::Load(key, function, exec));
+
+  ASSERT_OK(PersistentExecCache::Store(key, "function", "executable"));
+  ASSERT_TRUE(PersistentExecCache::Load(key, function, exec));
+  ASSERT_EQ(function, "function");
+  ASSERT_EQ(exec, "executable");
+
+  // Entries are not shared between backends
+  ASSERT_NE(MakeKey("INTERPRETER"), key);
+  ASSERT_FALSE(
+      PersistentExecCache::Load(MakeKey("INTERPRETER"), function, exec));
+}
+
+TEST_F(PersistentExecCacheTest, CorruptedEntry) {
+  auto key = MakeKey("CPU");
+  ASSERT_OK(PersistentExecCache::Store(key, "function", "executable"));
+
+  // Flip the last byte of the executable
+  string path = m_directory + "/" + key.ToString() + ".ngexec";
+  {
+    std::fstream f(path, std::ios::in | std::ios::out | std::ios::binary);
+    f.seekp(-1, std::ios::end);
+    f.put('X');
+  }
+
+  string function, exec;
+  ASSERT_FALSE(PersistentExecCache::Load(key, function, exec));
+  // The corrupted entry is gone
+  ASSERT_EQ(Env::Default()->FileExists(path).code(), error::NOT_FOUND);
+}
+
+TEST_F(PersistentExecCacheTest, SizeCap) {
+  SetEnvVariable("NGRAPH_TF_PERSISTENT_CACHE_MAX_MB", "0");
+  auto key = MakeKey("CPU");
+  ASSERT_OK(PersistentExecCache::Store(key, "function", "executable"));
+  string function, exec;
+  ASSERT_FALSE(PersistentExecCache::Load(key, function, exec));
+}
+
+}  // namespace testing
+}  // namespace ngraph_bridge
+}  // namespace tensorflow
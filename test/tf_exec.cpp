@@ -13,6 +13,9 @@
  * See the License for the specific language governing permissions and
  * limitations under the License.
  *******************************************************************************/
+#include <chrono>
+#include <thread>
+
 #include "gtest/gtest.h"
 
 #include "tensorflow/cc/client/client_session.h"
@@ -28,7 +31,10 @@
 #include "tensorflow/core/platform/env.h"
 #include "tensorflow/core/public/session.h"
 
+#include "ngraph_bridge/ngraph_async_compiler.h"
+#include "ngraph_bridge/ngraph_async_executor.h"
 #include "ngraph_bridge/ngraph_builder.h"
+#include "ngraph_bridge/ngraph_encapsulate_impl.h"
 #include "ngraph_bridge/ngraph_utils.h"
 #include "ngraph_bridge/version.h"
 #include "test/test_utilities.h"
@@ -78,6 +84,145 @@ TEST(TFExec, SingleGraphOn2Threads) {
   thread1.join();
 }
 
+// Threads that miss the executable cache together wait for one compile
+TEST(TFExec, SingleGraphConcurrentCompile) {
+  string graph_name = "test_axpy.pbtxt";
+  unique_ptr<Session> session;
+  ASSERT_OK(CreateSession(graph_name, session));
+
+  Tensor inp_tensor_val(tensorflow::DT_FLOAT, tensorflow::TensorShape({2, 3}));
+  AssignInputValues<float>(inp_tensor_val, vector<float>(6, 1.0f));
+  Tensor out_tensor_expected_val(tensorflow::DT_FLOAT,
+                                 tensorflow::TensorShape({2, 3}));
+  AssignInputValues<float>(out_tensor_expected_val, vector<float>(6, 6.0f));
+  std::vector<std::pair<string, tensorflow::Tensor>> inputs = {
+      {"x", inp_tensor_val}, {"y", inp_tensor_val}};
+
+  auto misses = NGraphEncapsulateImpl::GetExecCacheStats().misses.load();
+  const int num_threads = 8;
+  std::vector<std::thread> threads;
+  for (int i = 0; i < num_threads; i++) {
+    threads.emplace_back([&]() {
+      std::vector<Tensor> out_tensor_vals;
+      ASSERT_OK(session->Run(inputs, {"add"}, {}, &out_tensor_vals));
+      Compare(out_tensor_vals, {out_tensor_expected_val});
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  ASSERT_EQ(NGraphEncapsulateImpl::GetExecCacheStats().misses.load(),
+            misses + 1);
+}
+
+// Clusters of identities and constants forward their inputs and constants
+// as outputs, without calling the executable or allocating outputs: the
+// fetched tensors share the buffers of the feed and of the cached constant.
+TEST(TFExec, IdentityGraphForwarding) {
+  // Keep the trivial cluster
+  auto env_map = StoreEnv({"NGRAPH_TF_DISABLE_DEASSIGN_CLUSTERS"});
+  SetEnvVariable("NGRAPH_TF_DISABLE_DEASSIGN_CLUSTERS", "1");
+
+  Scope root = Scope::NewRootScope();
+  auto x = ops::Placeholder(root.WithOpName("x"), DT_FLOAT);
+  Output identity = x;
+  for (int i = 0; i < 8; i++) {
+    identity = ops::Identity(root, identity);
+  }
+  auto y = ops::Identity(root.WithOpName("y"), identity);
+  auto c = ops::Identity(root.WithOpName("c"),
+                         ops::Const(root, {{1.f, 2.f}, {3.f, 4.f}}));
+
+  Tensor x_val(DT_FLOAT, TensorShape({64, 64}));
+  AssignInputValuesRandom<float>(x_val, -10.0f, 10.0f);
+  Tensor c_expected(DT_FLOAT, TensorShape({2, 2}));
+  AssignInputValues<float>(c_expected, vector<float>{1.f, 2.f, 3.f, 4.f});
+
+  ActivateNGraph();
+  ClientSession session(root);
+  std::vector<Tensor> outputs;
+  ASSERT_OK(session.Run({{x, x_val}}, {y, c}, &outputs));
+  Compare(outputs, {x_val, c_expected});
+  const char* c_data = outputs[1].tensor_data().data();
+
+  for (int i = 0; i < 3; i++) {
+    ASSERT_OK(session.Run({{x, x_val}}, {y, c}, &outputs));
+    Compare(outputs, {x_val, c_expected});
+    ASSERT_EQ(outputs[0].tensor_data().data(), x_val.tensor_data().data());
+    ASSERT_EQ(outputs[1].tensor_data().data(), c_data);
+  }
+
+  RestoreEnv(env_map);
+}
+
+// Steps missing the executable cache run the TF graph while the executable
+// compiles in the background
+TEST(TFExec, AsyncCompileFallback) {
+  auto env_map = StoreEnv({"NGRAPH_TF_ASYNC_COMPILE"});
+  SetEnvVariable("NGRAPH_TF_ASYNC_COMPILE", "1");
+
+  string graph_name = "test_axpy.pbtxt";
+  unique_ptr<Session> session;
+  ASSERT_OK(CreateSession(graph_name, session));
+
+  Tensor inp_tensor_val(tensorflow::DT_FLOAT, tensorflow::TensorShape({2, 3}));
+  AssignInputValues<float>(inp_tensor_val, vector<float>(6, 1.0f));
+  Tensor out_tensor_expected_val(tensorflow::DT_FLOAT,
+                                 tensorflow::TensorShape({2, 3}));
+  AssignInputValues<float>(out_tensor_expected_val, vector<float>(6, 6.0f));
+  std::vector<std::pair<string, tensorflow::Tensor>> inputs = {
+      {"x", inp_tensor_val}, {"y", inp_tensor_val}};
+
+  AsyncCompileStats& stats = AsyncCompiler::GetStats();
+  auto fallbacks = stats.fallbacks.load();
+  std::vector<Tensor> out_tensor_vals;
+  ASSERT_OK(session->Run(inputs, {"add"}, {}, &out_tensor_vals));
+  Compare(out_tensor_vals, {out_tensor_expected_val});
+  ASSERT_EQ(stats.fallbacks.load(), fallbacks + 1);
+
+  while (stats.queue_depth.load() > 0) {
+    std::this_thread::sleep_for(std::chrono::milliseconds(10));
+  }
+  ASSERT_OK(session->Run(inputs, {"add"}, {}, &out_tensor_vals));
+  Compare(out_tensor_vals, {out_tensor_expected_val});
+  ASSERT_EQ(stats.fallbacks.load(), fallbacks + 1);
+
+  RestoreEnv(env_map);
+}
+
+// Encapsulate ops run off the inter-op threads
+TEST(TFExec, AsyncExecution) {
+  auto env_map = StoreEnv({"NGRAPH_TF_ASYNC_EXECUTION"});
+  SetEnvVariable("NGRAPH_TF_ASYNC_EXECUTION", "1");
+
+  string graph_name = "test_axpy.pbtxt";
+  unique_ptr<Session> session;
+  ASSERT_OK(CreateSession(graph_name, session));
+
+  Tensor inp_tensor_val(tensorflow::DT_FLOAT, tensorflow::TensorShape({2, 3}));
+  AssignInputValues<float>(inp_tensor_val, vector<float>(6, 1.0f));
+  Tensor out_tensor_expected_val(tensorflow::DT_FLOAT,
+                                 tensorflow::TensorShape({2, 3}));
+  AssignInputValues<float>(out_tensor_expected_val, vector<float>(6, 6.0f));
+  std::vector<std::pair<string, tensorflow::Tensor>> inputs = {
+      {"x", inp_tensor_val}, {"y", inp_tensor_val}};
+
+  AsyncExecutionStats& stats = AsyncExecutor::GetStats();
+  auto executions = stats.executions.load();
+  std::vector<Tensor> out_tensor_vals;
+  for (int i = 0; i < 2; i++) {
+    ASSERT_OK(session->Run(inputs, {"add"}, {}, &out_tensor_vals));
+    Compare(out_tensor_vals, {out_tensor_expected_val});
+  }
+  // The executions are counted once done has been called
+  while (stats.queue_depth.load() > 0) {
+    std::this_thread::sleep_for(std::chrono::milliseconds(10));
+  }
+  ASSERT_GE(stats.executions.load(), executions + 2);
+
+  RestoreEnv(env_map);
+}
+
 TEST(TFExec, hello_world) {
   Scope root = Scope::NewRootScope();
 